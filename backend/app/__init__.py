@@ -1,12 +1,16 @@
 from flask import Flask
 from flask_cors import CORS
 from app.db.extensions import db, migrate
+from app.db.engine import init_db, engine_options, add_statement_timeout
 from app.config import Config
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Flask-SQLAlchemy's engine gets the same pool and timeout settings as app.db.engine
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(Config.SQLALCHEMY_DATABASE_URI)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -24,7 +28,9 @@ def create_app():
 
      # Ensure that the database is initialized and tables are created
     with app.app_context():
+        add_statement_timeout(db.engine)
         db.create_all()  # This will create tables if they don't exist
+        init_db()  # And the funding tables, which are not Flask-SQLAlchemy models
         # Optionally, run db upgrade to ensure all migrations are applied
         # from flask_migrate import upgrade
         # upgrade()
@@ -0,0 +1,308 @@
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.config import Config
+from app.logger import logger
+from app.db.engine import engine
+from app.db.models import CacheGeneration
+
+try:
+    import redis
+except ImportError:  # Only needed when CACHE_REDIS_URL is set
+    redis = None
+
+# A cached value, the data generation it was computed from and when (epoch seconds)
+CacheEntry = namedtuple('CacheEntry', ['value', 'generation', 'created_at'])
+
+# Generation of the funding data; every successful scraper write bumps it
+FUNDING_GENERATION = 'funding'
+
+
+class LocalStore:
+    """In-process LRU store holding at most max_entries entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, expire_seconds):
+        # Expired entries are never served, so they only need to be evicted by size
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def try_lock(self, key, seconds):
+        return True  # Refreshes are already deduplicated within the process
+
+    def unlock(self, key):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisStore:
+    """
+    Store shared by every API process through Redis.
+
+    Entries expire when they are too old to be served even as stale; size eviction is left
+    to the Redis maxmemory policy (e.g. allkeys-lru).
+    """
+
+    def __init__(self, client, prefix='fr:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        payload = self.client.get(self.prefix + key)
+        if payload is None:
+            return None
+        value, generation, created_at = json.loads(payload)
+        return CacheEntry(value, generation, created_at)
+
+    def set(self, key, entry, expire_seconds):
+        self.client.set(self.prefix + key, json.dumps(list(entry)), ex=max(1, int(expire_seconds)))
+
+    def try_lock(self, key, seconds):
+        """Claim the refresh of a key for all processes; False if another one has it."""
+        return bool(self.client.set(f'{self.prefix}lock:{key}', '1', nx=True, ex=max(1, int(seconds))))
+
+    def unlock(self, key):
+        self.client.delete(f'{self.prefix}lock:{key}')
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+class DatabaseGeneration:
+    """Generation counter kept in the cache_generations table, shared by the API and the scrapers."""
+
+    def __init__(self, db_engine, name):
+        self.engine = db_engine
+        self.name = name
+
+    def current(self):
+        with self.engine.connect() as connection:
+            generation = connection.execute(
+                select(CacheGeneration.generation).where(CacheGeneration.name == self.name)
+            ).scalar()
+        return generation or 0
+
+    def bump(self):
+        dialect = postgresql if self.engine.dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(CacheGeneration).values(name=self.name, generation=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'generation': CacheGeneration.generation + 1}
+        ).returning(CacheGeneration.generation)
+        # Its own short transaction, so concurrent writers hold the row lock only for this statement
+        with self.engine.begin() as connection:
+            return connection.execute(statement).scalar()
+
+
+class RedisGeneration:
+    """Generation counter kept in Redis."""
+
+    def __init__(self, client, name, prefix='fr:cache:'):
+        self.client = client
+        self.key = f'{prefix}generation:{name}'
+
+    def current(self):
+        return int(self.client.get(self.key) or 0)
+
+    def bump(self):
+        return self.client.incr(self.key)
+
+
+class ResponseCache:
+    """
+    Cache of computed responses, invalidated when the data generation changes.
+
+    An entry is fresh while its generation is the current one and it is younger than
+    ttl_seconds. A stale entry is still served for up to stale_seconds past its TTL while
+    one background thread recomputes it (stale-while-revalidate); older entries, and
+    missing ones, are computed by the request, once per key however many requests wait
+    for it. The current generation is read at most every check_seconds, so the store is
+    usually the only thing a request touches.
+    """
+
+    def __init__(self, store, generation, ttl_seconds, stale_seconds, check_seconds):
+        """
+        Args:
+            store: LocalStore or RedisStore holding the entries.
+            generation: DatabaseGeneration or RedisGeneration of the cached data.
+            ttl_seconds (float): Seconds an entry is fresh; 0 disables the cache.
+            stale_seconds (float): Seconds past the TTL a stale entry may be served while it is refreshed.
+            check_seconds (float): Seconds a read of the current generation is reused.
+        """
+        self.store = store
+        self.generation = generation
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.check_seconds = check_seconds
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+        self._generation = None
+        self._generation_checked_at = None
+        self._computing = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def current_generation(self):
+        now = time.monotonic()
+        if self._generation_checked_at is None or now - self._generation_checked_at >= self.check_seconds:
+            try:
+                self._generation = self.generation.current()
+            except Exception as e:
+                logger.warning(f"[CACHE] Reading the cache generation failed: {e}")
+            self._generation_checked_at = now
+        return self._generation
+
+    def bump(self):
+        """Invalidate every entry computed from the data before this call."""
+        try:
+            generation = self.generation.bump()
+        except Exception as e:
+            logger.warning(f"[CACHE] Bumping the cache generation failed: {e}")
+            return
+        self._generation = generation
+        self._generation_checked_at = time.monotonic()
+
+    def compute(self, key, compute, generation):
+        """Compute a value and store it under the generation read before computing."""
+        value = compute()
+        self.store.set(key, CacheEntry(value, generation, time.time()), self.ttl_seconds + self.stale_seconds)
+        return value
+
+    def compute_once(self, key, compute, generation):
+        """Compute a key, or wait for the request of this process that is already computing it."""
+        with self._lock:
+            pending = self._computing.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._computing[key] = {'done': threading.Event(), 'value': None, 'error': None}
+        if not owner:
+            pending['done'].wait()
+            if pending['error'] is not None:
+                raise pending['error']
+            return pending['value']
+
+        try:
+            pending['value'] = self.compute(key, compute, generation)
+            return pending['value']
+        except Exception as e:
+            pending['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._computing[key]
+            pending['done'].set()
+
+    def refresh_in_background(self, key, compute, generation):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if not self.store.try_lock(key, self.stale_seconds or self.ttl_seconds):
+            with self._lock:
+                self._refreshing.discard(key)
+            return
+
+        def refresh():
+            try:
+                self.compute(key, compute, generation)
+                self.count('refreshes')
+            except Exception as e:
+                self.count('errors')
+                logger.error(f"[CACHE] Refreshing {key} failed, serving the stale entry meanwhile: {e}")
+            finally:
+                self.store.unlock(key)
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name='cache-refresh', daemon=True).start()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value of a key, computing it if needed.
+
+        Args:
+            key (str): The cache key.
+            compute (callable): Returns the value; it must be JSON serializable for the Redis store.
+
+        Returns:
+            tuple: The value and how it was served: 'HIT', 'STALE', 'MISS' or 'BYPASS'.
+        """
+        if not self.enabled:
+            return compute(), 'BYPASS'
+
+        generation = self.current_generation()
+        try:
+            entry = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"[CACHE] Reading {key} failed: {e}")
+            return compute(), 'BYPASS'
+
+        if entry is not None:
+            age = time.time() - entry.created_at
+            if entry.generation == generation and age < self.ttl_seconds:
+                self.count('hits')
+                return entry.value, 'HIT'
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.count('stale_hits')
+                self.refresh_in_background(key, compute, generation)
+                return entry.value, 'STALE'
+
+        self.count('misses')
+        return self.compute_once(key, compute, generation), 'MISS'
+
+    def clear(self):
+        self.store.clear()
+
+
+def build_response_cache():
+    """Build the response cache from the CACHE_* settings, on Redis when CACHE_REDIS_URL is set."""
+    if Config.CACHE_REDIS_URL:
+        if redis is None:
+            logger.warning("[CACHE] CACHE_REDIS_URL is set but the redis package is not installed; using the in-process cache")
+        else:
+            client = redis.Redis.from_url(Config.CACHE_REDIS_URL)
+            return ResponseCache(
+                RedisStore(client), RedisGeneration(client, FUNDING_GENERATION),
+                Config.CACHE_TTL_SECONDS, Config.CACHE_STALE_SECONDS, Config.CACHE_GENERATION_CHECK_SECONDS
+            )
+    return ResponseCache(
+        LocalStore(Config.CACHE_MAX_ENTRIES), DatabaseGeneration(engine, FUNDING_GENERATION),
+        Config.CACHE_TTL_SECONDS, Config.CACHE_STALE_SECONDS, Config.CACHE_GENERATION_CHECK_SECONDS
+    )
+
+
+# Cache of the aggregated funding responses, shared by every request of this process
+response_cache = build_response_cache()
+
+
+def bump_generation():
+    """Mark every cached funding response as stale; called after each successful write of funding data."""
+    response_cache.bump()
@@ -11,8 +11,89 @@ class Config:
         raise ValueError("No DATABASE_URL set for SQLALCHEMY_DATABASE_URI.")
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replica for the API's read-only queries, used while it trails the primary
+    # by at most REPLICA_MAX_LAG_SECONDS; the lag is measured every REPLICA_CHECK_SECONDS
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_CHECK_SECONDS = float(os.getenv('REPLICA_CHECK_SECONDS', 5))
+
+    # Connection pool of the engine shared by the API and the scrapers, see app/db/engine.py
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # Milliseconds before PostgreSQL cancels a statement (0 disables it)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    # Connect through a transaction-mode PgBouncer: no client-side pool, per-transaction settings
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+    # Seconds between the scraper's pool usage reports
+    DB_POOL_REPORT_SECONDS = int(os.getenv('DB_POOL_REPORT_SECONDS', 300))
+
+    # Cache of the /aggregated-funding responses, see app/cache.py. Entries are fresh for
+    # CACHE_TTL_SECONDS (0 disables the cache) unless a scraper wrote new data, and may be
+    # served stale for CACHE_STALE_SECONDS more while they are recomputed in the background
+    CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', 300))
+    CACHE_STALE_SECONDS = float(os.getenv('CACHE_STALE_SECONDS', 60))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 512))
+    CACHE_GENERATION_CHECK_SECONDS = float(os.getenv('CACHE_GENERATION_CHECK_SECONDS', 2))
+    # Share the cache between API processes through Redis (needs the redis package)
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
     SECRET_KEY = os.getenv('SECRET_KEY', 'supersecretkey')
-    BATCH_SIZE = int(os.getenv('BATCH_SIZE', 50))
+    FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', 10))
+    PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 100))
+    INSERT_CHUNK_SIZE = int(os.getenv('INSERT_CHUNK_SIZE', 1000))
+    AEVO_SLICE_HOURS = int(os.getenv('AEVO_SLICE_HOURS', 168))
+    WRITE_RETRIES = int(os.getenv('WRITE_RETRIES', 3))
+    WRITE_RETRY_BACKOFF = float(os.getenv('WRITE_RETRY_BACKOFF', 1))
+    ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+    ASYNC_QUEUE_SIZE = int(os.getenv('ASYNC_QUEUE_SIZE', 100))
+    ASYNC_REQUEST_TIMEOUT = int(os.getenv('ASYNC_REQUEST_TIMEOUT', 30))
+    REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', 30))
+
+    # Requests per second each exchange allows us, shared by every scraper thread and coroutine
+    RATE_LIMITS = {
+        'aevo': float(os.getenv('AEVO_RATE_LIMIT', 5)),
+        'bybit': float(os.getenv('BYBIT_RATE_LIMIT', 50)),
+        'gateio': float(os.getenv('GATEIO_RATE_LIMIT', 15)),
+        'hyperliquid': float(os.getenv('HYPERLIQUID_RATE_LIMIT', 1)),
+    }
+    RATE_LIMIT_MAX_CONCURRENCY = int(os.getenv('RATE_LIMIT_MAX_CONCURRENCY', 50))
+    RATE_LIMIT_COOLDOWN = float(os.getenv('RATE_LIMIT_COOLDOWN', 2))
+
+    # Worker processes and shards per exchange for the process-pool scraper (EXECUTION_MODE=4)
+    SCRAPER_PROCESSES = int(os.getenv('SCRAPER_PROCESSES', os.cpu_count() or 1))
+    SHARDS_PER_EXCHANGE = int(os.getenv('SHARDS_PER_EXCHANGE', 0))
+
+    # Checkpointed historical backfill used by FIRST_RUN
+    BACKFILL_SLICE_DAYS = int(os.getenv('BACKFILL_SLICE_DAYS', 30))
+    BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', 8))
+    BACKFILL_REPORT_SECONDS = int(os.getenv('BACKFILL_REPORT_SECONDS', 30))
+
+    # Exchange API base URLs, overridable to point the scrapers at a mock server
+    AEVO_API_URL = os.getenv('AEVO_API_URL', 'https://api.aevo.xyz')
+    HYPERLIQUID_API_URL = os.getenv('HYPERLIQUID_API_URL', 'https://api.hyperliquid.xyz')
+    CCXT_API_URLS = {
+        'bybit': os.getenv('BYBIT_API_URL'),
+        'gate': os.getenv('GATEIO_API_URL'),
+    }
+
+    # Seconds before the shared ccxt clients reload their markets
+    MARKETS_TTL = int(os.getenv('MARKETS_TTL', 3600))
+
+    # Seconds before the instrument lists are refreshed from the exchanges
+    INSTRUMENTS_REFRESH_SECONDS = int(os.getenv('INSTRUMENTS_REFRESH_SECONDS', 3600))
+
+    # Months of funding history kept; older monthly partitions are dropped (0 keeps everything)
+    RETENTION_MONTHS = int(os.getenv('RETENTION_MONTHS', 12))
+    # Monthly partitions created ahead of the current month, and seconds between maintenance runs
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+    PARTITION_MAINTENANCE_SECONDS = int(os.getenv('PARTITION_MAINTENANCE_SECONDS', 86400))
+
+    # Seconds between full reloads of the spread screener's windows; in between they are
+    # updated with the rollup buckets written since the last request
+    SCREENER_FULL_RELOAD_SECONDS = int(os.getenv('SCREENER_FULL_RELOAD_SECONDS', 900))
 
 config = Config()
 
@@ -0,0 +1,235 @@
+import threading
+import time
+from sqlalchemy import create_engine, event, exc, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+from app.config import Config
+from app.logger import logger
+from app.db.models import Base, Instrument
+
+
+class PoolMetrics:
+    """
+    Checkout counts and the time spent waiting for a pooled connection.
+
+    A growing wait means the pool is too small for the threads sharing it; timeouts mean
+    a thread gave up after DB_POOL_TIMEOUT seconds without getting a connection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 2),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long every checkout waited for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(url):
+    """
+    Return the create_engine arguments for a database URL from the DB_* settings.
+
+    PostgreSQL gets a sized, pre-pinged and recycled connection pool and a statement
+    timeout. Behind PgBouncer (DB_PGBOUNCER) the pooling is left to PgBouncer, and the
+    statement timeout is set per transaction, because a transaction-mode PgBouncer rejects
+    startup options and shares session settings between clients. In-memory SQLite keeps
+    SQLAlchemy's own pool, since every new connection would be a new empty database.
+
+    Args:
+        url (str): The database URL.
+
+    Returns:
+        dict: Keyword arguments for create_engine.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    if Config.DB_PGBOUNCER:
+        return {'poolclass': NullPool}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == 'postgresql' and Config.DB_STATEMENT_TIMEOUT_MS:
+        options['connect_args'] = {'options': f'-c statement_timeout={Config.DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+def create_db_engine(url):
+    """
+    Create an engine configured by engine_options.
+
+    The scrapers and the API's funding queries use the engine this makes for DATABASE_URL.
+    Flask-SQLAlchemy builds its own engine, for the user models, from the same engine_options,
+    see create_app.
+    """
+    db_engine = create_engine(url, **engine_options(url))
+    add_statement_timeout(db_engine)
+    return db_engine
+
+
+def add_statement_timeout(db_engine):
+    """
+    Behind PgBouncer, set the statement timeout at the start of every transaction of an engine.
+
+    Outside PgBouncer mode the timeout is a startup option of the pooled connections instead,
+    see engine_options, and nothing is added.
+    """
+    if Config.DB_PGBOUNCER and Config.DB_STATEMENT_TIMEOUT_MS and db_engine.dialect.name == 'postgresql':
+        @event.listens_for(db_engine, 'begin')
+        def set_statement_timeout(connection):
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {Config.DB_STATEMENT_TIMEOUT_MS}')
+
+
+def pool_status(db_engine=None):
+    """Return the pool's current connections together with the checkout metrics."""
+    pool = (db_engine or engine).pool
+    status = pool_metrics.snapshot()
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+    return status
+
+
+def log_pool_status():
+    status = pool_status()
+    logger.info(
+        f"[DB POOL] {status['checkouts']} checkouts, avg wait {status['avg_wait_ms']} ms, "
+        f"max wait {status['max_wait_ms']} ms, {status['timeouts']} timeouts"
+        + (f", {status['checked_out']}/{status['size']} in use (+{status['overflow']} overflow)" if 'size' in status else '')
+    )
+
+
+def init_db():
+    """
+    Create the tables that don't exist yet.
+
+    Called once at startup by the API and the scraper rather than on import; existing
+    databases are upgraded by the migrations.
+    """
+    Base.metadata.create_all(engine)
+
+
+class ReplicaRouter:
+    """
+    Route read-only queries to a read replica while it is caught up with the primary.
+
+    Replication lag is measured on the data itself: the newest instruments.updated_at on
+    the primary minus the newest on the replica. Every ingested batch bumps that column, so
+    the difference is how far the replica's funding data trails, whatever the replication
+    method or database. The lag is checked at most every check_seconds; while it exceeds
+    max_lag_seconds, or the replica can't be reached, reads go to the primary.
+    """
+
+    def __init__(self, primary, replica, max_lag_seconds, check_seconds):
+        """
+        Args:
+            primary: The engine every write goes to.
+            replica (optional): The read replica's engine; None sends every read to the primary.
+            max_lag_seconds (float): Largest lag at which the replica still serves reads.
+            check_seconds (float): Seconds a lag measurement is reused.
+        """
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.lag_seconds = None
+        self.use_replica = False
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def newest_update(db_engine):
+        with db_engine.connect() as connection:
+            return connection.execute(select(func.max(Instrument.updated_at))).scalar()
+
+    def measure_lag(self):
+        """
+        Return how many seconds the replica's data trails the primary's.
+
+        Returns:
+            float: The lag, 0 if the replica has everything, or infinity if it has no data yet.
+        """
+        primary_newest = self.newest_update(self.primary)
+        replica_newest = self.newest_update(self.replica)
+        if primary_newest is None:
+            return 0.0
+        if replica_newest is None:
+            return float('inf')
+        return max((primary_newest - replica_newest).total_seconds(), 0.0)
+
+    def check(self):
+        """Measure the lag and decide whether reads go to the replica."""
+        try:
+            lag = self.measure_lag()
+        except exc.SQLAlchemyError as e:
+            lag = None
+            logger.warning(f"[DB REPLICA] Lag check failed, reading from the primary: {e}")
+        use_replica = lag is not None and lag <= self.max_lag_seconds
+        if use_replica != self.use_replica and lag is not None:
+            target = 'replica' if use_replica else 'primary'
+            logger.info(f"[DB REPLICA] Replica lag {lag:.1f}s (max {self.max_lag_seconds}s), reading from the {target}")
+        self.lag_seconds = lag
+        self.use_replica = use_replica
+        self.checked_at = time.monotonic()
+
+    def read_engine(self):
+        """Return the engine read-only queries should use right now."""
+        if self.replica is None:
+            return self.primary
+        if self.checked_at is None or time.monotonic() - self.checked_at >= self.check_seconds:
+            # One thread measures; the others keep using the last decision meanwhile
+            if self._lock.acquire(blocking=self.checked_at is None):
+                try:
+                    self.check()
+                finally:
+                    self._lock.release()
+        return self.replica if self.use_replica else self.primary
+
+
+# The engine of DATABASE_URL, shared by everything in this process
+engine = create_db_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+# Read-only API queries go to DATABASE_REPLICA_URL, when set, while it keeps up
+replica_engine = create_db_engine(Config.DATABASE_REPLICA_URL) if Config.DATABASE_REPLICA_URL else None
+replica_router = ReplicaRouter(engine, replica_engine, Config.REPLICA_MAX_LAG_SECONDS, Config.REPLICA_CHECK_SECONDS)
@@ -1,5 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+
+# Configured with the same engine options as app.db.engine, see create_app
 db = SQLAlchemy()
 migrate = Migrate()
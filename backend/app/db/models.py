@@ -1,9 +1,10 @@
 import uuid
 import json
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, BigInteger, String, DateTime, func
+from sqlalchemy import Column, BigInteger, Boolean, DDL, Double, Index, Integer, String, DateTime, event, func, literal, select, text, union_all
 from app.db.extensions import db
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import declared_attr
 
 Base = declarative_base()
 
@@ -22,13 +23,25 @@ class User(db.Model):
 class BaseModel(Base):
     __abstract__ = True
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
-    instrument_name = Column(String, nullable=False)
-    timestamp = Column(BigInteger, nullable=False)
-    funding_rate = Column(String, nullable=False)
-    mark_price = Column(String, nullable=True)
+    # One row per instrument and funding timestamp; the primary key index also serves the
+    # per-instrument time range scans, so no surrogate id or extra unique index is needed
+    instrument_name = Column(String, primary_key=True)
+    timestamp = Column(BigInteger, primary_key=True)
+    funding_rate = Column(Double, nullable=False)
+    mark_price = Column(Double, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    @declared_attr
+    def __table_args__(cls):
+        # Both indexes carry funding_rate, so the aggregation endpoints are answered by index-only scans.
+        # On PostgreSQL the table is split into monthly partitions, see app/db/partitions.py
+        return (
+            # Window sums over every instrument: a range scan on timestamp
+            Index(f'ix_{cls.__tablename__}_timestamp', 'timestamp', postgresql_include=['instrument_name', 'funding_rate']),
+            # Latest rate per instrument and single-instrument windows: newest point first
+            Index(f'ix_{cls.__tablename__}_instrument_latest', 'instrument_name', text('timestamp DESC'), postgresql_include=['funding_rate']),
+            {'postgresql_partition_by': 'RANGE (timestamp)'},
+        )
 
     def __repr__(self):
         return f"<{self.__class__.__name__}(instrument_name={self.instrument_name}, timestamp={self.timestamp}, funding_rate={self.funding_rate}, mark_price={self.mark_price})>"
@@ -62,3 +75,168 @@ class GateioDB(BaseModel):
 # HyperliquidDB model
 class HyperliquidDB(BaseModel):
     __tablename__ = 'funding_data_hyperliquid'
+
+
+# Funding table of every exchange, keyed like SCRAPER_SOURCES
+FUNDING_MODELS = {
+    'aevo': AevoDB,
+    'bybit': BybitDB,
+    'gateio': GateioDB,
+    'hyperliquid': HyperliquidDB,
+}
+
+def exchange_of(model_class):
+    """Return the exchange key of a funding table model."""
+    return next(exchange for exchange, model in FUNDING_MODELS.items() if model is model_class)
+
+# Every exchange's funding rows in one relation, with the exchange as a column. It is an
+# inline view compiled into each query rather than a database view, so migrations can keep
+# rewriting the underlying tables; filters on it are pushed down into every table.
+funding_data = union_all(*[
+    select(literal(exchange).label('exchange'), model.instrument_name, model.timestamp, model.funding_rate, model.mark_price)
+    for exchange, model in FUNDING_MODELS.items()
+]).subquery('funding_data')
+
+# A freshly created partitioned table accepts rows right away; the partition maintenance
+# job later moves them from the default partition into their monthly partitions
+for _model in FUNDING_MODELS.values():
+    event.listen(
+        _model.__table__,
+        'after_create',
+        DDL(f'CREATE TABLE IF NOT EXISTS {_model.__tablename__}_default PARTITION OF {_model.__tablename__} DEFAULT').execute_if(dialect='postgresql')
+    )
+
+
+# Per-instrument funding totals of one time bucket, kept up to date by save_to_database
+class RollupModel(Base):
+    __abstract__ = True
+
+    # Bucket length in milliseconds; buckets start on multiples of it (UTC)
+    bucket_ms = None
+
+    exchange = Column(String, primary_key=True)
+    instrument_name = Column(String, primary_key=True)
+    bucket_start = Column(BigInteger, primary_key=True)
+    funding_sum = Column(Double, nullable=False)
+    funding_count = Column(Integer, nullable=False)
+    funding_min = Column(Double, nullable=False)
+    funding_max = Column(Double, nullable=False)
+    last_rate = Column(Double, nullable=False)
+    last_timestamp = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    @declared_attr
+    def __table_args__(cls):
+        # Window sums read every instrument of one exchange over a bucket range; the spread
+        # screener reads the buckets changed since its last refresh
+        return (
+            Index(f'ix_{cls.__tablename__}_exchange_bucket', 'exchange', 'bucket_start', postgresql_include=['instrument_name', 'funding_sum']),
+            Index(f'ix_{cls.__tablename__}_updated_at', 'updated_at'),
+        )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}(exchange={self.exchange}, instrument_name={self.instrument_name}, bucket_start={self.bucket_start}, funding_sum={self.funding_sum}, funding_count={self.funding_count})>"
+
+
+class HourlyFundingRollup(RollupModel):
+    __tablename__ = 'funding_rollups_hourly'
+    bucket_ms = 3600 * 1000
+
+
+class DailyFundingRollup(RollupModel):
+    __tablename__ = 'funding_rollups_daily'
+    bucket_ms = 86400 * 1000
+
+
+ROLLUP_MODELS = [HourlyFundingRollup, DailyFundingRollup]
+
+
+# Bit of each exchange in Instrument.exchanges; never renumber, the bits are stored
+EXCHANGE_BITS = {
+    'aevo': 1,
+    'bybit': 2,
+    'gateio': 4,
+    'hyperliquid': 8,
+}
+
+
+# One row per coin across every exchange, kept up to date by save_to_database. Serves the
+# ticker listing and coin search without reading the funding history.
+class Instrument(Base):
+    __tablename__ = 'instruments'
+
+    symbol = Column(String, primary_key=True)
+    name = Column(String, nullable=True)
+    logo_url = Column(String, nullable=True)
+    # Exchanges the coin is listed on, as a bit mask of EXCHANGE_BITS
+    exchanges = Column(Integer, nullable=False, default=0)
+    # First and last funding timestamps stored for the coin, in milliseconds
+    first_seen = Column(BigInteger, nullable=False)
+    last_seen = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    @property
+    def exchange_list(self):
+        return [exchange for exchange, bit in EXCHANGE_BITS.items() if self.exchanges & bit]
+
+    def __repr__(self):
+        return f"<Instrument(symbol={self.symbol}, name={self.name}, exchanges={self.exchange_list})>"
+
+# Coin search (symbol ILIKE '%bt%') is answered from a trigram index where the pg_trgm
+# extension is available; without it the search reads this table, which has one row per coin
+event.listen(
+    Instrument.__table__,
+    'after_create',
+    DDL("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX IF NOT EXISTS ix_instruments_symbol_trgm ON instruments USING gin (symbol gin_trgm_ops);
+            END IF;
+        END
+        $$
+    """).execute_if(dialect='postgresql')
+)
+
+
+# Completed backfill slices, so an interrupted first load resumes where it stopped
+class BackfillCheckpoint(Base):
+    __tablename__ = 'backfill_checkpoints'
+
+    exchange = Column(String, primary_key=True)
+    instrument_name = Column(String, primary_key=True)
+    slice_start = Column(BigInteger, primary_key=True)
+    slice_end = Column(BigInteger, nullable=False)
+    rows = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"<BackfillCheckpoint(exchange={self.exchange}, instrument_name={self.instrument_name}, slice_start={self.slice_start}, slice_end={self.slice_end})>"
+
+
+# Instruments listed on each exchange, refreshed from the exchange APIs by the instrument registry
+class ExchangeInstrument(Base):
+    __tablename__ = 'exchange_instruments'
+
+    exchange = Column(String, primary_key=True)
+    instrument_name = Column(String, primary_key=True)
+    active = Column(Boolean, nullable=False, default=True)
+    first_seen = Column(DateTime, server_default=func.now())
+    last_seen = Column(DateTime, server_default=func.now())
+    delisted_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ExchangeInstrument(exchange={self.exchange}, instrument_name={self.instrument_name}, active={self.active})>"
+
+
+# Counters bumped whenever the data behind a cached response changes, see app/cache.py
+class CacheGeneration(Base):
+    __tablename__ = 'cache_generations'
+
+    name = Column(String, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CacheGeneration(name={self.name}, generation={self.generation})>"
@@ -1,170 +1,761 @@
-import uuid
 import json
-from sqlalchemy import create_engine, func, cast, Numeric, desc, asc
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import func, desc, asc, and_, or_, case, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker
-from app.utils import get_timeframe
+from app.utils import get_timeframe, get_logo_url
 from app.logger import logger
-from app.db.models import Base, AevoDB, BybitDB, GateioDB, HyperliquidDB
+from app.db.models import (
+    AevoDB, BybitDB, GateioDB, HyperliquidDB, BackfillCheckpoint, ExchangeInstrument,
+    HourlyFundingRollup, DailyFundingRollup, ROLLUP_MODELS, FUNDING_MODELS, exchange_of, funding_data,
+    Instrument, EXCHANGE_BITS
+)
 from app.config import Config
-
-# Database connection setup
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-
-# Create tables in the database if they do not exist
-Base.metadata.create_all(engine)
+from app.db.engine import engine, replica_router
+from app.cache import bump_generation
 
 # Create a session factory
 Session = sessionmaker(bind=engine)
 
-def save_to_database(data, model_class):
+def read_session():
+    """
+    Open a session for the API's read-only queries.
+
+    It is bound to the read replica while DATABASE_REPLICA_URL is set and caught up, and to
+    the primary otherwise. Writes, and reads the scrapers act on, always use Session.
+    """
+    return Session(bind=replica_router.read_engine())
+
+# Result of a bulk write: rows actually inserted and rows skipped as duplicates
+SaveResult = namedtuple('SaveResult', ['inserted', 'skipped'])
+
+def build_insert_ignore(model_class):
+    """
+    Build an INSERT for the given funding table that silently skips rows whose
+    (instrument_name, timestamp) already exists, and returns the rows it did insert.
+    """
+    dialect = postgresql if engine.dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model_class).on_conflict_do_nothing(
+        index_elements=['instrument_name', 'timestamp']
+    ).returning(model_class.instrument_name, model_class.timestamp, model_class.funding_rate)
+
+def build_rollup_upsert(rollup_class):
+    """
+    Build an INSERT for a rollup table that merges into the existing bucket of an
+    (exchange, instrument_name, bucket_start) instead of replacing it.
+    """
+    dialect = postgresql if engine.dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(rollup_class)
+    new = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=['exchange', 'instrument_name', 'bucket_start'],
+        set_={
+            'funding_sum': rollup_class.funding_sum + new.funding_sum,
+            'funding_count': rollup_class.funding_count + new.funding_count,
+            'funding_min': case((new.funding_min < rollup_class.funding_min, new.funding_min), else_=rollup_class.funding_min),
+            'funding_max': case((new.funding_max > rollup_class.funding_max, new.funding_max), else_=rollup_class.funding_max),
+            'last_rate': case((new.last_timestamp > rollup_class.last_timestamp, new.last_rate), else_=rollup_class.last_rate),
+            'last_timestamp': case((new.last_timestamp > rollup_class.last_timestamp, new.last_timestamp), else_=rollup_class.last_timestamp),
+            'updated_at': func.now(),
+        }
+    )
+
+def update_rollups(session, model_class, rows, chunk_size=None):
+    """
+    Add newly inserted funding rows to the hourly and daily rollups of their exchange.
+
+    Only rows the INSERT actually wrote are passed in, so a rescraped point is never
+    counted twice. Runs in the caller's transaction, so the rollups always match the raw rows.
+
+    Args:
+        session: The session that inserted the rows.
+        model_class: The funding table the rows were written to.
+        rows (list): (instrument_name, timestamp, funding_rate) tuples.
+        chunk_size (int, optional): Buckets per statement. Defaults to Config.INSERT_CHUNK_SIZE.
+    """
+    chunk_size = chunk_size or Config.INSERT_CHUNK_SIZE
+    exchange = exchange_of(model_class)
+
+    for rollup_class in ROLLUP_MODELS:
+        buckets = {}
+        for instrument_name, timestamp, funding_rate in rows:
+            key = (instrument_name, timestamp - timestamp % rollup_class.bucket_ms)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {
+                    'exchange': exchange, 'instrument_name': key[0], 'bucket_start': key[1],
+                    'funding_sum': funding_rate, 'funding_count': 1, 'funding_min': funding_rate,
+                    'funding_max': funding_rate, 'last_rate': funding_rate, 'last_timestamp': timestamp,
+                }
+                continue
+            bucket['funding_sum'] += funding_rate
+            bucket['funding_count'] += 1
+            bucket['funding_min'] = min(bucket['funding_min'], funding_rate)
+            bucket['funding_max'] = max(bucket['funding_max'], funding_rate)
+            if timestamp > bucket['last_timestamp']:
+                bucket['last_rate'], bucket['last_timestamp'] = funding_rate, timestamp
+
+        # Upsert in key order so concurrent writers lock the buckets in the same order
+        values = [buckets[key] for key in sorted(buckets)]
+        statement = build_rollup_upsert(rollup_class)
+        for i in range(0, len(values), chunk_size):
+            session.execute(statement.values(values[i:i + chunk_size]))
+
+def build_instrument_upsert():
+    """
+    Build an INSERT for the instruments table that adds the exchange to an existing coin
+    and widens its first/last seen range, keeping its name and logo.
+    """
+    dialect = postgresql if engine.dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(Instrument)
+    new = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=['symbol'],
+        set_={
+            'exchanges': Instrument.exchanges.op('|')(new.exchanges),
+            'first_seen': case((new.first_seen < Instrument.first_seen, new.first_seen), else_=Instrument.first_seen),
+            'last_seen': case((new.last_seen > Instrument.last_seen, new.last_seen), else_=Instrument.last_seen),
+            'updated_at': func.now(),
+        }
+    )
+
+def update_instruments(session, model_class, rows, chunk_size=None):
+    """
+    Record the coins of newly inserted funding rows in the instruments table.
+
+    Name and logo are looked up only for coins that are not in the table yet.
+
+    Args:
+        session: The session that inserted the rows.
+        model_class: The funding table the rows were written to.
+        rows (list): (instrument_name, timestamp, funding_rate) tuples.
+        chunk_size (int, optional): Coins per statement. Defaults to Config.INSERT_CHUNK_SIZE.
+    """
+    if not rows:
+        return
+    chunk_size = chunk_size or Config.INSERT_CHUNK_SIZE
+    bit = EXCHANGE_BITS[exchange_of(model_class)]
+
+    seen = {}
+    for instrument_name, timestamp, _ in rows:
+        first, last = seen.get(instrument_name, (timestamp, timestamp))
+        seen[instrument_name] = (min(first, timestamp), max(last, timestamp))
+
+    known = {
+        symbol for (symbol,) in
+        session.query(Instrument.symbol).filter(Instrument.symbol.in_(list(seen))).all()
+    }
+    values = []
+    # Upsert in key order so concurrent writers lock the rows in the same order
+    for symbol in sorted(seen):
+        logo_url, name = (None, None) if symbol in known else get_logo_url(symbol)
+        values.append({
+            'symbol': symbol, 'name': name, 'logo_url': logo_url, 'exchanges': bit,
+            'first_seen': seen[symbol][0], 'last_seen': seen[symbol][1],
+        })
+
+    statement = build_instrument_upsert()
+    for i in range(0, len(values), chunk_size):
+        session.execute(statement.values(values[i:i + chunk_size]))
+
+def save_to_database(data, model_class, chunk_size=None):
+    """
+    Bulk insert funding rows, skipping the ones that are already stored.
+
+    Rows are written with multi-row INSERT ... ON CONFLICT DO NOTHING statements
+    of at most chunk_size rows, all in a single transaction. The rows that were
+    actually inserted are added to the hourly and daily rollups and to the instruments
+    table in the same transaction. Once it commits, the cached API responses are invalidated.
+
+    Args:
+        data (list): Rows shaped as [instrument_name, timestamp, funding_rate, mark_price].
+        model_class: The funding table model to write into.
+        chunk_size (int, optional): Rows per INSERT statement. Defaults to Config.INSERT_CHUNK_SIZE.
+
+    Returns:
+        SaveResult: Inserted and skipped row counts, or the exception if the write failed.
+    """
+    chunk_size = chunk_size or Config.INSERT_CHUNK_SIZE
+    statement = build_insert_ignore(model_class)
+
     with Session() as session:
         try:
-            for entry in data:
-                funding_record = model_class(
-                    instrument_name=entry[0],     
-                    timestamp=int(entry[1]),      
-                    funding_rate=entry[2],        
-                    mark_price=entry[3]           
-                )
-                session.add(funding_record)
+            # Rates arrive as strings or floats depending on the exchange; store them as doubles
+            rows = [
+                {
+                    'instrument_name': entry[0],
+                    'timestamp': int(entry[1]),
+                    'funding_rate': float(entry[2]),
+                    'mark_price': float(entry[3]) if entry[3] is not None else None,
+                }
+                for entry in data
+            ]
+            inserted_rows = []
+            for i in range(0, len(rows), chunk_size):
+                inserted_rows.extend(session.execute(statement.values(rows[i:i + chunk_size])).all())
+            update_rollups(session, model_class, inserted_rows, chunk_size)
+            update_instruments(session, model_class, inserted_rows, chunk_size)
             session.commit()
-            return True
         except Exception as e:
             session.rollback()
             return e
 
+    # New rows change the aggregated responses; invalidate the cached ones
+    if inserted_rows:
+        bump_generation()
+    return SaveResult(len(inserted_rows), len(rows) - len(inserted_rows))
+
 def delete_all_data(model_class):
     with Session() as session:
         try:
             session.query(model_class).delete()
+            for rollup_class in ROLLUP_MODELS:
+                session.query(rollup_class).filter(rollup_class.exchange == exchange_of(model_class)).delete()
+            # Unlist the exchange from every coin and drop the coins left without one
+            bit = EXCHANGE_BITS[exchange_of(model_class)]
+            session.query(Instrument).update({Instrument.exchanges: Instrument.exchanges.op('&')(~bit)}, synchronize_session=False)
+            session.query(Instrument).filter(Instrument.exchanges == 0).delete(synchronize_session=False)
             session.commit()
+            bump_generation()
             logger.info("All data deleted successfully")
         except Exception as e:
             session.rollback()
             logger.error(f"An error occurred: {e}")
 
-def delete_old_data(model_class):
+def delete_old_data(model_class, days=366, before=None):
+    """
+    Delete rows older than the given number of days, or than before (milliseconds) if given, with a single DELETE.
+
+    On PostgreSQL the funding tables are partitioned by month and expired history is
+    dropped a whole partition at a time instead, see app/db/partitions.py.
+    """
     with Session() as session:
         try:
-            # Menghitung batas waktu 1 tahun yang lalu dari waktu sekarang
-            one_year_ago = int((datetime.now() - timedelta(days=366)).timestamp())
+            # Menghitung batas waktu dari waktu sekarang, dalam milidetik seperti kolom timestamp
+            cutoff = before if before is not None else int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
 
-            # Menghapus data yang memiliki timestamp lebih dari 1 tahun
-            session.query(model_class).filter(model_class.timestamp < one_year_ago).delete()
+            # Menghapus data yang memiliki timestamp lebih lama dari batas waktu
+            session.query(model_class).filter(model_class.timestamp < cutoff).delete(synchronize_session=False)
             session.commit()
             logger.info("Old data deleted successfully")
         except Exception as e:
             session.rollback()
             logger.error(f"An error occurred while deleting old data: {e}")
 
+def delete_old_rollups(before):
+    """Delete the hourly and daily rollup buckets that start before the given timestamp in milliseconds."""
+    with Session() as session:
+        try:
+            for rollup_class in ROLLUP_MODELS:
+                session.query(rollup_class).filter(rollup_class.bucket_start < before).delete(synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"An error occurred while deleting old rollups: {e}")
+
+def trim_instruments(before):
+    """
+    Bring the instruments table back in line with the funding history after the rows before a
+    timestamp in milliseconds were removed.
+
+    Coins first seen before it get the oldest timestamp still stored as their first_seen, and
+    coins without any stored row left are deleted. Only those coins are looked at, and the
+    oldest timestamp of each is read from the (instrument_name, timestamp) indexes.
+    """
+    expired = Instrument.first_seen < before
+    firsts = [
+        select(func.min(model_class.timestamp)).where(model_class.instrument_name == Instrument.symbol).scalar_subquery()
+        for model_class in FUNDING_MODELS.values()
+    ]
+    stored = [
+        select(model_class.timestamp).where(model_class.instrument_name == Instrument.symbol).exists()
+        for model_class in FUNDING_MODELS.values()
+    ]
+    # A coin missing from a table has no first timestamp there; its last_seen never wins the minimum
+    least = func.least if engine.dialect.name == 'postgresql' else func.min
+    first_seen = least(*[func.coalesce(first, Instrument.last_seen) for first in firsts])
+
+    with Session() as session:
+        try:
+            session.query(Instrument).filter(expired, ~or_(*stored)).delete(synchronize_session=False)
+            session.query(Instrument).filter(expired).update({'first_seen': first_seen}, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"An error occurred while trimming the instruments: {e}")
+
 def count_rows(model_class):
     with Session() as session:
         return session.query(model_class).count()
 
-def get_unique_tickers_from_all_exchanges():
+def get_latest_timestamps(model_class):
+    """
+    Return the newest stored timestamp for every instrument in the given table.
+
+    Scrapers use this high-water mark to request only points they don't have yet.
+    """
     with Session() as session:
-        tickers = (
-            session.query(AevoDB.instrument_name)
-            .union(session.query(BybitDB.instrument_name))
-            .union(session.query(GateioDB.instrument_name))
-            .union(session.query(HyperliquidDB.instrument_name))
-            .distinct()
+        rows = (
+            session.query(model_class.instrument_name, func.max(model_class.timestamp))
+            .group_by(model_class.instrument_name)
             .all()
         )
-        return sorted([ticker[0] for ticker in tickers])
+        return {instrument_name: latest for instrument_name, latest in rows}
 
-def get_tickers(keyword=None):
+def get_completed_slices(exchange):
+    """
+    Return the backfill slices of an exchange that are already stored.
+
+    Args:
+        exchange (str): The exchange key, e.g. 'aevo'.
+
+    Returns:
+        set: (instrument_name, slice_start) pairs of the completed slices.
+    """
     with Session() as session:
-        tickers = (
-            session.query(AevoDB.instrument_name)
-            .union(session.query(BybitDB.instrument_name))
-            .union(session.query(GateioDB.instrument_name))
-            .union(session.query(HyperliquidDB.instrument_name))
-            .distinct()
+        rows = (
+            session.query(BackfillCheckpoint.instrument_name, BackfillCheckpoint.slice_start)
+            .filter(BackfillCheckpoint.exchange == exchange)
             .all()
         )
-        
-        # Filter tickers based on the keyword if provided
-        filtered_tickers = [
-            ticker[0] for ticker in tickers 
-            if keyword is None or keyword.lower() in ticker[0].lower()
-        ]
-        
-        return sorted(filtered_tickers)
+        return {(instrument_name, slice_start) for instrument_name, slice_start in rows}
 
-def adjust_timeframe(model_class, since, until):
-    if model_class == AevoDB:
-        since, until = since * 1000000, until * 1000000  # Convert seconds to microseconds
-    # HyperliquidDB assumed to use milliseconds, no changes needed
-    return since, until
+def mark_slice_completed(exchange, instrument_name, slice_start, slice_end, rows):
+    """
+    Record a backfill slice whose rows have been saved.
+
+    Args:
+        exchange (str): The exchange key, e.g. 'aevo'.
+        instrument_name (str): The instrument the slice belongs to.
+        slice_start (int): The start of the slice in the exchange's timestamp unit.
+        slice_end (int): The end of the slice in the exchange's timestamp unit.
+        rows (int): Rows fetched for the slice.
+
+    Returns:
+        None
+    """
+    dialect = postgresql if engine.dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(BackfillCheckpoint).values(
+        exchange=exchange,
+        instrument_name=instrument_name,
+        slice_start=slice_start,
+        slice_end=slice_end,
+        rows=rows,
+    ).on_conflict_do_nothing(index_elements=['exchange', 'instrument_name', 'slice_start'])
+
+    with Session() as session:
+        session.execute(statement)
+        session.commit()
+
+def get_active_instruments(exchange):
+    """
+    Return the stored instruments of an exchange that are still listed.
+
+    Args:
+        exchange (str): The exchange key, e.g. 'aevo'.
+
+    Returns:
+        list: Sorted instrument names.
+    """
+    with Session() as session:
+        rows = (
+            session.query(ExchangeInstrument.instrument_name)
+            .filter(ExchangeInstrument.exchange == exchange, ExchangeInstrument.active.is_(True))
+            .order_by(ExchangeInstrument.instrument_name)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+def sync_exchange_instruments(exchange, instrument_names):
+    """
+    Store the instruments an exchange currently lists and mark the missing ones as delisted.
+
+    Args:
+        exchange (str): The exchange key, e.g. 'aevo'.
+        instrument_names (list): Every instrument the exchange lists right now.
+
+    Returns:
+        tuple: Names that were added or relisted, and names that were delisted.
+    """
+    now = datetime.utcnow()
+    listed = set(instrument_names)
+
+    with Session() as session:
+        try:
+            stored = {
+                instrument.instrument_name: instrument
+                for instrument in session.query(ExchangeInstrument).filter(ExchangeInstrument.exchange == exchange)
+            }
+            added, removed = [], []
+
+            for instrument_name in listed:
+                instrument = stored.get(instrument_name)
+                if instrument is None:
+                    session.add(ExchangeInstrument(
+                        exchange=exchange, instrument_name=instrument_name, active=True, first_seen=now, last_seen=now
+                    ))
+                    added.append(instrument_name)
+                    continue
+                if not instrument.active:
+                    added.append(instrument_name)
+                instrument.active = True
+                instrument.last_seen = now
+                instrument.delisted_at = None
+
+            for instrument_name, instrument in stored.items():
+                if instrument_name not in listed and instrument.active:
+                    instrument.active = False
+                    instrument.delisted_at = now
+                    removed.append(instrument_name)
+
+            session.commit()
+            return sorted(added), sorted(removed)
+        except Exception:
+            session.rollback()
+            raise
+
+def get_unique_tickers_from_all_exchanges():
+    with read_session() as session:
+        tickers = session.query(Instrument.symbol).order_by(Instrument.symbol).all()
+        return [ticker[0] for ticker in tickers]
+
+def search_instruments(keyword=None):
+    """
+    Return the coins whose symbol contains the keyword, case-insensitively.
+
+    Args:
+        keyword (str, optional): Part of the symbol to look for. All coins are returned without it.
+
+    Returns:
+        list: (symbol, name, logo_url) tuples sorted by symbol.
+    """
+    with read_session() as session:
+        query = session.query(Instrument.symbol, Instrument.name, Instrument.logo_url)
+        if keyword:
+            # Escape LIKE wildcards so the keyword is matched literally
+            pattern = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(Instrument.symbol.ilike(f'%{pattern}%', escape='\\'))
+        return query.order_by(Instrument.symbol).all()
+
+def get_tickers(keyword=None):
+    return [symbol for symbol, _, _ in search_instruments(keyword)]
+
+def get_instrument_details(symbols):
+    """Return the (name, logo_url) of each of the given coins that is in the instruments table, by symbol."""
+    if not symbols:
+        return {}
+    with read_session() as session:
+        rows = session.query(Instrument.symbol, Instrument.name, Instrument.logo_url).filter(Instrument.symbol.in_(symbols)).all()
+        return {symbol: (name, logo_url) for symbol, name, logo_url in rows}
+
+def get_rollup_buckets(rollup_class, since, updated_since=None):
+    """
+    Return the funding sums of the rollup buckets that start at or after since.
+
+    Args:
+        rollup_class: HourlyFundingRollup or DailyFundingRollup.
+        since (int): The earliest bucket start in milliseconds.
+        updated_since (datetime, optional): Only the buckets written at or after this database time.
+
+    Returns:
+        list: (exchange, instrument_name, bucket_start, funding_sum, updated_at) rows.
+    """
+    with read_session() as session:
+        query = session.query(
+            rollup_class.exchange,
+            rollup_class.instrument_name,
+            rollup_class.bucket_start,
+            rollup_class.funding_sum,
+            rollup_class.updated_at
+        ).filter(rollup_class.bucket_start >= since)
+        if updated_since is not None:
+            query = query.filter(rollup_class.updated_at >= updated_since)
+        return query.all()
+
+def matches_keyword(instrument_name, keyword):
+    """
+    Filter an instrument name column by a keyword: a case-insensitive exact match.
+
+    Every funding query filters by keyword with this one rule, so the window sums, the
+    latest-rate fallback and the page around them always agree on the instruments.
+    """
+    return func.lower(instrument_name) == keyword.lower()
+
+def split_window(since, end):
+    """
+    Split the window since <= timestamp < end into raw edges and whole rollup buckets.
+
+    Args:
+        since (int): The start of the window in milliseconds.
+        end (int): The end of the window in milliseconds, exclusive.
+
+    Returns:
+        tuple: Lists of (start, end) ranges to read from the raw rows, the hourly rollups
+            and the daily rollups; together they cover the window exactly once.
+    """
+    hour, day = HourlyFundingRollup.bucket_ms, DailyFundingRollup.bucket_ms
+    first_hour, last_hour = -(-since // hour) * hour, end - end % hour
+    if first_hour >= last_hour:
+        return [(since, end)], [], []
+
+    raw_ranges = [(start, stop) for start, stop in ((since, first_hour), (last_hour, end)) if start < stop]
+    first_day, last_day = -(-first_hour // day) * day, last_hour - last_hour % day
+    if first_day >= last_day:
+        return raw_ranges, [(first_hour, last_hour)], []
+
+    hourly_ranges = [(start, stop) for start, stop in ((first_hour, first_day), (last_day, last_hour)) if start < stop]
+    return raw_ranges, hourly_ranges, [(first_day, last_day)]
+
+def build_window_parts(since, until, keyword=None, exchange=None):
+    """
+    Build the selects whose rows add up to the funding sums over since <= timestamp <= until.
+
+    Whole days and hours of the window are read from the daily and hourly rollups, so a
+    year is a few hundred buckets per instrument; only the partial hours at the edges of
+    the window are read from raw rows, through the covering timestamp index.
+
+    Args:
+        since (int): The start of the window in milliseconds.
+        until (int): The end of the window in milliseconds, inclusive.
+        keyword (str, optional): Only this instrument, as matches_keyword compares it.
+        exchange (str, optional): Only this exchange; every exchange if None.
+
+    Returns:
+        list: Selects of (exchange, instrument_name, funding_sum) rows.
+    """
+    raw_ranges, hourly_ranges, daily_ranges = split_window(since, until + 1)
+    if exchange:
+        model_class = FUNDING_MODELS[exchange]
+        raw_columns = (literal(exchange).label('exchange'), model_class.instrument_name, model_class.funding_rate, model_class.timestamp)
+    else:
+        raw_columns = (funding_data.c.exchange, funding_data.c.instrument_name, funding_data.c.funding_rate, funding_data.c.timestamp)
+    raw_exchange, raw_instrument_name, raw_funding_rate, raw_timestamp = raw_columns
+
+    parts = []
+    for start, end in raw_ranges:
+        part = select(raw_exchange, raw_instrument_name, raw_funding_rate.label('funding_sum')).where(
+            raw_timestamp >= start,
+            raw_timestamp < end
+        )
+        if keyword:
+            part = part.where(matches_keyword(raw_instrument_name, keyword))
+        parts.append(part)
+
+    for rollup_class, ranges in ((HourlyFundingRollup, hourly_ranges), (DailyFundingRollup, daily_ranges)):
+        for start, end in ranges:
+            part = select(rollup_class.exchange, rollup_class.instrument_name, rollup_class.funding_sum).where(
+                rollup_class.bucket_start >= start,
+                rollup_class.bucket_start < end
+            )
+            if exchange:
+                part = part.where(rollup_class.exchange == exchange)
+            if keyword:
+                part = part.where(matches_keyword(rollup_class.instrument_name, keyword))
+            parts.append(part)
+
+    return parts
 
 def build_base_query(session, model_class, since, until, keyword):
-    since, until = adjust_timeframe(model_class, since, until)
-    query = session.query(
-        model_class.instrument_name,
+    """Build the per-instrument funding sum of one exchange, as a percentage, over since <= timestamp <= until."""
+    parts = build_window_parts(since, until, keyword, exchange_of(model_class))
+    window = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    return session.query(
+        window.c.instrument_name,
         # Multiply the sum of the funding rate by 100 to get the percentage
-        (func.sum(cast(model_class.funding_rate, Numeric)) * 100).label('total_funding_rate_percentage')
-    ).filter(
-        model_class.timestamp >= since,
-        # model_class.timestamp <= until
-    )
-    if keyword:
-        query = query.filter(model_class.instrument_name == keyword.upper())
-    return query.group_by(model_class.instrument_name)
+        (func.sum(window.c.funding_sum) * 100).label('total_funding_rate_percentage')
+    ).group_by(window.c.instrument_name)
 
+def build_window_exists(since, until, keyword=None, exchange=None):
+    """Build an EXISTS clause that is true if an exchange has funding data over since <= timestamp <= until."""
+    parts = build_window_parts(since, until, keyword, exchange)
+    window = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    return select(window.c.instrument_name).exists()
 
-def get_latest_funding_data(session, model_class, keyword=None):
-    # Subquery to get the latest timestamp for each unique instrument
-    latest_funding_subquery = session.query(
-        model_class.instrument_name,
-        func.max(model_class.timestamp).label('latest_timestamp')
-    ).group_by(
-        model_class.instrument_name
-    ).subquery()
-
-    # Main query to get the full data for the latest funding rates
-    query = session.query(
-        model_class.instrument_name,
-        # Explicitly cast funding_rate to Numeric before multiplying by 100
-        (cast(model_class.funding_rate, Numeric) * 100).label('funding_rate'),
-    ).join(
-        latest_funding_subquery,
-        (model_class.instrument_name == latest_funding_subquery.c.instrument_name) &
-        (model_class.timestamp == latest_funding_subquery.c.latest_timestamp)
-    )
+def build_pivot_query(session, since, until, keyword=None, latest_fallback=False):
+    """
+    Build the per-instrument funding sums of every exchange, as percentages, in a single query.
+
+    The rows of all exchanges are grouped once by instrument and pivoted into one column
+    per exchange with FILTER clauses; an exchange without data for an instrument gives None.
+    The last column, exchange_count, is the number of exchanges that have a value.
+
+    Args:
+        latest_fallback (bool): Give the latest funding rates of an exchange that has no
+            data in the window instead of nothing. Each exchange's latest rates are read
+            behind an uncorrelated NOT EXISTS probe of its window, which the database
+            evaluates once, so they are only scanned for exchanges that need them and the
+            decision costs no extra round trip.
+    """
+    parts = build_window_parts(since, until, keyword)
+    if latest_fallback:
+        for exchange in FUNDING_MODELS:
+            latest = build_latest_query(session, FUNDING_MODELS[exchange], keyword).subquery()
+            parts.append(select(
+                literal(f'{exchange}:latest').label('exchange'),
+                latest.c.instrument_name,
+                latest.c.funding_rate.label('funding_sum')
+            ).where(~build_window_exists(since, until, keyword, exchange)))
+    window = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+
+    columns = []
+    for exchange in FUNDING_MODELS:
+        # Multiply the sum of the funding rate by 100 to get the percentage; latest rates already are
+        funding_sum = func.sum(window.c.funding_sum).filter(window.c.exchange == exchange) * 100
+        if latest_fallback:
+            # At most one of the two has rows: the latest rates are only read without window data
+            funding_sum = func.coalesce(funding_sum, func.sum(window.c.funding_sum).filter(window.c.exchange == f'{exchange}:latest'))
+        columns.append(funding_sum.label(exchange))
+    return session.query(
+        window.c.instrument_name,
+        *columns,
+        func.count(func.distinct(window.c.exchange)).label('exchange_count')
+    ).group_by(window.c.instrument_name)
+
+def build_latest_query(session, model_class, keyword=None):
+    """
+    Build the query for the newest funding rate, as a percentage, of every instrument in a funding table.
+
+    On PostgreSQL this is a DISTINCT ON over the (instrument_name, timestamp DESC) covering
+    index: one index-only scan that keeps the first entry of each instrument. Other databases
+    join every instrument's max(timestamp) back to its row.
+    """
+    if engine.dialect.name == 'postgresql':
+        query = session.query(
+            model_class.instrument_name,
+            (model_class.funding_rate * 100).label('funding_rate'),
+        ).distinct(
+            model_class.instrument_name
+        ).order_by(
+            model_class.instrument_name.asc(),
+            model_class.timestamp.desc()
+        )
+    else:
+        # Subquery to get the latest timestamp for each unique instrument
+        latest_funding_subquery = session.query(
+            model_class.instrument_name,
+            func.max(model_class.timestamp).label('latest_timestamp')
+        ).group_by(
+            model_class.instrument_name
+        ).subquery()
+
+        query = session.query(
+            model_class.instrument_name,
+            (model_class.funding_rate * 100).label('funding_rate'),
+        ).join(
+            latest_funding_subquery,
+            (model_class.instrument_name == latest_funding_subquery.c.instrument_name) &
+            (model_class.timestamp == latest_funding_subquery.c.latest_timestamp)
+        ).order_by(model_class.instrument_name.asc())
 
     # Apply the keyword filter if provided (case insensitive)
     if keyword:
-        query = query.filter(model_class.instrument_name.ilike(f"%{keyword}%"))
+        query = query.filter(matches_keyword(model_class.instrument_name, keyword))
 
-    # Order by instrument_name in ascending order
-    query = query.order_by(model_class.instrument_name.asc())
+    return query
 
-    # Return the result
-    return query.all()
+def get_latest_funding_data(session, model_class, keyword=None):
+    return build_latest_query(session, model_class, keyword).all()
 
 def get_accumulated_funding_pagination(model_class, page, limit, since, until, sort_order, keyword=None):
-    with Session() as session:
+    with read_session() as session:
         # Query with time range filter
         query = build_base_query(session, model_class, since, until, keyword)
         
         # Apply sorting based on the provided order
         order = asc if sort_order == 'asc' else desc
-        query = query.order_by(order(model_class.instrument_name))
+        query = query.order_by(order('instrument_name'))
         
         # Apply pagination
-        # result = query.offset((page - 1) * limit).limit(limit).all()
-        result = query.all()
+        result = query.offset((page - 1) * limit).limit(limit).all()
 
-        # If no results are found, get the latest data without pagination
-        if not result:
+        # If the window has no data at all, get the latest data without pagination
+        if not result and page == 1:
             # Fetch the latest data using the previously fixed function
             result = get_latest_funding_data(session, model_class, keyword)  # No need to wrap in a list
         
         return result
 
+def get_accumulated_funding_by_exchange(since, until, sort_order='asc', keyword=None):
+    """
+    Return every exchange's per-instrument funding sums over a window in one round trip.
+
+    Like get_accumulated_funding_pagination, an exchange with no data in the window falls
+    back to its latest funding rates.
+
+    Returns:
+        dict: (instrument_name, funding percentage) tuples per exchange key.
+    """
+    with read_session() as session:
+        order = asc if sort_order == 'asc' else desc
+        rows = build_pivot_query(session, since, until, keyword, latest_fallback=True).order_by(order('instrument_name')).all()
+
+        return {
+            exchange: [(row[0], row[index]) for row in rows if row[index] is not None]
+            for index, exchange in enumerate(FUNDING_MODELS, start=1)
+        }
+
+def get_aggregated_funding_page(since, until, limit, after=None, offset=0, sort_order='asc', keyword=None):
+    """
+    Return one page of every exchange's per-instrument funding sums over a window.
+
+    Instruments listed on the most exchanges come first, then they are ordered by name.
+    Sorting, filtering and paging all happen in the database, in one statement covering
+    every exchange, so a page costs a single round trip. A page is read with keyset
+    pagination, continuing after the (exchange_count, instrument_name) of the previous
+    page's last row, so deep pages cost the same as the first one. Like
+    get_accumulated_funding_by_exchange, an exchange with no data in the window gives its
+    latest funding rates instead.
+
+    Args:
+        since (int): The start of the window in milliseconds.
+        until (int): The end of the window in milliseconds, inclusive.
+        limit (int): Instruments per page.
+        after (tuple, optional): (exchange_count, instrument_name) of the previous page's last row.
+        offset (int): Rows to skip, for clients that still page by number instead of by key.
+        sort_order (str): 'asc' or 'desc' order of the names within the same exchange count.
+        keyword (str, optional): Only this instrument, case-insensitive.
+
+    Returns:
+        tuple: The rows, as (instrument_name, name, logo_url, exchange_count) followed by one
+            funding percentage or None per exchange; the key to continue after, or None on
+            the last page; and the exchanges whose values are latest rates, not window sums.
+    """
+    with read_session() as session:
+        pivot = build_pivot_query(session, since, until, keyword, latest_fallback=True).subquery()
+
+        order = asc if sort_order == 'asc' else desc
+        query = session.query(
+            pivot.c.instrument_name,
+            Instrument.name,
+            Instrument.logo_url,
+            pivot.c.exchange_count,
+            *[pivot.c[exchange] for exchange in FUNDING_MODELS],
+            # The same once-evaluated probes as the fallback, to tell which exchanges it used
+            *[build_window_exists(since, until, keyword, exchange) for exchange in FUNDING_MODELS]
+        ).outerjoin(Instrument, Instrument.symbol == pivot.c.instrument_name)
+
+        if after:
+            exchange_count, instrument_name = after
+            name_after = pivot.c.instrument_name > instrument_name if sort_order == 'asc' else pivot.c.instrument_name < instrument_name
+            query = query.filter(or_(
+                pivot.c.exchange_count < exchange_count,
+                and_(pivot.c.exchange_count == exchange_count, name_after)
+            ))
+
+        # One extra row tells whether there is a next page
+        rows = query.order_by(
+            pivot.c.exchange_count.desc(),
+            order(pivot.c.instrument_name)
+        ).offset(offset).limit(limit + 1).all()
+
+        width = 4 + len(FUNDING_MODELS)
+        latest_exchanges = [exchange for exchange, in_window in zip(FUNDING_MODELS, rows[0][width:]) if not in_window] if rows else []
+        next_key = (rows[limit - 1].exchange_count, rows[limit - 1].instrument_name) if len(rows) > limit else None
+        return [tuple(row[:width]) for row in rows[:limit]], next_key, latest_exchanges
+
 def get_accumulated_funding(model_class, since, until, keyword=None):
-    with Session() as session:
+    with read_session() as session:
         # Query with time range filter
         query = build_base_query(session, model_class, since, until, keyword)
         result = query.all()
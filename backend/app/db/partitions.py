@@ -0,0 +1,173 @@
+import re
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.config import Config
+from app.logger import logger
+from app.db.models import FUNDING_MODELS
+from app.db.operations import engine, delete_old_data, delete_old_rollups, trim_instruments
+
+# Monthly partitions are named <table>_pYYYYMM, e.g. funding_data_aevo_p202610
+PARTITION_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def add_months(year, month, months):
+    """Return the (year, month) that lies the given number of months away."""
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def month_bounds(year, month):
+    """
+    Return the range a monthly partition holds.
+
+    Args:
+        year (int): The year of the month.
+        month (int): The month, 1 to 12.
+
+    Returns:
+        tuple: The first millisecond of the month (UTC) and the first millisecond of the next one.
+    """
+    next_year, next_month = add_months(year, month, 1)
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(next_year, next_month, 1, tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def partition_name(table, year, month):
+    return f'{table}_p{year:04d}{month:02d}'
+
+
+def is_partitioned(connection, table):
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+    ).scalar()
+    return relkind == 'p'
+
+
+def list_partitions(connection, table):
+    """
+    Return the monthly partitions attached to a funding table.
+
+    Returns:
+        dict: Partition name per (year, month); the default partition is left out.
+    """
+    names = connection.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+    """), {'table': table}).scalars()
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            partitions[(int(match.group(1)), int(match.group(2)))] = name
+    return partitions
+
+
+def default_partition_months(connection, table):
+    """Return the months of the rows that landed in the default partition because theirs didn't exist yet."""
+    if connection.execute(text("SELECT to_regclass(:name)"), {'name': f'{table}_default'}).scalar() is None:
+        return set()
+    rows = connection.execute(text(f"""
+        SELECT DISTINCT
+            CAST(EXTRACT(YEAR FROM month) AS integer),
+            CAST(EXTRACT(MONTH FROM month) AS integer)
+        FROM (
+            SELECT date_trunc('month', to_timestamp(timestamp / 1000.0) AT TIME ZONE 'UTC') AS month
+            FROM {table}_default
+        ) months
+    """))
+    return {(year, month) for year, month in rows}
+
+
+def create_partition(connection, table, year, month):
+    """
+    Create one monthly partition, moving any of its rows out of the default partition first.
+
+    Returns:
+        str: The name of the new partition.
+    """
+    name = partition_name(table, year, month)
+    start, end = month_bounds(year, month)
+
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    if connection.execute(text("SELECT to_regclass(:name)"), {'name': f'{table}_default'}).scalar() is not None:
+        connection.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default
+                WHERE timestamp >= {start} AND timestamp < {end}
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """))
+    # Attaching builds the partition's copies of the table indexes
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"))
+    return name
+
+
+def maintain_partitions(months_ahead=None, retention_months=None):
+    """
+    Create the upcoming monthly partitions of every funding table and drop the expired ones.
+
+    Rows that arrived before their month's partition existed are moved out of the default
+    partition into a new partition. Partitions that ended more than retention_months before
+    the current month are dropped whole with DROP TABLE, which frees their space at once
+    instead of deleting them row by row. Databases without partitioning, like SQLite, fall
+    back to deleting the expired rows. Either way, expired rollup buckets are deleted and the
+    first_seen of the instruments is moved up to the history that is left, see trim_instruments.
+
+    Args:
+        months_ahead (int, optional): Partitions to keep ready after the current month. Defaults to Config.PARTITION_MONTHS_AHEAD.
+        retention_months (int, optional): Months of history to keep, 0 for all. Defaults to Config.RETENTION_MONTHS.
+
+    Returns:
+        dict: The created and dropped partitions per table.
+    """
+    months_ahead = Config.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    retention_months = Config.RETENTION_MONTHS if retention_months is None else retention_months
+    now = datetime.now(timezone.utc)
+    cutoff = add_months(now.year, now.month, -retention_months)
+    cutoff_start = month_bounds(*cutoff)[0]
+    if retention_months:
+        delete_old_rollups(cutoff_start)
+
+    if engine.dialect.name != 'postgresql':
+        if retention_months:
+            # The same month boundary as the partitions and the rollups
+            for model_class in FUNDING_MODELS.values():
+                delete_old_data(model_class, before=cutoff_start)
+            trim_instruments(cutoff_start)
+        return {}
+
+    results = {}
+    for model_class in FUNDING_MODELS.values():
+        table = model_class.__tablename__
+        with engine.begin() as connection:
+            if not is_partitioned(connection, table):
+                logger.warning(f"[PARTITIONS] {table} is not partitioned; run the database migrations first")
+                continue
+            # Give up rather than queue every scraper and reader behind a long-running query,
+            # but let the row moves run as long as they need
+            connection.execute(text("SET LOCAL lock_timeout = '10s'"))
+            connection.execute(text("SET LOCAL statement_timeout = 0"))
+
+            wanted = default_partition_months(connection, table)
+            wanted.update(add_months(now.year, now.month, offset) for offset in range(months_ahead + 1))
+            existing = list_partitions(connection, table)
+            created = [create_partition(connection, table, year, month) for year, month in sorted(wanted - set(existing))]
+
+            dropped = []
+            if retention_months:
+                for month, name in sorted(list_partitions(connection, table).items()):
+                    if month < cutoff:
+                        connection.execute(text(f"DROP TABLE {name}"))
+                        dropped.append(name)
+
+        results[table] = {'created': created, 'dropped': dropped}
+        if created or dropped:
+            logger.info(f"[PARTITIONS] {table}: created {created or 'none'}, dropped {dropped or 'none'}")
+    if retention_months:
+        trim_instruments(cutoff_start)
+    return results
@@ -0,0 +1,134 @@
+import re
+import threading
+import time
+import ccxt
+from app.config import Config
+from app.logger import logger
+
+
+def apply_api_url(client, exchange_id):
+    """
+    Point every API endpoint of a ccxt client at Config.CCXT_API_URLS[exchange_id], if one is set.
+
+    Only the scheme and host are replaced, so path prefixes such as Gate.io's /api/v4 are kept.
+
+    Args:
+        client (ccxt.Exchange): A sync or async ccxt client.
+        exchange_id (str): The ccxt exchange id.
+
+    Returns:
+        ccxt.Exchange: The same client.
+    """
+    base_url = Config.CCXT_API_URLS.get(exchange_id)
+    if not base_url:
+        return client
+
+    def rewrite(urls):
+        if isinstance(urls, dict):
+            return {key: rewrite(value) for key, value in urls.items()}
+        return re.sub(r'^https?://[^/]+', base_url.rstrip('/'), urls)
+
+    client.urls['api'] = rewrite(client.urls['api'])
+    return client
+
+
+class ExchangeRegistry:
+    """
+    Process-wide registry of ccxt exchange clients.
+
+    Each exchange gets a single client whose markets are loaded once and reloaded when
+    they are older than the TTL. Clients are shared by every thread in the process, and
+    the registry keeps hit/miss counters and market-load timings per exchange.
+    """
+
+    def __init__(self, markets_ttl):
+        self.markets_ttl = markets_ttl
+        self._clients = {}
+        self._loaded_at = {}
+        self._locks = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _entry_lock(self, exchange_id):
+        """Return the lock guarding one exchange's client, creating the client on first use."""
+        with self._lock:
+            if exchange_id not in self._clients:
+                self._clients[exchange_id] = apply_api_url(getattr(ccxt, exchange_id)(), exchange_id)
+                self._loaded_at[exchange_id] = None
+                self._locks[exchange_id] = threading.Lock()
+                self._stats[exchange_id] = {'hits': 0, 'misses': 0, 'market_loads': 0, 'market_load_seconds': 0.0}
+            return self._locks[exchange_id]
+
+    def _count(self, exchange_id, key, amount=1):
+        with self._lock:
+            self._stats[exchange_id][key] += amount
+
+    def _is_fresh(self, exchange_id):
+        loaded_at = self._loaded_at[exchange_id]
+        return loaded_at is not None and time.monotonic() - loaded_at < self.markets_ttl
+
+    def get(self, exchange_id):
+        """
+        Return the shared client for an exchange with its markets loaded.
+
+        Args:
+            exchange_id (str): The ccxt exchange id, e.g. 'bybit' or 'gate'.
+
+        Returns:
+            ccxt.Exchange: The shared client.
+        """
+        entry_lock = self._entry_lock(exchange_id)
+
+        if self._is_fresh(exchange_id):
+            self._count(exchange_id, 'hits')
+            return self._clients[exchange_id]
+
+        with entry_lock:
+            # Another thread may have loaded the markets while we were waiting
+            if self._is_fresh(exchange_id):
+                self._count(exchange_id, 'hits')
+                return self._clients[exchange_id]
+
+            self._count(exchange_id, 'misses')
+            client = self._clients[exchange_id]
+            start_time = time.time()
+            client.load_markets(reload=self._loaded_at[exchange_id] is not None)
+            duration = time.time() - start_time
+
+            self._count(exchange_id, 'market_loads')
+            self._count(exchange_id, 'market_load_seconds', duration)
+            self._loaded_at[exchange_id] = time.monotonic()
+            logger.info(f"[{exchange_id.upper()}] Loaded {len(client.markets)} markets in {duration:.2f} seconds")
+            return client
+
+    def set_markets(self, exchange_id, markets, currencies=None):
+        """
+        Seed an exchange's markets without a request, e.g. from a recorded fixture.
+
+        Args:
+            exchange_id (str): The ccxt exchange id.
+            markets (dict or list): Markets in the shape ccxt.Exchange.set_markets accepts.
+            currencies (dict, optional): Currencies in the shape ccxt.Exchange.set_markets accepts.
+
+        Returns:
+            None
+        """
+        with self._entry_lock(exchange_id):
+            self._clients[exchange_id].set_markets(markets, currencies)
+            self._loaded_at[exchange_id] = time.monotonic()
+
+    def reset(self):
+        """Drop every client, e.g. in a freshly forked worker process that must not share the parent's connections."""
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._loaded_at = {}
+        self._locks = {}
+        self._stats = {}
+
+    def stats(self):
+        """Return a copy of the hit/miss and market-load counters per exchange."""
+        with self._lock:
+            return {exchange_id: dict(stats) for exchange_id, stats in self._stats.items()}
+
+
+exchange_registry = ExchangeRegistry(Config.MARKETS_TTL)
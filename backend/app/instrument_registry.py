@@ -0,0 +1,136 @@
+import threading
+import time
+from app.config import Config
+from app.logger import logger
+from app.utils import load_json_list
+from app.db.operations import get_active_instruments, sync_exchange_instruments
+
+
+def conditional_headers(validators):
+    """
+    Build the headers of a conditional request from the validators of the previous response.
+
+    Args:
+        validators (dict): The 'etag' and 'last_modified' of the previous response, or None.
+
+    Returns:
+        dict: If-None-Match / If-Modified-Since headers, empty on the first request.
+    """
+    headers = {}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def response_validators(response):
+    """Return the ETag and Last-Modified of a response, for the next conditional request."""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+class InstrumentRegistry:
+    """
+    Process-wide registry of the instruments each exchange lists.
+
+    Scrapers read the lists from memory. A list is refreshed from the exchange when it is
+    older than the refresh interval, using a conditional request where the API supports it,
+    and every change is persisted to the exchange_instruments table. Delisted instruments
+    drop out of the list, so no more requests are spent on them. If the exchange can't be
+    reached, the stored list is used, and the bundled data_const file as a last resort.
+    """
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._sources = {}
+        self._names = {}
+        self._validators = {}
+        self._refreshed_at = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _entry_lock(self, exchange, discover, fallback_path):
+        """Return the lock guarding one exchange's list, registering its source on first use."""
+        with self._lock:
+            if exchange not in self._sources:
+                self._sources[exchange] = (discover, fallback_path)
+                self._locks[exchange] = threading.Lock()
+            return self._locks[exchange]
+
+    def _is_fresh(self, exchange):
+        refreshed_at = self._refreshed_at.get(exchange)
+        return refreshed_at is not None and time.monotonic() - refreshed_at < self.refresh_seconds
+
+    def get(self, exchange, discover, fallback_path):
+        """
+        Return the instruments an exchange currently lists.
+
+        Args:
+            exchange (str): The exchange key, e.g. 'aevo'.
+            discover (function): Takes the previous response validators and returns (instrument_names, validators);
+                instrument_names is None when the exchange answered 304 Not Modified.
+            fallback_path (str): The bundled JSON list used when nothing else is available.
+
+        Returns:
+            list: Instrument names.
+        """
+        entry_lock = self._entry_lock(exchange, discover, fallback_path)
+
+        if self._is_fresh(exchange):
+            return list(self._names[exchange])
+
+        with entry_lock:
+            # Another thread may have refreshed the list while we were waiting
+            if not self._is_fresh(exchange):
+                self._refresh(exchange)
+            return list(self._names[exchange])
+
+    def refresh_all(self):
+        """Refresh every exchange that has been read at least once; used by the scheduler."""
+        with self._lock:
+            exchanges = list(self._sources)
+        for exchange in exchanges:
+            with self._locks[exchange]:
+                self._refresh(exchange)
+
+    def _refresh(self, exchange):
+        discover, fallback_path = self._sources[exchange]
+        tag = exchange.upper()
+        try:
+            instrument_names, validators = discover(self._validators.get(exchange))
+            if instrument_names is None and exchange in self._names:
+                logger.info(f"[{tag}] Instrument list not modified")
+            elif not instrument_names:
+                # Never take an empty answer as "everything was delisted"
+                raise ValueError("the exchange returned no instruments")
+            else:
+                instrument_names = sorted(set(instrument_names))
+                added, removed = sync_exchange_instruments(exchange, instrument_names)
+                self._names[exchange] = instrument_names
+                self._validators[exchange] = validators
+                logger.info(f"[{tag}] Instrument list refreshed: {len(instrument_names)} listed, {len(added)} added, {len(removed)} delisted")
+                if removed:
+                    logger.info(f"[{tag}] Delisted instruments: {removed}")
+        except Exception as e:
+            logger.error(f"[{tag}] Could not refresh the instrument list: {e}")
+            if exchange not in self._names:
+                self._names[exchange] = self._load_fallback(exchange, fallback_path)
+        self._refreshed_at[exchange] = time.monotonic()
+
+    @staticmethod
+    def _load_fallback(exchange, fallback_path):
+        """Return the stored list of an exchange, or the bundled JSON list if nothing is stored."""
+        try:
+            instrument_names = get_active_instruments(exchange)
+            if instrument_names:
+                return instrument_names
+        except Exception as e:
+            logger.error(f"[{exchange.upper()}] Could not read stored instruments: {e}")
+
+        return load_json_list(fallback_path)
+
+
+instrument_registry = InstrumentRegistry(Config.INSTRUMENTS_REFRESH_SECONDS)
@@ -6,6 +6,7 @@ import numpy as np
 from functools import lru_cache
 
 from app.utils import load_tickers, get_logo_url, get_timeframe
+from app.exchange_registry import exchange_registry
 
 logging.basicConfig(level=logging.WARNING)  # Configure logging level
 
@@ -56,7 +57,7 @@ class FrService:
     @lru_cache(maxsize=128)
     def fetchFundingWithCCXT(exchange: str, symbol: str, timeframe: str) -> tuple:
         try:
-            ex = getattr(ccxt, exchange)()
+            ex = exchange_registry.get(exchange)
             params = {}
             since = None
             if timeframe is not None:
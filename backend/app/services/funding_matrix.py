@@ -0,0 +1,124 @@
+import numpy as np
+
+# Milliseconds in a (365 day) year, to annualize funding accumulated over a window
+YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+
+class FundingMatrix:
+    """
+    Funding percentages of many instruments on every exchange, as one instruments × exchanges array.
+
+    Missing values are NaN, so counting, ranking and the cross-exchange columns are computed
+    with whole-array NumPy operations instead of per-instrument Python loops, and their cost
+    grows with the size of the array rather than with the number of dicts built from it.
+    """
+
+    def __init__(self, symbols, exchanges, rates, window_ms, latest_exchanges=()):
+        """
+        Args:
+            symbols (list): Instrument names, one per row.
+            exchanges (list): Exchange keys, one per column.
+            rates (numpy.ndarray): Funding percentages shaped (len(symbols), len(exchanges)), NaN where missing.
+            window_ms (int): Length of the window the rates were accumulated over, in milliseconds.
+            latest_exchanges (iterable, optional): Exchanges whose column holds their latest
+                funding rate instead of a window sum.
+        """
+        self.symbols = np.asarray(symbols, dtype=str)
+        self.exchanges = list(exchanges)
+        self.rates = np.asarray(rates, dtype=np.float64).reshape(len(self.symbols), len(self.exchanges))
+        self.window_ms = window_ms
+        self.latest_exchanges = [exchange for exchange in self.exchanges if exchange in set(latest_exchanges)]
+
+    @classmethod
+    def from_rows(cls, rows, exchanges, window_ms, latest_exchanges=()):
+        """
+        Build a matrix from rows of (instrument_name, value per exchange...), None where missing.
+
+        Args:
+            rows (list): Rows such as those of build_pivot_query, without its exchange_count.
+            exchanges (list): The exchange of each value column, in order.
+            window_ms (int): Length of the window the values were accumulated over, in milliseconds.
+            latest_exchanges (iterable, optional): Exchanges whose column holds their latest rate.
+        """
+        symbols = [row[0] for row in rows]
+        # None becomes NaN when converted to float64
+        rates = np.array([row[1:len(exchanges) + 1] for row in rows], dtype=np.float64)
+        return cls(symbols, exchanges, rates.reshape(len(rows), len(exchanges)), window_ms, latest_exchanges)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def present(self):
+        """Boolean array of the values that exist."""
+        return ~np.isnan(self.rates)
+
+    @property
+    def counts(self):
+        """Number of exchanges with a value, per instrument."""
+        return self.present.sum(axis=1)
+
+    @property
+    def spread(self):
+        """Highest minus lowest rate across exchanges, per instrument; NaN with fewer than two values."""
+        highest = np.where(self.present, self.rates, -np.inf).max(axis=1, initial=-np.inf)
+        lowest = np.where(self.present, self.rates, np.inf).min(axis=1, initial=np.inf)
+        return np.where(self.counts >= 2, highest - lowest, np.nan)
+
+    @property
+    def long_index(self):
+        """Column of the lowest rate per instrument, the cheapest exchange to hold a long on; -1 if none."""
+        index = np.where(self.present, self.rates, np.inf).argmin(axis=1)
+        return np.where(self.counts > 0, index, -1)
+
+    @property
+    def short_index(self):
+        """Column of the highest rate per instrument, the exchange that pays shorts the most; -1 if none."""
+        index = np.where(self.present, self.rates, -np.inf).argmax(axis=1)
+        return np.where(self.counts > 0, index, -1)
+
+    @property
+    def annualized(self):
+        """
+        The window sums scaled from the window to a year, as percentages per year.
+
+        Latest rates cover one funding interval of their exchange, not the window, so their
+        columns are NaN.
+        """
+        if not self.window_ms:
+            return np.full_like(self.rates, np.nan)
+        annualized = self.rates * (YEAR_MS / self.window_ms)
+        annualized[:, [self.exchanges.index(exchange) for exchange in self.latest_exchanges]] = np.nan
+        return annualized
+
+    def rank_by_spread(self, min_spread=None, top=None):
+        """
+        Return the instruments with the widest cross-exchange spread first.
+
+        Args:
+            min_spread (float, optional): Leave out instruments whose spread is below this.
+            top (int, optional): Return at most this many rows.
+
+        Returns:
+            numpy.ndarray: Row indices, widest spread first, ties by name.
+        """
+        spread = self.spread
+        keep = ~np.isnan(spread)
+        if min_spread is not None:
+            keep &= spread >= min_spread
+        rows = np.flatnonzero(keep)
+        rows = rows[np.lexsort((self.symbols[rows], -spread[rows]))]
+        return rows[:top] if top is not None else rows
+
+    def select_exchanges(self, exchanges):
+        """Return a matrix of only the given exchanges' columns, in the given order."""
+        columns = [self.exchanges.index(exchange) for exchange in exchanges]
+        return FundingMatrix(self.symbols, exchanges, self.rates[:, columns], self.window_ms, self.latest_exchanges)
+
+    def select_rows(self, mask):
+        """Return a matrix of only the instruments where a boolean mask is true."""
+        return FundingMatrix(self.symbols[mask], self.exchanges, self.rates[mask], self.window_ms, self.latest_exchanges)
+
+    def venue(self, index):
+        """Exchange key of a column index from long_index or short_index, None for -1."""
+        return self.exchanges[index] if index >= 0 else None
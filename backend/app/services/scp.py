@@ -1,17 +1,18 @@
-from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB
-from app.db.operations import get_tickers, get_accumulated_funding_pagination, get_unique_tickers_from_all_exchanges
-from collections import defaultdict
+from app.db.operations import search_instruments, get_accumulated_funding_pagination, get_aggregated_funding_page
+from app.db.models import FUNDING_MODELS
+import math
 from datetime import datetime
-from app.utils import get_logo_url, get_timeframe
+from time import perf_counter
+from app.utils import get_timeframe, encode_cursor, decode_cursor
+from app.services.funding_matrix import FundingMatrix
 
 def get_coins(keyword=None):
-    # Assuming get_unique_tickers is a function that retrieves the unique tickers based on the keyword
-    unique_tickers = get_tickers(keyword)
+    # Coins, names and logos all come from the instruments table in one indexed lookup
+    instruments = search_instruments(keyword)
     
     # Construct the data array with the required fields
     data = []
-    for ticker in unique_tickers:
-        logo_url, name = get_logo_url(ticker)
+    for ticker, name, logo_url in instruments:
         data.append({
             "coin": ticker,
             "logo": logo_url or "https://iili.io/dXFbXdN.th.jpg",
@@ -24,76 +25,74 @@ def get_coins(keyword=None):
 def get_funding_pagination(db_model, page, limit, since, until, sort_order, keyword):
     return get_accumulated_funding_pagination(db_model, page, limit, since, until, sort_order, keyword)
 
-# Aggregate funding data for multiple exchanges
-def aggregate_funding_data(unique_tickers, data_sources):
-    aggregated_data = defaultdict(lambda: {key: None for key in data_sources.keys()})
+# Largest page the aggregated endpoint serves
+MAX_PAGE_SIZE = 100
 
-    for source_name, data in data_sources.items():
-        for ticker, funding in data:
-            if ticker in unique_tickers:
-                aggregated_data[ticker][source_name] = str(funding) if funding is not None else None
-
-    return dict(aggregated_data)
+def format_rate(value):
+    # Rates are summed as doubles; rounding drops the float noise from the output
+    if value is None or math.isnan(value):
+        return None
+    return str(round(float(value), 10))
 
 # Main function to get aggregated funding data with pagination
-def scrapper_with_pagination(page=1, limit=10, time='1d', sort_order='asc', coin=None):
+def scrapper_with_pagination(page=1, limit=10, time='1d', sort_order='asc', coin=None, cursor=None, derived=False):
+    """
+    Return one page of funding sums of every exchange, most widely listed coins first.
+
+    Pages are fetched by cursor: meta.nextCursor of a response is passed back as cursor
+    to get the page after it. Without a cursor, page selects the page by number. With
+    derived, every coin also gets its spread across exchanges, the exchanges with the
+    lowest and highest rate, and its window sums annualized, computed on the whole page at
+    once by a FundingMatrix. Sorting and paging still happen in SQL either way; the matrix
+    is only built when derived is set, and only adds fields to the rows of the page.
+
+    Raises:
+        ValueError: If the timeframe or the cursor is invalid.
+    """
     since, until = get_timeframe(time)
-    unique_tickers = get_unique_tickers_from_all_exchanges()
-
-    if coin:
-        unique_tickers = [ticker for ticker in unique_tickers if ticker.lower() == coin.lower()]
-
-    # Fetch paginated data from each exchange
-    data_sources = {
-        'aevo': get_funding_pagination(AevoDB, 1, 100, since, until, sort_order, coin),
-        'bybit': get_funding_pagination(BybitDB, 1, 100, since, until, sort_order, coin),
-        'gateio': get_funding_pagination(GateioDB, 1, 100, since, until, sort_order, coin),
-        'hyperliquid': get_funding_pagination(HyperliquidDB, 1, 100, since, until, sort_order, coin)
-    }
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
 
-    aggregated_data = aggregate_funding_data(unique_tickers, data_sources)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if len(after) != 2 or not isinstance(after[0], int) or not isinstance(after[1], str):
+            raise ValueError("Invalid cursor")
+    offset = 0 if after else (max(page, 1) - 1) * limit
 
-    # Ensure that tickers with no data are still included
-    if not aggregated_data:
-        aggregated_data = {ticker: {source: None for source in data_sources} for ticker in unique_tickers}
-
-    # Sort tickers by the number of non-null data entries (descending)
-    sorted_aggregated_data = sorted(
-        aggregated_data.items(),
-        key=lambda item: sum(1 for value in item[1].values() if value is not None),
-        reverse=True
-    )
-
-    # Apply pagination (Commented out since pagination is disabled)
-    total_items = len(sorted_aggregated_data)
-    # start_index = (page - 1) * limit
-    # end_index = start_index + limit
-    # paginated_items = sorted_aggregated_data[start_index:end_index]
+    # Every exchange, the latest-rate fallback and the names and logos come from one statement
+    started = perf_counter()
+    rows, next_key, latest_exchanges = get_aggregated_funding_page(since, until, limit, after, offset, sort_order, coin)
+    query_ms = (perf_counter() - started) * 1000
 
     # Construct the data array with the required fields
-    data = [{
-        "coin": ticker,
-        "logo": logo_url or "https://iili.io/dXFbXdN.th.jpg",
-        "name": name or ticker,
-        "funding": funding_data
-    } for ticker, funding_data in sorted_aggregated_data for logo_url, name in [get_logo_url(ticker)]]
-    # } for ticker, funding_data in paginated_items for logo_url, name in [get_logo_url(ticker)]] # Uncomment for pagination
+    data = []
+    for ticker, name, logo_url, _, *funding in rows:
+        data.append({
+            "coin": ticker,
+            "logo": logo_url or "https://iili.io/dXFbXdN.th.jpg",
+            "name": name or ticker,
+            "funding": {exchange: format_rate(value) for exchange, value in zip(FUNDING_MODELS, funding)}
+        })
 
-    # Meta information
-    # total_pages = (total_items + limit - 1) // limit
-    # is_next_page = page < total_pages
+    if derived:
+        matrix = FundingMatrix.from_rows([(row[0], *row[4:]) for row in rows], list(FUNDING_MODELS), until - since, latest_exchanges)
+        spread, long_index, short_index, annualized = matrix.spread, matrix.long_index, matrix.short_index, matrix.annualized
+        for i, item in enumerate(data):
+            item["spread"] = format_rate(spread[i])
+            item["longExchange"] = matrix.venue(long_index[i])
+            item["shortExchange"] = matrix.venue(short_index[i])
+            item["annualized"] = {exchange: format_rate(value) for exchange, value in zip(matrix.exchanges, annualized[i])}
 
     meta = {
         "filter": {"time": time, "coin": coin or "All", "sortOrder": sort_order},
         "date": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-        "isNextPage": False,  # Dummy value
-        "page": 1,  # Dummy value
-        # "perPage": limit, # Uncomment for pagination
-        "perPage": total_items,  # Dummy value
-        "totalItems": total_items,
-        "totalPages": 1  # Dummy value
+        "isNextPage": next_key is not None,
+        "nextCursor": encode_cursor(next_key) if next_key else None,
+        "page": page,
+        "perPage": limit,
+        # Exchanges without data in the window show their latest funding rate instead
+        "latestExchanges": latest_exchanges,
+        "queryMs": round(query_ms, 2)
     }
 
     return {"data": data, "meta": meta}
-
-
@@ -0,0 +1,236 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from time import perf_counter
+import numpy as np
+from app.cache import response_cache
+from app.config import Config
+from app.db.models import FUNDING_MODELS, HourlyFundingRollup, DailyFundingRollup
+from app.db.operations import get_rollup_buckets, get_instrument_details
+from app.logger import logger
+from app.services.funding_matrix import FundingMatrix, YEAR_MS
+from app.services.scp import format_rate
+
+# Windows of the screener in milliseconds, as get_timeframe reads them ('1h' covers two hours)
+WINDOWS = {
+    '1h': 2 * 3600 * 1000,
+    '8h': 8 * 3600 * 1000,
+    '1d': 24 * 3600 * 1000,
+    '7d': 7 * 24 * 3600 * 1000,
+    '1M': 30 * 24 * 3600 * 1000,
+    '1y': 365 * 24 * 3600 * 1000,
+}
+
+# Re-read buckets written this long before the newest one seen, so a write that committed
+# after a refresh, or reached the read replica late, is still picked up
+WATERMARK_OVERLAP = timedelta(seconds=120)
+
+# Largest number of instruments the screener returns
+MAX_TOP = 100
+
+
+class RollingFundingWindow:
+    """
+    Per-instrument, per-exchange funding sums over a trailing window, kept in memory.
+
+    The window is held as a ring of rollup buckets (hourly up to a week, daily beyond), each
+    an instruments × exchanges array. A refresh reads only the buckets written since the
+    previous one and overwrites their slots, and buckets that fall out of the window are
+    cleared as the clock moves; summing the ring gives the FundingMatrix that requests read.
+    The whole window is reloaded every SCREENER_FULL_RELOAD_SECONDS, which also drops data
+    deleted in the meantime.
+    """
+
+    def __init__(self, timeframe, window_ms, full_reload_seconds):
+        self.timeframe = timeframe
+        self.window_ms = window_ms
+        self.full_reload_seconds = full_reload_seconds
+        self.rollup_class = HourlyFundingRollup if window_ms <= WINDOWS['7d'] else DailyFundingRollup
+        self.exchanges = list(FUNDING_MODELS)
+        self.columns = {exchange: column for column, exchange in enumerate(self.exchanges)}
+        self.slots = -(-window_ms // self.rollup_class.bucket_ms) + 1
+        self.matrix = None
+        self.details = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.symbols = []
+        self.rows = {}
+        self.ring = np.full((self.slots, 0, len(self.exchanges)), np.nan)
+        self.slot_starts = np.full(self.slots, -1, dtype=np.int64)
+        self.watermark = None
+        self.generation = None
+        self.loaded_at = None
+
+    def window_start(self, now_ms):
+        """Start of the first whole bucket of the window ending now."""
+        bucket_ms = self.rollup_class.bucket_ms
+        return -(-(now_ms - self.window_ms) // bucket_ms) * bucket_ms
+
+    def needs_full_reload(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.full_reload_seconds
+
+    def needs_refresh(self, now_ms, generation):
+        """True if new funding data was written or a bucket left the window since the last refresh."""
+        if self.matrix is None or self.needs_full_reload() or generation != self.generation:
+            return True
+        return bool(((self.slot_starts >= 0) & (self.slot_starts < self.window_start(now_ms))).any())
+
+    def get(self):
+        """Return the current FundingMatrix of the window, refreshing it first if it is out of date."""
+        now_ms = int(time.time() * 1000)
+        # The counter every scraper write bumps, read at most every CACHE_GENERATION_CHECK_SECONDS
+        generation = response_cache.current_generation()
+        if self.needs_refresh(now_ms, generation):
+            # One request refreshes; the others keep reading the previous matrix meanwhile
+            if self._lock.acquire(blocking=self.matrix is None):
+                try:
+                    if self.needs_refresh(now_ms, generation):
+                        self.refresh(now_ms, generation)
+                except Exception as e:
+                    if self.matrix is None:
+                        raise
+                    logger.error(f"[SCREENER] Refreshing the {self.timeframe} window failed, serving the previous one: {e}")
+                finally:
+                    self._lock.release()
+        return self.matrix
+
+    def refresh(self, now_ms, generation):
+        full = self.needs_full_reload()
+        if full:
+            self._reset()
+        window_start = self.window_start(now_ms)
+
+        # Slots of buckets that left the window are emptied before new buckets reuse them
+        expired = (self.slot_starts >= 0) & (self.slot_starts < window_start)
+        self.ring[expired] = np.nan
+        self.slot_starts[expired] = -1
+
+        updated_since = None if self.watermark is None else self.watermark - WATERMARK_OVERLAP
+        buckets = get_rollup_buckets(self.rollup_class, window_start, updated_since)
+        self.apply(buckets)
+
+        present = ~np.isnan(self.ring)
+        sums = np.where(present, self.ring, 0.0).sum(axis=0)
+        # Multiply the sum of the funding rate by 100 to get the percentage, like the window sums of the API
+        rates = np.where(present.any(axis=0), sums * 100, np.nan)
+        self.matrix = FundingMatrix(self.symbols, self.exchanges, rates, self.window_ms)
+        self.generation = generation
+        self.refreshed_at = datetime.utcnow()
+        if full:
+            self.loaded_at = time.monotonic()
+
+    def apply(self, buckets):
+        """Write rollup buckets into their slots of the ring, adding rows for new instruments."""
+        if not buckets:
+            return
+        exchanges, instrument_names, bucket_starts, funding_sums, updated_ats = zip(*buckets)
+        self.watermark = max(filter(None, (self.watermark, *updated_ats)), default=None)
+
+        new_symbols = sorted(set(instrument_names) - self.rows.keys())
+        if new_symbols:
+            for symbol in new_symbols:
+                self.rows[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            padding = np.full((self.slots, len(new_symbols), len(self.exchanges)), np.nan)
+            self.ring = np.concatenate([self.ring, padding], axis=1)
+            self.details.update(get_instrument_details(new_symbols))
+
+        starts = np.array(bucket_starts, dtype=np.int64)
+        slots = (starts // self.rollup_class.bucket_ms) % self.slots
+        # A slot that still holds an older bucket is taken over by the newer one
+        for slot, start in set(zip(slots.tolist(), starts.tolist())):
+            if self.slot_starts[slot] != start:
+                self.ring[slot] = np.nan
+                self.slot_starts[slot] = start
+        rows = np.array([self.rows[name] for name in instrument_names], dtype=np.intp)
+        columns = np.array([self.columns[exchange] for exchange in exchanges], dtype=np.intp)
+        self.ring[slots, rows, columns] = np.array(funding_sums, dtype=np.float64)
+
+
+class SpreadScreener:
+    """The rolling windows of the screener, created on first use and shared by every request of this process."""
+
+    def __init__(self, full_reload_seconds):
+        self.full_reload_seconds = full_reload_seconds
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def window(self, timeframe):
+        with self._lock:
+            if timeframe not in self._windows:
+                self._windows[timeframe] = RollingFundingWindow(timeframe, WINDOWS[timeframe], self.full_reload_seconds)
+            return self._windows[timeframe]
+
+
+spread_screener = SpreadScreener(Config.SCREENER_FULL_RELOAD_SECONDS)
+
+
+def screen_spreads(time='1d', exchanges=None, min_spread=None, top=20, coin=None):
+    """
+    Return the instruments with the widest funding spread between exchanges over a window.
+
+    The spread of an instrument is its highest minus its lowest funding sum among the chosen
+    exchanges that have data for it in the window: the funding collected by holding a short
+    on the highest and a long on the lowest. It is read from the window's in-memory matrix,
+    so a request costs no database query unless new funding data arrived since the last one.
+
+    Args:
+        time (str): The window, as for the aggregated funding endpoint.
+        exchanges (list, optional): At least two exchanges to compare; all of them by default.
+        min_spread (float, optional): Leave out spreads below this many percentage points.
+        top (int): Return at most this many instruments.
+        coin (str, optional): Only this instrument, case-insensitive.
+
+    Raises:
+        ValueError: If the window, an exchange or top is invalid.
+    """
+    if time not in WINDOWS:
+        raise ValueError("Unsupported timeframe. Use '1h', '8h', '1d', '7d', '1M', or '1y'.")
+    exchanges = exchanges or list(FUNDING_MODELS)
+    unknown = [exchange for exchange in exchanges if exchange not in FUNDING_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown exchanges: {', '.join(unknown)}")
+    if len(set(exchanges)) < 2:
+        raise ValueError("Choose at least two exchanges")
+    if top < 1:
+        raise ValueError("top must be at least 1")
+    top = min(top, MAX_TOP)
+
+    window = spread_screener.window(time)
+    started = perf_counter()
+    matrix = window.get().select_exchanges(list(dict.fromkeys(exchanges)))
+    if coin:
+        matrix = matrix.select_rows(np.char.lower(matrix.symbols) == coin.lower())
+
+    order = matrix.rank_by_spread(min_spread, top)
+    spread, long_index, short_index = matrix.spread, matrix.long_index, matrix.short_index
+    annualized_spread = spread * (YEAR_MS / matrix.window_ms)
+
+    data = []
+    for row in order:
+        symbol = str(matrix.symbols[row])
+        name, logo_url = window.details.get(symbol, (None, None))
+        long_exchange, short_exchange = matrix.venue(long_index[row]), matrix.venue(short_index[row])
+        data.append({
+            "coin": symbol,
+            "logo": logo_url or "https://iili.io/dXFbXdN.th.jpg",
+            "name": name or symbol,
+            "spread": format_rate(spread[row]),
+            "annualizedSpread": format_rate(annualized_spread[row]),
+            "longExchange": long_exchange,
+            "shortExchange": short_exchange,
+            "funding": {exchange: format_rate(value) for exchange, value in zip(matrix.exchanges, matrix.rates[row])}
+        })
+
+    meta = {
+        "filter": {"time": time, "exchanges": matrix.exchanges, "minSpread": min_spread, "top": top, "coin": coin or "All"},
+        "date": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "refreshedAt": window.refreshed_at.strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "instruments": len(matrix),
+        "computeMs": round((perf_counter() - started) * 1000, 2)
+    }
+
+    return {"data": data, "meta": meta}
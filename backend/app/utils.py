@@ -1,30 +1,62 @@
+import base64
+import binascii
 import json
+import os
 import re
+import threading
 from datetime import datetime, timedelta, timezone
 
-def load_tickers():
-    with open("data_const/ticker.json", 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data
-
-def get_timestamp_for_interval(interval):
-    current_time = datetime.utcnow()
-    end_time = int(current_time.timestamp() * 1e9)  # API might need seconds; adjust accordingly
-
-    intervals = {
-        '1h': 3600,
-        '8h': 8 * 3600,
-        '1d': 86400,
-        '7d': 7 * 86400,
-        '1M': 30 * 86400,
-        '1y': 365 * 86400
-    }
 
-    if interval not in intervals:
-        raise ValueError("Invalid interval")
+class JsonFileCache:
+    """
+    Parsed JSON files kept in memory and reloaded when the file changes on disk.
+
+    A file is parsed, and its transform applied, on the first read and again only after
+    its modification time or size changes, so editing a data_const file takes effect
+    without a restart while every other read costs a single stat call.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, transform=None):
+        """
+        Return the parsed content of a JSON file.
+
+        Args:
+            path (str): The JSON file.
+            transform (function, optional): Applied once to the parsed content after each (re)load.
+
+        Returns:
+            The (transformed) content; callers must not modify it.
+        """
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = (path, transform)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
 
-    start_time = end_time - int(intervals[interval] * 1e9)
-    return int(start_time), int(end_time)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                entry = self._entries[key] = (version, transform(data) if transform else data)
+            return entry[1]
+
+
+json_files = JsonFileCache()
+
+
+def load_json_list(path):
+    """Return a copy of the JSON list in a file, e.g. a bundled data_const/avail_*.json instrument list."""
+    return list(json_files.get(path))
+
+
+def load_tickers():
+    return load_json_list("data_const/ticker.json")
 
 def get_timeframe(timeframe: str):
     now = datetime.now()
@@ -47,21 +79,40 @@ def get_timeframe(timeframe: str):
     until_timestamp = int(now.timestamp() * 1000)
     return since_timestamp, until_timestamp
 
+def build_logo_index(cc_coins):
+    """
+    Index the coins of crypto_logos.json by lower-case symbol.
+
+    Returns:
+        dict: (logo URL, name) per lower-case symbol; the first coin listed wins a shared symbol.
+    """
+    index = {}
+    for coin in cc_coins.values():
+        symbol = coin['symbol'].lower()
+        if symbol not in index:
+            logo_url = f"https://cryptologos.cc/logos/{coin['name'].lower().replace(' ', '-')}-{symbol}-logo.png"
+            index[symbol] = (logo_url, coin['name'])
+    return index
+
+
 def get_logo_url(symbol, file_path='data_const/crypto_logos.json'):
-    # Load the JSON content from the file
-    with open(file_path, 'r', encoding='utf-8') as file:
-        cc_coins = json.load(file)
-    
-    # Search for the coin with the matching symbol
-    coin = next((coin for coin in cc_coins.values() if coin['symbol'].lower() == symbol.lower()), None)
-    
-    if coin:
-        # Construct the logo URL
-        logo_url = f"https://cryptologos.cc/logos/{coin['name'].lower().replace(' ', '-')}-{symbol.lower()}-logo.png"
-        return logo_url, coin['name']
-    
-    return None, None
+    return json_files.get(file_path, build_logo_index).get(symbol.lower(), (None, None))
+
 
+def resume_since(window_start, latest_timestamp):
+    """
+    Return where an incremental fetch should start for one instrument.
+
+    Args:
+        window_start (int): The start of the configured scrape window.
+        latest_timestamp (int): The newest timestamp already stored, or None.
+
+    Returns:
+        int: The later of the window start and the point right after the stored data.
+    """
+    if latest_timestamp is None:
+        return window_start
+    return max(window_start, int(latest_timestamp) + 1)
 
 def time_converter(timestamp):
     time_in_hour = {
@@ -76,4 +127,35 @@ def time_converter(timestamp):
     time_delta = datetime.now(timezone.utc) - timedelta(hours=time_in_hour[timestamp])
     since = int(time_delta.timestamp() * 1000)
 
-    return since
\ No newline at end of file
+    return since
+
+
+def encode_cursor(key):
+    """
+    Encode a pagination key as an opaque, URL-safe cursor token.
+
+    Args:
+        key (tuple): The sort key of the last row of a page.
+
+    Returns:
+        str: The token a client sends back to get the next page.
+    """
+    payload = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token made by encode_cursor.
+
+    Raises:
+        ValueError: If the token is not a valid cursor.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        key = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
@@ -1,4 +1,5 @@
 import os
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import token_required
 from app.services.fr_aevo import Aevo
@@ -7,6 +8,8 @@ from app.services.fr_bybit import Bybit
 from app.services.fr_gateio import Gateio
 from app.services.fr_service import FrService
 from app.services.scp import scrapper_with_pagination, get_coins
+from app.services.spread_screener import screen_spreads
+from app.cache import response_cache
 import requests
 from dotenv import load_dotenv
 
@@ -24,10 +27,47 @@ def get_aggregated_funding(current_user):
     time = request.args.get('time', default='1h', type=str)
     sort_order = request.args.get('sort_order', default='asc', type=str)
     keyword = request.args.get('keyword', default=None, type=str)
+    cursor = request.args.get('cursor', default=None, type=str)
+    derived = request.args.get('derived', default='false', type=str).lower() in ('1', 'true')
+
+    # Every user asking for the same window and page shares one computed page until the scrapers write new data
+    cache_key = f"aggregated-funding:page:{time}:{sort_order}:{(keyword or '').lower()}:{page}:{limit}:{cursor or ''}:{int(derived)}"
+    timing = {}
+
+    def compute():
+        result = scrapper_with_pagination(page, limit, time, sort_order, keyword, cursor, derived)
+        # The time and date of the request aren't cached, they are added to every response below
+        timing['queryMs'] = result['meta'].pop('queryMs')
+        result['meta'].pop('date')
+        return result
+
+    try:
+        result, cache_status = response_cache.get_or_compute(cache_key, compute)
+        # queryMs is only the time of this request's own query, 0 when the page was served from the cache
+        query_ms = timing.get('queryMs', 0) if cache_status in ('MISS', 'BYPASS') else 0
+        meta = {**result['meta'], 'date': datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"), 'queryMs': query_ms}
+        response = jsonify({**result, 'meta': meta})
+        response.headers['X-Cache'] = cache_status
+        return response
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'code': 500, 'message': str(e)}), 500
+
+@funding_rates_bp.route('/spread-screener', methods=['GET'])
+@token_required
+def get_spread_screener(current_user):
+    time = request.args.get('time', default='1d', type=str)
+    exchanges = request.args.get('exchanges', default=None, type=str)
+    min_spread = request.args.get('min_spread', default=None, type=float)
+    top = request.args.get('top', default=20, type=int)
+    keyword = request.args.get('keyword', default=None, type=str)
 
     try:
-        aggregated_data = scrapper_with_pagination(page, limit, time, sort_order, keyword)
-        return jsonify(aggregated_data)
+        exchanges = [exchange.strip().lower() for exchange in exchanges.split(',') if exchange.strip()] if exchanges else None
+        return jsonify(screen_spreads(time, exchanges, min_spread, top, keyword))
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'code': 500, 'message': str(e)}), 500
 
@@ -0,0 +1,99 @@
+"""
+Check that the funding aggregation queries are planned as index scans.
+
+Runs EXPLAIN on the window-sum and latest-rate queries of every funding table and on the
+all-exchange window sum, with sequential scans disabled so a missing or unusable index
+shows up even on a small table, and exits non-zero if any plan still contains a Seq Scan.
+
+Run from the backend directory against a migrated PostgreSQL database:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.check_query_plans
+    DATABASE_URL=postgresql://... python -m benchmarks.check_query_plans --require-index-only
+"""
+import argparse
+import sys
+
+from sqlalchemy import text
+
+from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB
+from app.db.operations import Session, engine, build_base_query, build_latest_query, build_pivot_query
+from app.utils import get_timeframe
+
+MODELS = [AevoDB, BybitDB, GateioDB, HyperliquidDB]
+
+
+def plan_nodes(plan):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(session, query):
+    sql = query.statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+    return session.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()[0]['Plan']
+
+
+def check_queries(session, queries, require_index_only):
+    """
+    Explain named queries and report the ones whose plans don't use the indexes.
+
+    Returns:
+        list: (query name, problem) tuples, empty if every plan uses the indexes.
+    """
+    problems = []
+    for name, query in queries.items():
+        scans = [
+            (node['Node Type'], node.get('Index Name'))
+            for node in plan_nodes(explain(session, query))
+            # Every table read: the funding table partitions and the rollup tables
+            if 'Relation Name' in node
+        ]
+        described = ', '.join(f"{node} using {index}" if index else node for node, index in scans)
+        print(f"{name}: {described}")
+
+        if any(node == 'Seq Scan' for node, _ in scans):
+            problems.append((name, 'sequential scan'))
+        elif require_index_only and any(node != 'Index Only Scan' for node, _ in scans):
+            problems.append((name, 'not an index-only scan'))
+    return problems
+
+
+def build_queries(session, timeframe, keyword):
+    """Return the aggregation queries of every funding table, and the all-exchange pivot, by name."""
+    since, until = get_timeframe(timeframe)
+    queries = {}
+    for model_class in MODELS:
+        table = model_class.__tablename__
+        queries[f'{table} window sum'] = build_base_query(session, model_class, since, until, None)
+        queries[f'{table} window sum of one instrument'] = build_base_query(session, model_class, since, until, keyword)
+        queries[f'{table} latest rate'] = build_latest_query(session, model_class)
+    queries['all exchanges window sum'] = build_pivot_query(session, since, until)
+    return queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fail if a funding aggregation query falls back to a sequential scan.')
+    parser.add_argument('--timeframe', default='7d', help="Window of the sum queries, e.g. '1d', '7d', '1M'.")
+    parser.add_argument('--keyword', default='BTC', help='Instrument of the single-instrument window sum.')
+    parser.add_argument('--require-index-only', action='store_true',
+                        help='Also fail on index scans that visit the heap (run VACUUM first).')
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != 'postgresql':
+        print(f"Query plans can only be checked on PostgreSQL, not {engine.dialect.name}", file=sys.stderr)
+        return 2
+
+    with Session() as session:
+        # Without seq scans on the table the planner only falls back to one if no index applies
+        session.execute(text('SET LOCAL enable_seqscan = off'))
+        problems = check_queries(session, build_queries(session, args.timeframe, args.keyword), args.require_index_only)
+        session.rollback()
+
+    for name, problem in problems:
+        print(f"{name}: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import copy
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+HOUR_MS = 3600 * 1000
+EIGHT_HOURS_MS = 8 * HOUR_MS
+
+
+def load_fixture(fixtures_dir, name):
+    with open(os.path.join(fixtures_dir, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class MockExchangeServer:
+    """
+    Local HTTP server that replays exchange responses for the scraper benchmarks.
+
+    The fixtures are sample responses of each endpoint. The server keeps their shape and
+    values and generates one entry per funding period for whatever instrument and time range
+    is requested, so a benchmark can scrape any number of instruments over any interval.
+
+    Serves:
+        GET  /markets                          AEVO perpetual markets (ETag aware)
+        GET  /funding-history                  AEVO funding history, newest first
+        POST /info                             Hyperliquid meta and fundingHistory
+        GET  /v5/market/funding/history        Bybit funding history (ccxt)
+        GET  /api/v4/futures/usdt/funding_rate Gate.io funding rates (ccxt)
+    """
+
+    def __init__(self, instruments, latency_ms=0.0, jitter_ms=0.0, page_size=None,
+                 throttle_rate=0.0, retry_after='0', fixtures_dir=FIXTURES_DIR, seed=0):
+        """
+        Args:
+            instruments (dict): Listed instrument names per exchange key ('aevo', 'hyperliquid', 'bybit', 'gateio').
+            latency_ms (float): Delay added to every response.
+            jitter_ms (float): Random extra delay of up to this many milliseconds.
+            page_size (int, optional): Caps AEVO and Hyperliquid pages below the requested limit.
+            throttle_rate (float): Share of funding requests answered with 429.
+            retry_after (str): Retry-After header sent with the 429 responses.
+            fixtures_dir (str): Directory holding the sample responses.
+            seed (int): Seed of the latency jitter and 429 injection.
+        """
+        self.instruments = instruments
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.page_size = page_size
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.fixtures = {
+            'aevo_markets': load_fixture(fixtures_dir, 'aevo_markets.json'),
+            'aevo_funding': load_fixture(fixtures_dir, 'aevo_funding_history.json')['funding_history'],
+            'hyperliquid_meta': load_fixture(fixtures_dir, 'hyperliquid_meta.json'),
+            'hyperliquid_funding': load_fixture(fixtures_dir, 'hyperliquid_funding_history.json'),
+            'bybit_funding': load_fixture(fixtures_dir, 'bybit_funding_history.json'),
+            'gateio_funding': load_fixture(fixtures_dir, 'gateio_funding_rate.json'),
+        }
+        self.stats = {'requests': 0, 'throttled': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve on a background thread; port 0 picks a free port."""
+        server = self
+
+        class Handler(MockRequestHandler):
+            mock = server
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-exchange', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def delay(self):
+        with self._lock:
+            jitter = self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        if self.latency_ms or jitter:
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def should_throttle(self):
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            return self.random.random() < self.throttle_rate
+
+    def page_limit(self, requested, maximum):
+        limit = min(int(requested or maximum), maximum)
+        return min(limit, self.page_size) if self.page_size else limit
+
+    @staticmethod
+    def period_range(start, end, period):
+        """Funding timestamps aligned to the period within [start, end)."""
+        first = start + (-start % period)
+        return range(first, end, period)
+
+    def aevo_markets(self):
+        template = self.fixtures['aevo_markets'][0]
+        markets = []
+        for index, name in enumerate(self.instruments.get('aevo', [])):
+            market = copy.deepcopy(template)
+            market.update(instrument_id=str(index + 1), instrument_name=f'{name}-PERP', underlying_asset=name)
+            markets.append(market)
+        return markets
+
+    def aevo_funding_history(self, params):
+        instrument_name = params['instrument_name']
+        start_ms = int(params['start_time']) // 1_000_000
+        end_ms = int(params['end_time']) // 1_000_000
+        limit = self.page_limit(params.get('limit'), 1000)
+        samples = self.fixtures['aevo_funding']
+
+        history = []
+        for timestamp in reversed(self.period_range(start_ms, end_ms, HOUR_MS)):
+            sample = samples[(timestamp // HOUR_MS) % len(samples)]
+            history.append([instrument_name, str(timestamp * 1_000_000), sample[2], sample[3]])
+            if len(history) >= limit:
+                break
+        return {'funding_history': history}
+
+    def hyperliquid_meta(self):
+        template = self.fixtures['hyperliquid_meta']['universe'][0]
+        universe = []
+        for name in self.instruments.get('hyperliquid', []):
+            entry = copy.deepcopy(template)
+            entry['name'] = name
+            universe.append(entry)
+        return {'universe': universe}
+
+    def hyperliquid_funding_history(self, payload):
+        limit = self.page_limit(payload.get('limit'), 500)
+        samples = self.fixtures['hyperliquid_funding']
+
+        history = []
+        for timestamp in self.period_range(int(payload['startTime']), int(payload['endTime']) + 1, HOUR_MS):
+            sample = samples[(timestamp // HOUR_MS) % len(samples)]
+            history.append({**sample, 'coin': payload['coin'], 'time': timestamp})
+            if len(history) >= limit:
+                break
+        return history
+
+    def bybit_funding_history(self, params):
+        limit = min(int(params.get('limit', 200)), 200)
+        start = int(params.get('startTime', 0))
+        end = int(params.get('endTime', int(time.time() * 1000)))
+        response = copy.deepcopy(self.fixtures['bybit_funding'])
+        samples = response['result']['list']
+
+        entries = []
+        for timestamp in reversed(self.period_range(start, end + 1, EIGHT_HOURS_MS)):
+            sample = samples[(timestamp // EIGHT_HOURS_MS) % len(samples)]
+            entries.append({**sample, 'symbol': params['symbol'], 'fundingRateTimestamp': str(timestamp)})
+            if len(entries) >= limit:
+                break
+        response['result']['list'] = entries
+        response['time'] = int(time.time() * 1000)
+        return response
+
+    def gateio_funding_rate(self, params):
+        limit = min(int(params.get('limit', 100)), 1000)
+        now = int(time.time() * 1000)
+        samples = self.fixtures['gateio_funding']
+
+        # Gate.io returns the latest rates, newest first, with timestamps in seconds
+        entries = []
+        for timestamp in reversed(self.period_range(now - limit * EIGHT_HOURS_MS, now, EIGHT_HOURS_MS)):
+            sample = samples[(timestamp // EIGHT_HOURS_MS) % len(samples)]
+            entries.append({**sample, 't': timestamp // 1000})
+        return entries[:limit]
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def send_json(self, body, status=200, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def throttled(self, body=None):
+        """Answer with an injected 429 in the exchange's own error format; return True if so."""
+        if self.mock.should_throttle():
+            self.mock.count('throttled')
+            body = body or {'error': 'Too Many Requests'}
+            self.send_json(body, status=429, headers={'Retry-After': self.mock.retry_after})
+            return True
+        return False
+
+    def send_listing(self, body):
+        """Answer a listing with an ETag, or 304 if the client already has it."""
+        etag = '"%08x"' % zlib.crc32(json.dumps(body, sort_keys=True).encode('utf-8'))
+        if self.headers.get('If-None-Match') == etag:
+            self.mock.count('not_modified')
+            self.send_empty(304, headers={'ETag': etag})
+        else:
+            self.send_json(body, headers={'ETag': etag})
+
+    def do_GET(self):
+        self.mock.count('requests')
+        self.mock.delay()
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/markets':
+            self.send_listing(self.mock.aevo_markets())
+        elif url.path == '/funding-history':
+            if not self.throttled():
+                self.send_json(self.mock.aevo_funding_history(params))
+        elif url.path == '/v5/market/funding/history':
+            if not self.throttled({'retCode': 10006, 'retMsg': 'Too many visits!', 'result': {}, 'retExtInfo': {}, 'time': int(time.time() * 1000)}):
+                self.send_json(self.mock.bybit_funding_history(params))
+        elif url.path == '/api/v4/futures/usdt/funding_rate':
+            if not self.throttled({'label': 'TOO_MANY_REQUESTS', 'message': 'Request Rate limit Exceeded'}):
+                self.send_json(self.mock.gateio_funding_rate(params))
+        else:
+            self.send_json({'error': f'Unknown path {url.path}'}, status=404)
+
+    def do_POST(self):
+        self.mock.count('requests')
+        self.mock.delay()
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        if urlparse(self.path).path != '/info':
+            self.send_json({'error': f'Unknown path {self.path}'}, status=404)
+        elif payload.get('type') == 'meta':
+            self.send_listing(self.mock.hyperliquid_meta())
+        elif payload.get('type') == 'fundingHistory':
+            if not self.throttled():
+                self.send_json(self.mock.hyperliquid_funding_history(payload))
+        else:
+            self.send_json({'error': f"Unknown type {payload.get('type')}"}, status=400)
@@ -0,0 +1,271 @@
+"""
+Scraper benchmarks against a local mock exchange server.
+
+Runs each platform's run() end to end (instrument discovery, fetching, normalizing and
+writing) against benchmarks/mock_server.py and a scratch database, and reports rows/s,
+requests/s, p50/p99 request latency and peak RSS per exchange.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_benchmarks --instruments 50 --interval 7d --latency-ms 20
+    python -m benchmarks.run_benchmarks --save baseline.json
+    python -m benchmarks.run_benchmarks --baseline baseline.json --max-regression 0.2
+
+Every exchange runs in its own forked process so peak RSS is measured per scraper. The
+scratch database is emptied before each run; never point --database-url at real data.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+
+from benchmarks.mock_server import MockExchangeServer
+
+EXCHANGES = ['aevo', 'bybit', 'gateio', 'hyperliquid']
+
+INSTRUMENT_FILES = {
+    'aevo': 'data_const/avail_aevo.json',
+    'bybit': 'data_const/avail_bybit.json',
+    'gateio': 'data_const/avail_gate.json',
+    'hyperliquid': 'data_const/avail_hyper.json',
+}
+
+
+def load_instruments(count):
+    """Take the first count instruments of each exchange's bundled list."""
+    instruments = {}
+    for exchange, path in INSTRUMENT_FILES.items():
+        with open(path, 'r', encoding='utf-8') as f:
+            instruments[exchange] = json.load(f)[:count]
+    return instruments
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def ccxt_market(exchange_id, base):
+    """A unified ccxt USDT linear perpetual market, as set_markets expects it."""
+    market_id = f'{base}USDT' if exchange_id == 'bybit' else f'{base}_USDT'
+    return {
+        'id': market_id,
+        'symbol': f'{base}/USDT:USDT',
+        'base': base,
+        'quote': 'USDT',
+        'settle': 'USDT',
+        'baseId': base,
+        'quoteId': 'USDT',
+        'settleId': 'usdt' if exchange_id == 'gate' else 'USDT',
+        'type': 'swap',
+        'spot': False,
+        'margin': False,
+        'swap': True,
+        'future': False,
+        'option': False,
+        'active': True,
+        'contract': True,
+        'linear': True,
+        'inverse': False,
+        'contractSize': 1,
+        'precision': {'amount': 0.001, 'price': 0.01},
+        'limits': {'amount': {'min': None, 'max': None}, 'price': {'min': None, 'max': None}, 'cost': {'min': None, 'max': None}},
+        'info': {},
+    }
+
+
+def configure_environment(args, mock_url):
+    """Point the app at the mock server and the scratch database before it is imported."""
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['AEVO_API_URL'] = mock_url
+    os.environ['HYPERLIQUID_API_URL'] = mock_url
+    os.environ['BYBIT_API_URL'] = mock_url
+    os.environ['GATEIO_API_URL'] = mock_url
+    if args.rate_limit:
+        for exchange in EXCHANGES:
+            os.environ[f'{exchange.upper()}_RATE_LIMIT'] = str(args.rate_limit)
+
+
+def instrument_requests(latencies, statuses):
+    """Record the latency and status of every request made through requests, including ccxt's."""
+    import requests
+
+    original_send = requests.Session.send
+
+    def timed_send(session, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = original_send(session, request, **kwargs)
+        except Exception:
+            latencies.append(time.perf_counter() - start)
+            statuses.append(None)
+            raise
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+        return response
+
+    requests.Session.send = timed_send
+
+
+def run_exchange(exchange, args, instruments, results):
+    """Run one exchange's scraper in this (forked) process and report its numbers."""
+    latencies, statuses = [], []
+    instrument_requests(latencies, statuses)
+
+    from app.db.engine import init_db
+    from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB
+    from app.db.operations import delete_all_data
+    from app.exchange_registry import exchange_registry
+    from platforms.aevo import Aevo
+    from platforms.bybit import Bybit
+    from platforms.gateio import Gateio
+    from platforms.hyperliquid import Hyperliquid
+
+    scraper, model_class = {
+        'aevo': (Aevo, AevoDB),
+        'bybit': (Bybit, BybitDB),
+        'gateio': (Gateio, GateioDB),
+        'hyperliquid': (Hyperliquid, HyperliquidDB),
+    }[exchange]
+    init_db()
+    delete_all_data(model_class)
+
+    # ccxt markets come from the fixtures instead of a load_markets request
+    ccxt_id = {'bybit': 'bybit', 'gateio': 'gate'}.get(exchange)
+    if ccxt_id:
+        exchange_registry.set_markets(ccxt_id, [ccxt_market(ccxt_id, base) for base in instruments[exchange]])
+
+    start_time = time.perf_counter()
+    stats = scraper.run(args.interval) or {}
+    duration = time.perf_counter() - start_time
+
+    results.put({
+        'exchange': exchange,
+        'seconds': round(duration, 3),
+        'instruments': stats.get('instruments', 0),
+        'rows': stats.get('rows', 0),
+        'inserted': stats.get('inserted', 0),
+        'requests': len(latencies),
+        'throttled': sum(1 for status in statuses if status == 429),
+        'rows_per_second': round(stats.get('rows', 0) / duration, 1) if duration else 0.0,
+        'requests_per_second': round(len(latencies) / duration, 1) if duration else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def print_report(results):
+    columns = [
+        ('exchange', 'exchange', '{}'), ('seconds', 'time s', '{:.2f}'), ('rows', 'rows', '{}'),
+        ('rows_per_second', 'rows/s', '{:.1f}'), ('requests', 'requests', '{}'),
+        ('requests_per_second', 'req/s', '{:.1f}'), ('throttled', '429s', '{}'),
+        ('p50_ms', 'p50 ms', '{:.2f}'), ('p99_ms', 'p99 ms', '{:.2f}'), ('peak_rss_mb', 'peak RSS MB', '{:.1f}'),
+    ]
+    rows = [[header for _, header, _ in columns]]
+    for result in results:
+        rows.append([fmt.format(result[key]) for key, _, fmt in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def compare_with_baseline(results, baseline_path, max_regression):
+    """Return the exchanges whose rows/s dropped by more than max_regression against the baseline."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result['exchange']: result for result in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['exchange'])
+        if not previous or not previous['rows_per_second']:
+            continue
+        change = result['rows_per_second'] / previous['rows_per_second'] - 1
+        print(f"{result['exchange']}: {previous['rows_per_second']:.1f} -> {result['rows_per_second']:.1f} rows/s ({change:+.1%})")
+        if change < -max_regression:
+            regressions.append(result['exchange'])
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against a local mock exchange server.')
+    parser.add_argument('--exchanges', nargs='+', choices=EXCHANGES, default=EXCHANGES)
+    parser.add_argument('--instruments', type=int, default=50, help='Instruments listed per exchange.')
+    parser.add_argument('--interval', default='7d', help="History to scrape, e.g. '1d', '7d', '1M', '1y'.")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Delay added to every response.')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='Random extra delay of up to this much.')
+    parser.add_argument('--page-size', type=int, default=None, help='Cap AEVO/Hyperliquid pages below the requested limit.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of funding requests answered with 429.')
+    parser.add_argument('--retry-after', default='0', help='Retry-After header of the injected 429s.')
+    parser.add_argument('--rate-limit', type=float, default=1000.0,
+                        help='Requests/s allowed per exchange; 0 keeps the configured production limits.')
+    parser.add_argument('--database-url', default=None,
+                        help='Scratch database, emptied before each run. Defaults to a temporary SQLite file.')
+    parser.add_argument('--fixtures', default=None, help='Directory of sample responses to replay.')
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds before a single exchange run is abandoned.')
+    parser.add_argument('--save', default=None, help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', default=None, help='Compare rows/s with a saved results file.')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Fail when rows/s drops by more than this fraction against the baseline.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scratch_dir = None
+    if not args.database_url:
+        scratch_dir = tempfile.mkdtemp(prefix='fr-bench-')
+        args.database_url = f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}"
+
+    instruments = load_instruments(args.instruments)
+    server_options = dict(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, page_size=args.page_size,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after
+    )
+    if args.fixtures:
+        server_options['fixtures_dir'] = args.fixtures
+    server = MockExchangeServer(instruments, **server_options).start()
+    configure_environment(args, server.url)
+    print(f"Mock exchange server at {server.url}, database {args.database_url}")
+
+    context = multiprocessing.get_context('fork')
+    results = []
+    try:
+        for exchange in args.exchanges:
+            queue = context.Queue()
+            process = context.Process(target=run_exchange, args=(exchange, args, instruments, queue), name=f'bench-{exchange}')
+            process.start()
+            try:
+                results.append(queue.get(timeout=args.timeout))
+            except Empty:
+                print(f"{exchange}: benchmark failed or timed out", file=sys.stderr)
+                process.terminate()
+            process.join()
+    finally:
+        server.stop()
+
+    print()
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'options': vars(args), 'server': server.stats, 'results': results}, f, indent=4)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        if regressions:
+            print(f"Throughput regressed by more than {args.max_regression:.0%} for: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0 if len(results) == len(args.exchanges) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,7 @@ import logging
 from logging.config import fileConfig
 
 from flask import current_app
+from sqlalchemy import create_engine, pool
 
 from alembic import context
 
@@ -94,7 +95,9 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
-    connectable = get_engine()
+    # A connection of its own, outside the shared pool and its statement timeout, which long
+    # data migrations would run into
+    connectable = create_engine(get_engine().url, poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
         context.configure(
@@ -0,0 +1,47 @@
+"""unique (instrument_name, timestamp) on funding tables
+
+Revision ID: 3f1c2b7d9a10
+Revises: 6e513ffd35a3
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2b7d9a10'
+down_revision = '6e513ffd35a3'
+branch_labels = None
+depends_on = None
+
+FUNDING_TABLES = [
+    'funding_data_aevo',
+    'funding_data_bybit',
+    'funding_data_gateio',
+    'funding_data_hyperliquid',
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in FUNDING_TABLES:
+        if not inspector.has_table(table):
+            continue
+
+        # Drop duplicates left behind by overlapping scrape windows, keeping one row each
+        op.execute(f"""
+            DELETE FROM {table} a
+            USING {table} b
+            WHERE a.instrument_name = b.instrument_name
+              AND a.timestamp = b.timestamp
+              AND a.ctid > b.ctid
+        """)
+        op.create_unique_constraint(f'uq_{table}_instrument_timestamp', table, ['instrument_name', 'timestamp'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in FUNDING_TABLES:
+        if inspector.has_table(table):
+            op.drop_constraint(f'uq_{table}_instrument_timestamp', table, type_='unique')
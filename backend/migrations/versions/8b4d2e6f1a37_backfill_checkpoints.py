@@ -0,0 +1,37 @@
+"""backfill checkpoints table
+
+Revision ID: 8b4d2e6f1a37
+Revises: 3f1c2b7d9a10
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4d2e6f1a37'
+down_revision = '3f1c2b7d9a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('backfill_checkpoints'):
+        return  # Already created by Base.metadata.create_all
+
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('exchange', sa.String(), nullable=False),
+        sa.Column('instrument_name', sa.String(), nullable=False),
+        sa.Column('slice_start', sa.BigInteger(), nullable=False),
+        sa.Column('slice_end', sa.BigInteger(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('exchange', 'instrument_name', 'slice_start')
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,103 @@
+"""partition the funding tables by month on timestamp
+
+Revision ID: a6d2e9c3b184
+Revises: f4c1d8e2a7b5
+Create Date: 2026-10-18 16:45:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e9c3b184'
+down_revision = 'f4c1d8e2a7b5'
+branch_labels = None
+depends_on = None
+
+FUNDING_TABLES = [
+    'funding_data_aevo',
+    'funding_data_bybit',
+    'funding_data_gateio',
+    'funding_data_hyperliquid',
+]
+
+COLUMNS = 'instrument_name, timestamp, funding_rate, mark_price, created_at'
+
+TABLE_DEFINITION = """(
+    instrument_name varchar NOT NULL,
+    timestamp bigint NOT NULL,
+    funding_rate double precision NOT NULL,
+    mark_price double precision,
+    created_at timestamp without time zone DEFAULT now()
+)"""
+
+
+def month_bounds(year, month):
+    """The first millisecond (UTC) of the month and of the next one."""
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+def create_keys(table):
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (instrument_name, timestamp)")
+    op.execute(f"CREATE INDEX ix_{table}_timestamp ON {table} (timestamp) INCLUDE (instrument_name, funding_rate)")
+    op.execute(f"CREATE INDEX ix_{table}_instrument_latest ON {table} (instrument_name, timestamp DESC) INCLUDE (funding_rate)")
+
+
+def is_partitioned(bind, table):
+    return bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}).scalar() == 'p'
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    now = datetime.now(timezone.utc)
+
+    for table in FUNDING_TABLES:
+        if not inspector.has_table(table) or is_partitioned(bind, table):
+            continue  # Missing, or already created partitioned by Base.metadata.create_all
+
+        op.execute(f"CREATE TABLE {table}_new {TABLE_DEFINITION} PARTITION BY RANGE (timestamp)")
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table}_new DEFAULT")
+
+        # One partition for every month that has data, plus the current one
+        months = {(now.year, now.month)}
+        months.update(tuple(row) for row in bind.execute(sa.text(f"""
+            SELECT DISTINCT
+                CAST(EXTRACT(YEAR FROM month) AS integer),
+                CAST(EXTRACT(MONTH FROM month) AS integer)
+            FROM (
+                SELECT date_trunc('month', to_timestamp(timestamp / 1000.0) AT TIME ZONE 'UTC') AS month
+                FROM {table}
+            ) months
+        """)))
+        for year, month in sorted(months):
+            start, end = month_bounds(year, month)
+            op.execute(f"CREATE TABLE {table}_p{year:04d}{month:02d} PARTITION OF {table}_new FOR VALUES FROM ({start}) TO ({end})")
+
+        op.execute(f"INSERT INTO {table}_new ({COLUMNS}) SELECT {COLUMNS} FROM {table}")
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        # Keys are built after the copy, which is much faster than maintaining them row by row
+        create_keys(table)
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in FUNDING_TABLES:
+        if not inspector.has_table(table) or not is_partitioned(bind, table):
+            continue
+
+        op.execute(f"CREATE TABLE {table}_new {TABLE_DEFINITION}")
+        op.execute(f"INSERT INTO {table}_new ({COLUMNS}) SELECT {COLUMNS} FROM {table}")
+        # Dropping the partitioned table drops all of its partitions
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        create_keys(table)
@@ -0,0 +1,84 @@
+"""hourly and daily funding rollups
+
+Revision ID: b3f7a2d5e916
+Revises: a6d2e9c3b184
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7a2d5e916'
+down_revision = 'a6d2e9c3b184'
+branch_labels = None
+depends_on = None
+
+FUNDING_TABLES = {
+    'aevo': 'funding_data_aevo',
+    'bybit': 'funding_data_bybit',
+    'gateio': 'funding_data_gateio',
+    'hyperliquid': 'funding_data_hyperliquid',
+}
+
+# Rollup table and bucket length in milliseconds
+ROLLUP_TABLES = {
+    'funding_rollups_hourly': 3600 * 1000,
+    'funding_rollups_daily': 86400 * 1000,
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for rollup_table, bucket_ms in ROLLUP_TABLES.items():
+        # Base.metadata.create_all may already have created the table empty
+        if not inspector.has_table(rollup_table):
+            op.create_table(
+                rollup_table,
+                sa.Column('exchange', sa.String(), nullable=False),
+                sa.Column('instrument_name', sa.String(), nullable=False),
+                sa.Column('bucket_start', sa.BigInteger(), nullable=False),
+                sa.Column('funding_sum', sa.Double(), nullable=False),
+                sa.Column('funding_count', sa.Integer(), nullable=False),
+                sa.Column('funding_min', sa.Double(), nullable=False),
+                sa.Column('funding_max', sa.Double(), nullable=False),
+                sa.Column('last_rate', sa.Double(), nullable=False),
+                sa.Column('last_timestamp', sa.BigInteger(), nullable=False),
+                sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+                sa.PrimaryKeyConstraint('exchange', 'instrument_name', 'bucket_start')
+            )
+            op.create_index(
+                f'ix_{rollup_table}_exchange_bucket', rollup_table, ['exchange', 'bucket_start'],
+                postgresql_include=['instrument_name', 'funding_sum']
+            )
+
+        # Build the rollups of the history that is already stored
+        for exchange, table in FUNDING_TABLES.items():
+            if not inspector.has_table(table):
+                continue
+            op.execute(f"DELETE FROM {rollup_table} WHERE exchange = '{exchange}'")
+            op.execute(f"""
+                INSERT INTO {rollup_table} (
+                    exchange, instrument_name, bucket_start, funding_sum, funding_count,
+                    funding_min, funding_max, last_rate, last_timestamp
+                )
+                SELECT
+                    '{exchange}',
+                    instrument_name,
+                    timestamp - timestamp % {bucket_ms},
+                    sum(funding_rate),
+                    count(*),
+                    min(funding_rate),
+                    max(funding_rate),
+                    (array_agg(funding_rate ORDER BY timestamp DESC))[1],
+                    max(timestamp)
+                FROM {table}
+                GROUP BY instrument_name, timestamp - timestamp % {bucket_ms}
+            """)
+
+
+def downgrade():
+    for rollup_table in ROLLUP_TABLES:
+        op.drop_table(rollup_table)
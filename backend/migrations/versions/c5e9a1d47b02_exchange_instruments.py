@@ -0,0 +1,37 @@
+"""exchange instruments table
+
+Revision ID: c5e9a1d47b02
+Revises: 8b4d2e6f1a37
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9a1d47b02'
+down_revision = '8b4d2e6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('exchange_instruments'):
+        return  # Already created by Base.metadata.create_all
+
+    op.create_table(
+        'exchange_instruments',
+        sa.Column('exchange', sa.String(), nullable=False),
+        sa.Column('instrument_name', sa.String(), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_seen', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('delisted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('exchange', 'instrument_name')
+    )
+
+
+def downgrade():
+    op.drop_table('exchange_instruments')
@@ -0,0 +1,85 @@
+"""instruments dimension table for ticker listing and coin search
+
+Revision ID: c8e1f5a3d720
+Revises: b3f7a2d5e916
+Create Date: 2026-10-18 17:55:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import get_logo_url
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e1f5a3d720'
+down_revision = 'b3f7a2d5e916'
+branch_labels = None
+depends_on = None
+
+# Funding table and bit of each exchange, as in app.db.models.EXCHANGE_BITS
+FUNDING_TABLES = {
+    'funding_data_aevo': 1,
+    'funding_data_bybit': 2,
+    'funding_data_gateio': 4,
+    'funding_data_hyperliquid': 8,
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Base.metadata.create_all may already have created the table empty
+    if not inspector.has_table('instruments'):
+        op.create_table(
+            'instruments',
+            sa.Column('symbol', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('logo_url', sa.String(), nullable=True),
+            sa.Column('exchanges', sa.Integer(), nullable=False),
+            sa.Column('first_seen', sa.BigInteger(), nullable=False),
+            sa.Column('last_seen', sa.BigInteger(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('symbol')
+        )
+
+    # Coin search uses a trigram index where the extension can be installed
+    has_trigram = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if has_trigram:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_instruments_symbol_trgm ON instruments USING gin (symbol gin_trgm_ops)")
+
+    # Build the table from the history that is already stored
+    selects = [
+        f"SELECT instrument_name, {bit} AS exchange_bit, min(timestamp) AS first_seen, max(timestamp) AS last_seen "
+        f"FROM {table} GROUP BY instrument_name"
+        for table, bit in FUNDING_TABLES.items()
+        if inspector.has_table(table)
+    ]
+    if not selects:
+        return
+    rows = bind.execute(sa.text(f"""
+        SELECT instrument_name, bit_or(exchange_bit), min(first_seen), max(last_seen)
+        FROM ({' UNION ALL '.join(selects)}) instruments
+        GROUP BY instrument_name
+    """)).all()
+
+    op.execute("DELETE FROM instruments")
+    insert = sa.text("""
+        INSERT INTO instruments (symbol, name, logo_url, exchanges, first_seen, last_seen)
+        VALUES (:symbol, :name, :logo_url, :exchanges, :first_seen, :last_seen)
+    """)
+    values = []
+    for symbol, exchanges, first_seen, last_seen in rows:
+        logo_url, name = get_logo_url(symbol)
+        values.append({
+            'symbol': symbol, 'name': name, 'logo_url': logo_url,
+            'exchanges': exchanges, 'first_seen': first_seen, 'last_seen': last_seen,
+        })
+    if values:
+        bind.execute(insert, values)
+
+
+def downgrade():
+    op.drop_table('instruments')
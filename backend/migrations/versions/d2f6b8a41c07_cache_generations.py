@@ -0,0 +1,33 @@
+"""cache generation counters
+
+Revision ID: d2f6b8a41c07
+Revises: c8e1f5a3d720
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6b8a41c07'
+down_revision = 'c8e1f5a3d720'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Base.metadata.create_all may already have created the table
+    if sa.inspect(op.get_bind()).has_table('cache_generations'):
+        return
+    op.create_table(
+        'cache_generations',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_generations')
@@ -0,0 +1,73 @@
+"""compact funding schema: double precision rates, (instrument_name, timestamp) primary key
+
+Revision ID: d7a3f90b6c14
+Revises: c5e9a1d47b02
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f90b6c14'
+down_revision = 'c5e9a1d47b02'
+branch_labels = None
+depends_on = None
+
+FUNDING_TABLES = [
+    'funding_data_aevo',
+    'funding_data_bybit',
+    'funding_data_gateio',
+    'funding_data_hyperliquid',
+]
+
+# Plain decimal or scientific notation; anything else can't be cast and is dropped
+NUMBER_PATTERN = r"'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$'"
+
+
+def to_double(column):
+    return f"CASE WHEN {column} ~ {NUMBER_PATTERN} THEN {column}::double precision END"
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in FUNDING_TABLES:
+        if not inspector.has_table(table):
+            continue
+        if 'id' not in {column['name'] for column in inspector.get_columns(table)}:
+            continue  # Already created with the compact schema by Base.metadata.create_all
+
+        op.execute(f"DELETE FROM {table} WHERE funding_rate IS NULL OR funding_rate !~ {NUMBER_PATTERN}")
+
+        # A single ALTER TABLE rewrites the table once: the casts convert the stored strings and
+        # the dropped id/updated_at columns and their indexes go away with it
+        op.execute(f"""
+            ALTER TABLE {table}
+                DROP CONSTRAINT uq_{table}_instrument_timestamp,
+                DROP COLUMN id,
+                DROP COLUMN updated_at,
+                ALTER COLUMN funding_rate TYPE double precision USING {to_double('funding_rate')},
+                ALTER COLUMN mark_price TYPE double precision USING {to_double('mark_price')},
+                ADD CONSTRAINT {table}_pkey PRIMARY KEY (instrument_name, timestamp)
+        """)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in FUNDING_TABLES:
+        if not inspector.has_table(table):
+            continue
+
+        op.execute(f"""
+            ALTER TABLE {table}
+                DROP CONSTRAINT {table}_pkey,
+                ALTER COLUMN funding_rate TYPE varchar USING funding_rate::text,
+                ALTER COLUMN mark_price TYPE varchar USING mark_price::text,
+                ADD COLUMN id uuid NOT NULL DEFAULT gen_random_uuid(),
+                ADD COLUMN updated_at timestamp without time zone DEFAULT now(),
+                ADD CONSTRAINT {table}_pkey PRIMARY KEY (id),
+                ADD CONSTRAINT {table}_id_key UNIQUE (id),
+                ADD CONSTRAINT uq_{table}_instrument_timestamp UNIQUE (instrument_name, timestamp)
+        """)
+        op.alter_column(table, 'id', server_default=None)
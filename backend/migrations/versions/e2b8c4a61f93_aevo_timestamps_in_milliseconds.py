@@ -0,0 +1,85 @@
+"""store aevo timestamps in milliseconds like every other exchange
+
+Revision ID: e2b8c4a61f93
+Revises: d7a3f90b6c14
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8c4a61f93'
+down_revision = 'd7a3f90b6c14'
+branch_labels = None
+depends_on = None
+
+NS_PER_MS = 1_000_000
+
+# Epoch milliseconds stay below this until the year 5138, epoch nanoseconds are far above it,
+# so only rows still in nanoseconds are converted and the migration can be rerun safely
+NS_THRESHOLD = 100_000_000_000_000
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if inspector.has_table('funding_data_aevo'):
+        # Two points in the same millisecond would collide on the primary key; keep the earliest
+        op.execute(f"""
+            DELETE FROM funding_data_aevo a
+            USING funding_data_aevo b
+            WHERE a.instrument_name = b.instrument_name
+              AND a.timestamp / {NS_PER_MS} = b.timestamp / {NS_PER_MS}
+              AND a.timestamp > b.timestamp
+              AND b.timestamp >= {NS_THRESHOLD}
+        """)
+        # A point the scraper already stored again in milliseconds would collide too; keep that one
+        op.execute(f"""
+            DELETE FROM funding_data_aevo a
+            USING funding_data_aevo b
+            WHERE a.instrument_name = b.instrument_name
+              AND b.timestamp = a.timestamp / {NS_PER_MS}
+              AND a.timestamp >= {NS_THRESHOLD}
+        """)
+        op.execute(f"""
+            UPDATE funding_data_aevo
+            SET timestamp = timestamp / {NS_PER_MS}
+            WHERE timestamp >= {NS_THRESHOLD}
+        """)
+
+    if inspector.has_table('backfill_checkpoints'):
+        # Slice boundaries were nanosecond multiples of the slice length, so they stay grid aligned.
+        # A slice already checkpointed again in milliseconds keeps that checkpoint
+        op.execute(f"""
+            DELETE FROM backfill_checkpoints a
+            USING backfill_checkpoints b
+            WHERE a.exchange = 'aevo' AND b.exchange = 'aevo'
+              AND a.instrument_name = b.instrument_name
+              AND b.slice_start = a.slice_start / {NS_PER_MS}
+              AND a.slice_start >= {NS_THRESHOLD}
+        """)
+        op.execute(f"""
+            UPDATE backfill_checkpoints
+            SET slice_start = slice_start / {NS_PER_MS}, slice_end = slice_end / {NS_PER_MS}
+            WHERE exchange = 'aevo' AND slice_start >= {NS_THRESHOLD}
+        """)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if inspector.has_table('funding_data_aevo'):
+        op.execute(f"""
+            UPDATE funding_data_aevo
+            SET timestamp = timestamp * {NS_PER_MS}
+            WHERE timestamp < {NS_THRESHOLD}
+        """)
+
+    if inspector.has_table('backfill_checkpoints'):
+        op.execute(f"""
+            UPDATE backfill_checkpoints
+            SET slice_start = slice_start * {NS_PER_MS}, slice_end = slice_end * {NS_PER_MS}
+            WHERE exchange = 'aevo' AND slice_start < {NS_THRESHOLD}
+        """)
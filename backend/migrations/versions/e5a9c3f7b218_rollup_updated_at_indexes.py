@@ -0,0 +1,31 @@
+"""index the rollup tables on updated_at
+
+Revision ID: e5a9c3f7b218
+Revises: d2f6b8a41c07
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c3f7b218'
+down_revision = 'd2f6b8a41c07'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ['funding_rollups_hourly', 'funding_rollups_daily']
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in ROLLUP_TABLES:
+        # Base.metadata.create_all may already have created the index with the table
+        if f'ix_{table}_updated_at' not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+
+def downgrade():
+    for table in ROLLUP_TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
@@ -0,0 +1,57 @@
+"""covering indexes for the funding aggregation queries
+
+Revision ID: f4c1d8e2a7b5
+Revises: e2b8c4a61f93
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1d8e2a7b5'
+down_revision = 'e2b8c4a61f93'
+branch_labels = None
+depends_on = None
+
+FUNDING_TABLES = [
+    'funding_data_aevo',
+    'funding_data_bybit',
+    'funding_data_gateio',
+    'funding_data_hyperliquid',
+]
+
+
+def index_definitions(table):
+    return [
+        (f'ix_{table}_timestamp', ['timestamp'], ['instrument_name', 'funding_rate']),
+        (f'ix_{table}_instrument_latest', ['instrument_name', sa.text('timestamp DESC')], ['funding_rate']),
+    ]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # CONCURRENTLY keeps the scrapers writing while the indexes build, but can't run in a transaction
+    with op.get_context().autocommit_block():
+        for table in FUNDING_TABLES:
+            if not inspector.has_table(table):
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table)}
+            for name, columns, include in index_definitions(table):
+                if name not in existing:
+                    op.create_index(name, table, columns, postgresql_include=include, postgresql_concurrently=True)
+            # Index-only scans need an up to date visibility map
+            op.execute(f"VACUUM ANALYZE {table}")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    with op.get_context().autocommit_block():
+        for table in FUNDING_TABLES:
+            if not inspector.has_table(table):
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table)}
+            for name, _, _ in index_definitions(table):
+                if name in existing:
+                    op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -1,63 +1,49 @@
+import asyncio
+import aiohttp
 import requests
 import time
 import json
 from fake_useragent import UserAgent  # For rotating user agents
 from app.db.models import AevoDB
-from app.utils import get_timestamp_for_interval
+from app.utils import get_timeframe, resume_since
 from app.logger import logger
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from app.db.operations import save_to_database, delete_all_data, count_rows
-import gc
+from app.instrument_registry import instrument_registry, conditional_headers, response_validators
+from app.db.operations import delete_all_data, count_rows, get_latest_timestamps
 from app.config import Config
+from platforms.pipeline import run_pipeline
+from platforms.rate_limiter import THROTTLED_STATUSES, FetchError, get_rate_limiter
+
+# The AEVO API speaks nanoseconds; everything stored and passed around is in milliseconds
+NS_PER_MS = 1_000_000
+
 class Aevo:
     @staticmethod
     def run(interval='1h'):
         """
         Run the AEVO scraper process for the given interval.
-
-        This method fetches instrument names, scrapes data for those instruments using threading, processes the data, and saves it to the database.
+        Pages are streamed from the fetch threads straight into the database writer, so memory
+        stays flat regardless of how many instruments are scraped or how long the window is.
+        Only points newer than the latest stored timestamp of each instrument are requested.
 
         Args:
             interval (str): The interval at which to run the scraper, e.g., '1h', '1d'.
 
         Returns:
-            None
+            dict: Instrument, page, row, inserted and skipped counts of the run.
         """
         aevo_assets = Aevo.fetch_aevo_instrument_names()
         logger.info(f"[AEVO] Running scraper for {interval} interval with assets: {len(aevo_assets)}")
 
-        # Start timing
-        start_time = time.time()
-
-        # Process assets in smaller batches to avoid memory overload
-        batch_size = Config.BATCH_SIZE
-        batch_iteration = 0
-        for i in range(0, len(aevo_assets), batch_size):
-            batch_assets = aevo_assets[i:i + batch_size]
-            aevo_data = Aevo.run_with_threading(Aevo.fetch_aevo_data, interval, batch_assets)
-
-            # Process data to match the expected format
-            processed_aevo_data = Aevo.process_aevo_data(aevo_data)
-
-            # Save processed data to the database
-            save_status = save_to_database(processed_aevo_data, AevoDB)
-            batch_iteration += 1
-            if save_status == True:
-                logger.info(f"[AEVO][{batch_iteration}] Data batch saved successfully.")
-            else:
-                logger.error(f"[AEVO][{batch_iteration}] {save_status}")
-
-            # Free memory after processing each batch
-            gc.collect()
+        # High-water mark per instrument so we only request new points
+        latest_timestamps = get_latest_timestamps(AevoDB)
+        fetch_windows = Aevo.get_fetch_windows(interval, aevo_assets, latest_timestamps)
 
-        # End timing
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.info(f"[AEVO] Data scraping completed in {duration:.2f} seconds.")
+        stats = run_pipeline('AEVO', AevoDB, Aevo.process_aevo_data, fetch_windows, Aevo.fetch_aevo_pages)
+        return stats
 
     def process_aevo_data(data):
         """
-        Process raw AEVO data into a structured format.
+        Process raw AEVO data into a structured format, with timestamps in milliseconds.
 
         Args:
             data (list): A list of raw data entries fetched from AEVO.
@@ -70,7 +56,7 @@ class Aevo:
             coin_symbol = entry[0].replace('-PERP', '')
             processed_entry = [
                 coin_symbol,
-                int(entry[1]),
+                int(entry[1]) // NS_PER_MS,
                 entry[2],
                 entry[3]
             ]
@@ -104,130 +90,284 @@ class Aevo:
 
     def fetch_aevo_instrument_names():
         """
-        Fetch instrument names from AEVO API.
+        Fetch instrument names from AEVO.
 
-        This method retrieves the instrument names available in AEVO by making an API call.
+        The list comes from the instrument registry, which refreshes it from the AEVO API
+        on a schedule and drops delisted instruments.
 
         Returns:
-            list: A list of instrument names fetched from the AEVO API.
+            list: A list of instrument names listed on AEVO.
         """
-        # url = "https://api.aevo.xyz/assets"
-        # headers = {
-        #     'accept': 'application/json'
-        # }
+        return instrument_registry.get('aevo', Aevo.discover_instrument_names, "data_const/avail_aevo.json")
 
-        try:
-            # response = requests.get(url, headers=headers)
-            # response.raise_for_status()
-            # instrument_names = response.json()
+    @staticmethod
+    def discover_instrument_names(validators=None):
+        """
+        Fetch the active perpetual markets from the AEVO API with a conditional request.
 
-            with open("data_const/avail_aevo.json", 'r', encoding='utf-8') as f:
-                instrument_names = json.load(f)
-            return instrument_names
+        Args:
+            validators (dict, optional): The ETag / Last-Modified of the previous response.
 
-        except requests.RequestException as e:
-            logger.info(f"[AEVO]An error occurred while fetching instrument names: {e}")
-            return []
+        Returns:
+            tuple: The underlying assets of the active perpetuals (None if not modified) and the new validators.
+        """
+        url = f'{Config.AEVO_API_URL}/markets'
+        headers = {
+            'accept': 'application/json',
+            **conditional_headers(validators)
+        }
+        rate_limiter = get_rate_limiter('aevo')
+
+        rate_limiter.acquire()
+        status = None
+        try:
+            response = requests.get(url, params={'instrument_type': 'PERPETUAL'}, headers=headers, timeout=30)
+            status = response.status_code
+            if status == 304:
+                return None, validators
+            response.raise_for_status()
+            markets = response.json()
+        finally:
+            rate_limiter.release(status)
+
+        instrument_names = [market['underlying_asset'] for market in markets if market.get('is_active', True)]
+        return instrument_names, response_validators(response)
 
+    @staticmethod
     def fetch_aevo_data(instrument_name, start_time, end_time, limit=50):
+        """
+        Fetch funding rate history data from AEVO for a given instrument as a single list.
+
+        Args:
+            instrument_name (str): The name of the instrument to fetch funding data for.
+            start_time (int): The start timestamp for fetching data, in milliseconds.
+            end_time (int): The end timestamp for fetching data, in milliseconds.
+            limit (int, optional): The maximum number of data points to retrieve per request. Defaults to 50.
+
+        Returns:
+            list: A list of funding history data fetched from the AEVO API.
+        """
+        return [entry for page in Aevo.fetch_aevo_pages(instrument_name, start_time, end_time, limit) for entry in page]
+
+    @staticmethod
+    def fetch_aevo_pages(instrument_name, start_time, end_time, limit=50):
         """
         Fetch funding rate history data from AEVO for a given instrument with rotating User-Agent in every loop.
 
         This method fetches funding rate history for a given instrument by making an API call.
         It retries up to a set limit in case of 429 (Too Many Requests) or 503 (Service Unavailable) errors,
-        and rotates the User-Agent for every request to mimic different devices.
+        paces every request through the shared AEVO rate limiter, and rotates the User-Agent for every
+        request to mimic different devices.
+
+        AEVO returns the newest entries first, so the window is fetched in slices of
+        Config.AEVO_SLICE_HOURS, oldest slice first, and the pages of a slice walk backwards from
+        its end. A slice is held until all of its pages have arrived and then yielded as a single
+        page, oldest first. When a slice fails, only the older slices before it have been yielded:
+        the newest stored timestamp stays below the missing range, so resuming fetches it again
+        instead of leaving a gap, and at most one slice per instrument is held in memory.
 
         Args:
             instrument_name (str): The name of the instrument to fetch funding data for.
-            start_time (int): The start timestamp for fetching data.
-            end_time (int): The end timestamp for fetching data.
+            start_time (int): The start timestamp for fetching data, in milliseconds.
+            end_time (int): The end timestamp for fetching data, in milliseconds.
             limit (int, optional): The maximum number of data points to retrieve per request. Defaults to 50.
 
-        Returns:
-            list: A list of funding history data fetched from the AEVO API.
+        Yields:
+            list: The raw funding history entries of one slice (nanosecond timestamps), oldest first.
+
+        Raises:
+            FetchError: If a page still fails after all retries.
         """
-        url = 'https://api.aevo.xyz/funding-history'
+        url = f'{Config.AEVO_API_URL}/funding-history'
+        rate_limiter = get_rate_limiter('aevo')
         session = requests.Session()  # Reuse session for all requests
         ua = UserAgent()  # Rotate User-Agent
-        all_data = []
-        current_end_time = end_time
-
-        while current_end_time > start_time:
-            headers = {
-                'accept': 'application/json',
-                'User-Agent': ua.random  # Rotate User-Agent in each request
-            }
-            params = {
-                'instrument_name': f"{instrument_name.upper()}-PERP",
-                'start_time': str(int(start_time)),
-                'end_time': str(int(current_end_time)),
-                'limit': limit
-            }
-
-            retries = 0
-            max_retries = 5  # Retry attempts for 429/503 errors
-            backoff_factor = 1.5  # Exponential backoff factor
-
-            while retries < max_retries:
-                try:
-                    response = session.get(url, params=params, headers=headers)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    if response.status_code == 429:  # Handle rate limiting (429)
-                        retry_after = response.headers.get('Retry-After')
-                        wait_time = int(retry_after) if retry_after else backoff_factor ** retries
-                        time.sleep(wait_time)
-                        retries += 1
-                        continue
 
-                    elif response.status_code == 503:  # Handle server issues (503)
+        # Oldest slice first, so a failing slice never leaves a gap below the stored ones
+        for slice_start, slice_end in Aevo.get_window_slices(start_time, end_time):
+            current_start_time = int(slice_start) * NS_PER_MS
+            current_end_time = int(slice_end) * NS_PER_MS
+            pages = []
+
+            while current_end_time > current_start_time:
+                headers = {
+                    'accept': 'application/json',
+                    'User-Agent': ua.random  # Rotate User-Agent in each request
+                }
+                params = {
+                    'instrument_name': f"{instrument_name.upper()}-PERP",
+                    'start_time': str(current_start_time),
+                    'end_time': str(current_end_time),
+                    'limit': limit
+                }
+
+                page = None
+                retries = 0
+                max_retries = 5  # Retry attempts for 429/503 and network errors
+                backoff_factor = 1.5  # Exponential backoff factor for network errors
+
+                while retries < max_retries:
+                    rate_limiter.acquire()
+                    status, retry_after, wait_time = None, None, 0
+                    try:
+                        response = session.get(url, params=params, headers=headers, timeout=Config.REQUEST_TIMEOUT)
+                        status = response.status_code
+
+                        # Rate limiting (429) and server issues (503): the shared limiter backs off before the next attempt
+                        if status in THROTTLED_STATUSES:
+                            retry_after = response.headers.get('Retry-After')
+                            retries += 1
+                            continue
+
+                        response.raise_for_status()
+                        page = response.json()['funding_history']
+                        break  # Exit retry loop
+
+                    except requests.RequestException as e:
                         retries += 1
                         wait_time = backoff_factor ** retries
+                    finally:
+                        rate_limiter.release(status, retry_after)
+                    # Back off only after the concurrency slot is given back
+                    if wait_time:
                         time.sleep(wait_time)
-                        continue
 
-                    all_data.extend(data['funding_history'])
+                if page is None:
+                    raise FetchError(f"Giving up on {instrument_name} after {max_retries} attempts")
+
+                pages.append(page)
+
+                if len(page) < limit:
+                    break
+
+                current_end_time = min(int(item[1]) for item in page)
+
+            window = [entry for page in reversed(pages) for entry in reversed(page)]
+            if window:
+                yield window
+
+    @staticmethod
+    async def fetch_aevo_data_async(session, instrument_name, start_time, end_time, limit=50):
+        """
+        Fetch funding rate history from AEVO on a shared aiohttp session, yielding one slice of the window at a time.
+
+        This is the async counterpart of fetch_aevo_data. The session's connection pool is reused
+        for every request, and requests are paced by the same shared rate limiter as the sync path.
+
+        Like fetch_aevo_pages, the window is fetched in slices of Config.AEVO_SLICE_HOURS, oldest
+        first, and each slice is yielded once all of its pages have arrived.
+
+        Args:
+            session (aiohttp.ClientSession): The shared session for AEVO requests.
+            instrument_name (str): The name of the instrument to fetch funding data for.
+            start_time (int): The start timestamp for fetching data, in milliseconds.
+            end_time (int): The end timestamp for fetching data, in milliseconds.
+            limit (int, optional): The maximum number of data points to retrieve per request. Defaults to 50.
+
+        Yields:
+            list: The raw funding history entries of one slice (nanosecond timestamps), oldest first.
+
+        Raises:
+            FetchError: If a page still fails after all retries.
+        """
+        url = f'{Config.AEVO_API_URL}/funding-history'
+        rate_limiter = get_rate_limiter('aevo')
+        max_retries = 5  # Retry attempts for 429/503 and network errors
+        backoff_factor = 1.5  # Exponential backoff factor for network errors
+
+        # Oldest slice first, so a failing slice never leaves a gap below the stored ones
+        for slice_start, slice_end in Aevo.get_window_slices(start_time, end_time):
+            current_start_time = int(slice_start) * NS_PER_MS
+            current_end_time = int(slice_end) * NS_PER_MS
+            pages = []
+
+            while current_end_time > current_start_time:
+                params = {
+                    'instrument_name': f"{instrument_name.upper()}-PERP",
+                    'start_time': str(current_start_time),
+                    'end_time': str(current_end_time),
+                    'limit': str(limit)
+                }
+
+                page = None
+                for retries in range(1, max_retries + 1):
+                    await rate_limiter.acquire_async()
+                    status, retry_after, wait_time = None, None, 0
+                    try:
+                        async with session.get(url, params=params) as response:
+                            status = response.status
+                            if status in THROTTLED_STATUSES:
+                                retry_after = response.headers.get('Retry-After')
+                                continue
+                            response.raise_for_status()
+                            data = await response.json()
+                            page = data['funding_history']
+                            break
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        wait_time = backoff_factor ** retries
+                    finally:
+                        rate_limiter.release(status, retry_after)
+                    # Back off only after the concurrency slot is given back
+                    if wait_time:
+                        await asyncio.sleep(wait_time)
+
+                if page is None:
+                    raise FetchError(f"Giving up on {instrument_name} after {max_retries} attempts")
 
-                    if len(data['funding_history']) < limit:
-                        return all_data
+                pages.append(page)
 
-                    current_end_time = min(int(item[1]) for item in data['funding_history'])
-                    break  # Exit retry loop
+                if len(page) < limit:
+                    break
 
-                except requests.RequestException as e:
-                    retries += 1
-                    wait_time = backoff_factor ** retries
-                    time.sleep(wait_time)
+                current_end_time = min(int(item[1]) for item in page)
 
-        return all_data
+            window = [entry for page in reversed(pages) for entry in reversed(page)]
+            if window:
+                yield window
 
-    def run_with_threading(fetch_data_function, interval, instrument_names):
+    @staticmethod
+    def get_fetch_windows(interval, instrument_names, latest_timestamps=None):
         """
-        Run data fetching for multiple instruments concurrently using threading.
+        Work out the time range that is still missing for every instrument.
 
-        This method fetches data for multiple instruments in parallel using threads.
+        Each instrument resumes right after its latest stored point, and instruments
+        that are already up to date are left out.
 
         Args:
-            fetch_data_function (function): The function used to fetch data.
             interval (str): The interval for the data fetch operation.
             instrument_names (list): A list of instrument names to fetch data for.
+            latest_timestamps (dict, optional): Latest stored timestamp per instrument name.
 
         Returns:
-            list: Combined results from all threads.
+            list: (instrument_name, start_time, end_time) tuples for the instruments that need fetching.
         """
-        start_time, end_time = get_timestamp_for_interval(interval)
+        start_time, end_time = get_timeframe(interval)
+        latest_timestamps = latest_timestamps or {}
 
-        results = []
-        max_workers = min(10, len(instrument_names))  # Dynamically adjust the number of workers
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(fetch_data_function, instrument_name, start_time, end_time)
-                for instrument_name in instrument_names
-            ]
-            for future in as_completed(futures):
-                data = future.result()
-                if data:
-                    results.extend(data)
+        fetch_windows = []
+        for instrument_name in instrument_names:
+            instrument_start = resume_since(start_time, latest_timestamps.get(instrument_name.upper()))
+            if instrument_start < end_time:
+                fetch_windows.append((instrument_name, instrument_start, end_time))
+        return fetch_windows
 
-        return results
+    @staticmethod
+    def get_window_slices(start_time, end_time):
+        """
+        Split a fetch window into consecutive slices of Config.AEVO_SLICE_HOURS, oldest first.
+
+        Args:
+            start_time (int): The start of the window in milliseconds.
+            end_time (int): The end of the window in milliseconds.
+
+        Returns:
+            list: (slice_start, slice_end) tuples in milliseconds; the last one ends at end_time.
+        """
+        slice_length = Config.AEVO_SLICE_HOURS * 3600 * 1000
+        slices = []
+        slice_start = int(start_time)
+        while slice_start < end_time:
+            slice_end = min(slice_start + slice_length, int(end_time))
+            slices.append((slice_start, slice_end))
+            slice_start = slice_end
+        return slices
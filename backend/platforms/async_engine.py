@@ -0,0 +1,225 @@
+import asyncio
+import time
+import aiohttp
+import ccxt.async_support as ccxt_async
+from fake_useragent import UserAgent
+from app.config import Config
+from app.exchange_registry import exchange_registry, apply_api_url
+from app.logger import logger
+from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB
+from app.db.operations import get_latest_timestamps
+from platforms.aevo import Aevo
+from platforms.bybit import Bybit
+from platforms.gateio import Gateio
+from platforms.hyperliquid import Hyperliquid
+from platforms.pipeline import ChunkWriter
+
+
+class AsyncEngine:
+    @staticmethod
+    def run(interval='1h'):
+        """
+        Run all four scrapers on a single asyncio event loop.
+
+        Every exchange keeps one keep-alive connection pool for the whole run and fetches
+        all of its instruments concurrently, up to Config.ASYNC_CONCURRENCY requests in flight.
+
+        Args:
+            interval (str): The interval at which to run the scrapers, e.g., '1h', '1d'.
+
+        Returns:
+            None
+        """
+        asyncio.run(AsyncEngine.run_all(interval))
+
+    @staticmethod
+    async def run_all(interval):
+        """
+        Scrape every exchange concurrently and log the ones that failed.
+
+        Args:
+            interval (str): The interval at which to run the scrapers.
+
+        Returns:
+            None
+        """
+        scrapers = {
+            'AEVO': AsyncEngine.run_aevo,
+            'BYBIT': AsyncEngine.run_bybit,
+            'HYPER': AsyncEngine.run_hyperliquid,
+            'GATE': AsyncEngine.run_gateio,
+        }
+        results = await asyncio.gather(*(run(interval) for run in scrapers.values()), return_exceptions=True)
+        for tag, result in zip(scrapers, results):
+            if isinstance(result, Exception):
+                logger.error(f"[{tag}] Async scraper failed: {result}")
+
+    @staticmethod
+    def http_session(headers):
+        """
+        Create the keep-alive HTTP session shared by every request to one exchange.
+
+        Args:
+            headers (dict): Default headers sent with every request.
+
+        Returns:
+            aiohttp.ClientSession: A session whose pool holds up to Config.ASYNC_CONCURRENCY connections.
+        """
+        connector = aiohttp.TCPConnector(limit=Config.ASYNC_CONCURRENCY, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=Config.ASYNC_REQUEST_TIMEOUT)
+        headers = {**headers, 'User-Agent': UserAgent().random}
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+
+    @staticmethod
+    async def ccxt_exchange(exchange_id):
+        """
+        Create the async ccxt exchange shared by one run, reusing the registry's cached markets.
+
+        Args:
+            exchange_id (str): The ccxt exchange id, e.g. 'bybit' or 'gate'.
+
+        Returns:
+            ccxt.async_support.Exchange: An exchange with its markets already set.
+        """
+        client = await asyncio.to_thread(exchange_registry.get, exchange_id)
+        exchange = apply_api_url(getattr(ccxt_async, exchange_id)({'enableRateLimit': True}), exchange_id)
+        exchange.set_markets(client.markets, client.currencies)
+        return exchange
+
+    @staticmethod
+    async def run_aevo(interval):
+        """Scrape AEVO for the given interval on one shared connection pool."""
+        instrument_names = Aevo.fetch_aevo_instrument_names()
+        latest_timestamps = await asyncio.to_thread(get_latest_timestamps, AevoDB)
+        fetch_windows = Aevo.get_fetch_windows(interval, instrument_names, latest_timestamps)
+
+        async with AsyncEngine.http_session({'accept': 'application/json'}) as session:
+            await AsyncEngine.scrape(
+                'AEVO', AevoDB, fetch_windows,
+                lambda name, start, end: Aevo.fetch_aevo_data_async(session, name, start, end),
+                Aevo.process_aevo_data
+            )
+
+    @staticmethod
+    async def run_hyperliquid(interval):
+        """Scrape Hyperliquid for the given interval on one shared connection pool."""
+        instrument_names = Hyperliquid.fetch_hyperliquid_instrument_name()
+        latest_timestamps = await asyncio.to_thread(get_latest_timestamps, HyperliquidDB)
+        fetch_windows = Hyperliquid.get_fetch_windows(interval, instrument_names, latest_timestamps)
+
+        async with AsyncEngine.http_session({'Content-Type': 'application/json'}) as session:
+            await AsyncEngine.scrape(
+                'HYPER', HyperliquidDB, fetch_windows,
+                lambda name, start, end: Hyperliquid.fetch_hyperliquid_data_async(session, name, start, end),
+                Hyperliquid.process_hyperliquid_data
+            )
+
+    @staticmethod
+    async def run_bybit(interval):
+        """Scrape Bybit for the given interval on one shared connection pool."""
+        instrument_names = Bybit.fetch_bybit_instrument_names()
+        latest_timestamps = await asyncio.to_thread(get_latest_timestamps, BybitDB)
+        fetch_windows = Bybit.get_fetch_windows(interval, instrument_names, latest_timestamps)
+
+        exchange = await AsyncEngine.ccxt_exchange('bybit')
+        try:
+            await AsyncEngine.scrape(
+                'BYBIT', BybitDB, fetch_windows,
+                lambda name, since, until: Bybit.fetch_bybit_data_async(exchange, name, since),
+                Bybit.process_bybit_data
+            )
+        finally:
+            await exchange.close()
+
+    @staticmethod
+    async def run_gateio(interval):
+        """Scrape Gate.io for the given interval on one shared connection pool."""
+        instrument_names = Gateio.fetch_gateio_instrument_names()
+        latest_timestamps = await asyncio.to_thread(get_latest_timestamps, GateioDB)
+        fetch_windows = Gateio.get_fetch_windows(interval, instrument_names, latest_timestamps)
+
+        exchange = await AsyncEngine.ccxt_exchange('gate')
+        try:
+            await AsyncEngine.scrape(
+                'GATE', GateioDB, fetch_windows,
+                lambda name, since, until: Gateio.fetch_gateio_data_async(exchange, name, since),
+                Gateio.process_gateio_data
+            )
+        finally:
+            await exchange.close()
+
+    @staticmethod
+    async def scrape(tag, model_class, fetch_windows, fetch_pages, process_data):
+        """
+        Fetch every instrument concurrently and stream the pages into the database writer.
+
+        Args:
+            tag (str): The log tag of the exchange, e.g. 'AEVO'.
+            model_class: The funding table model to write into.
+            fetch_windows (list): (instrument_name, start, end) tuples from get_fetch_windows.
+            fetch_pages (function): Returns an async generator of raw pages for one window.
+            process_data (function): Converts a raw page into database rows.
+
+        Returns:
+            None
+        """
+        logger.info(f"[{tag}] Running async scraper with assets: {len(fetch_windows)}")
+        start_time = time.time()
+
+        queue = asyncio.Queue(maxsize=Config.ASYNC_QUEUE_SIZE)
+        semaphore = asyncio.Semaphore(Config.ASYNC_CONCURRENCY)
+        writer = asyncio.create_task(AsyncEngine.write_pages(tag, model_class, queue))
+
+        failed = 0
+
+        async def fetch_instrument(instrument_name, since, until):
+            nonlocal failed
+            async with semaphore:
+                try:
+                    async for page in fetch_pages(instrument_name, since, until):
+                        await queue.put(process_data(page))
+                except Exception as e:
+                    # One instrument failing must not cancel the others
+                    failed += 1
+                    logger.error(f"[{tag}] Error fetching data for {instrument_name}: {e}")
+
+        try:
+            await asyncio.gather(*(fetch_instrument(*window) for window in fetch_windows))
+        finally:
+            # Tell the writer no more pages are coming and wait for the last flush
+            await queue.put(None)
+            inserted, skipped, failed_rows = await writer
+
+        duration = time.time() - start_time
+        logger.info(f"[{tag}] Async scraping completed in {duration:.2f} seconds: {inserted} inserted, {skipped} skipped, {failed_rows} rows failed, {failed} instruments failed.")
+
+    @staticmethod
+    async def write_pages(tag, model_class, queue):
+        """
+        Consume processed pages from the queue and save them in Config.INSERT_CHUNK_SIZE chunks.
+
+        Args:
+            tag (str): The log tag of the exchange.
+            model_class: The funding table model to write into.
+            queue (asyncio.Queue): Pages of rows, terminated by None.
+
+        Returns:
+            tuple: Total inserted, skipped and failed row counts.
+        """
+        writer = ChunkWriter(tag, model_class)
+        buffer = []
+
+        while True:
+            rows = await queue.get()
+            if rows is None:
+                break
+            buffer.extend(rows)
+            if len(buffer) >= Config.INSERT_CHUNK_SIZE:
+                # Database writes, and the backoff between their retries, are blocking, so they run off the event loop
+                await asyncio.to_thread(writer.save, buffer)
+                buffer = []
+
+        if buffer:
+            await asyncio.to_thread(writer.save, buffer)
+
+        return writer.inserted, writer.skipped, writer.failed_rows
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.config import Config
+from app.logger import logger
+from app.db.operations import SaveResult, save_to_database, get_completed_slices, mark_slice_completed
+from platforms.sources import SCRAPER_SOURCES, shard_of
+
+# One instrument's time range; closed slices end in the past and can be checkpointed
+BackfillSlice = namedtuple('BackfillSlice', ['instrument_name', 'start', 'end', 'closed'])
+
+
+class BackfillProgress:
+    """Thread-safe slice and row counters of one exchange's backfill, logged periodically."""
+
+    def __init__(self, tag, total_slices, skipped_slices):
+        self.tag = tag
+        self.total_slices = total_slices
+        self.skipped_slices = skipped_slices
+        self.completed = 0
+        self.failed = 0
+        self.rows = 0
+        self.inserted = 0
+        self.start_time = time.time()
+        self.last_report = self.start_time
+        self._lock = threading.Lock()
+
+    def record(self, rows, inserted):
+        with self._lock:
+            self.completed += 1
+            self.rows += rows
+            self.inserted += inserted
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def report(self, force=False):
+        """Log progress and throughput if Config.BACKFILL_REPORT_SECONDS have passed since the last report."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self.last_report < Config.BACKFILL_REPORT_SECONDS:
+                return
+            self.last_report = now
+            done = self.completed + self.failed
+            elapsed = max(now - self.start_time, 1e-9)
+            percentage = 100 * done / self.total_slices if self.total_slices else 100.0
+            eta = (self.total_slices - done) * elapsed / done if done else 0
+            logger.info(
+                f"[{self.tag}] Backfill {done}/{self.total_slices} slices ({percentage:.1f}%), "
+                f"{self.failed} failed, {self.skipped_slices} already done, {self.rows} rows, "
+                f"{self.rows / elapsed:.1f} rows/s, {done / elapsed:.2f} slices/s, ETA {eta:.0f}s"
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'slices': self.total_slices,
+                'completed': self.completed,
+                'failed': self.failed,
+                'skipped': self.skipped_slices,
+                'rows': self.rows,
+                'inserted': self.inserted,
+                'seconds': round(time.time() - self.start_time, 2),
+            }
+
+
+class Backfill:
+    @staticmethod
+    def run_all(interval='1y'):
+        """
+        Backfill every exchange at the same time; each exchange has its own rate budget.
+
+        Args:
+            interval (str): How much history to load, e.g. '1y'.
+
+        Returns:
+            dict: Backfill stats per exchange.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(SCRAPER_SOURCES)) as executor:
+            futures = {executor.submit(Backfill.run, exchange, interval): exchange for exchange in SCRAPER_SOURCES}
+            for future in as_completed(futures):
+                exchange = futures[future]
+                try:
+                    results[exchange] = future.result()
+                except Exception as e:
+                    logger.error(f"[{SCRAPER_SOURCES[exchange].tag}] Backfill failed: {e}")
+        return results
+
+    @staticmethod
+    def run(exchange, interval='1y', shard_index=0, shard_count=1):
+        """
+        Load an exchange's history in per-instrument time slices, skipping the ones already done.
+
+        Slices are aligned to a fixed Config.BACKFILL_SLICE_DAYS grid, so a restarted backfill
+        finds the same slices and resumes after the last completed one. Several processes can
+        share one backfill by giving each a different shard_index; instruments are split
+        between shards by a stable hash of their name.
+
+        Args:
+            exchange (str): The exchange key, one of SCRAPER_SOURCES.
+            interval (str): How much history to load, e.g. '1y'.
+            shard_index (int, optional): The shard this process handles. Defaults to 0.
+            shard_count (int, optional): The number of shards. Defaults to 1.
+
+        Returns:
+            dict: Slice, row and timing counts of the backfill.
+        """
+        source = SCRAPER_SOURCES[exchange]
+        instrument_names = [
+            instrument_name for instrument_name in source.instrument_names()
+            if shard_of(instrument_name, shard_count) == shard_index
+        ]
+        fetch_windows = source.fetch_windows(interval, instrument_names)
+        slice_length = Config.BACKFILL_SLICE_DAYS * 86400 * 1000
+
+        all_slices = Backfill.build_slices(fetch_windows, slice_length)
+        completed = get_completed_slices(exchange)
+        slices = [s for s in all_slices if (s.instrument_name, s.start) not in completed]
+
+        progress = BackfillProgress(source.tag, len(slices), len(all_slices) - len(slices))
+        logger.info(
+            f"[{source.tag}] Backfilling {interval} for {len(instrument_names)} instruments: "
+            f"{len(slices)} slices to fetch, {progress.skipped_slices} already done"
+        )
+
+        with ThreadPoolExecutor(max_workers=Config.BACKFILL_WORKERS) as executor:
+            futures = [executor.submit(Backfill.run_slice, exchange, source, backfill_slice) for backfill_slice in slices]
+            for future in as_completed(futures):
+                try:
+                    rows, inserted = future.result()
+                    progress.record(rows, inserted)
+                except Exception as e:
+                    progress.record_failure()
+                    logger.error(f"[{source.tag}] Backfill slice failed, it will be retried on the next run: {e}")
+                progress.report()
+
+        progress.report(force=True)
+        return progress.stats()
+
+    @staticmethod
+    def build_slices(fetch_windows, slice_length):
+        """
+        Split fetch windows into grid-aligned slices, newest first.
+
+        Args:
+            fetch_windows (list): (instrument_name, start, end) tuples from get_fetch_windows.
+            slice_length (int): The slice length in milliseconds.
+
+        Returns:
+            list: BackfillSlice tuples.
+        """
+        slices = []
+        for instrument_name, start, end in fetch_windows:
+            slice_start = int(start) - int(start) % slice_length
+            while slice_start < end:
+                slice_end = slice_start + slice_length
+                slices.append(BackfillSlice(instrument_name, slice_start, min(slice_end, int(end)), slice_end <= end))
+                slice_start = slice_end
+        return sorted(slices, key=lambda s: s.start, reverse=True)
+
+    @staticmethod
+    def run_slice(exchange, source, backfill_slice):
+        """
+        Fetch and save one slice, then checkpoint it if it lies entirely in the past.
+
+        Args:
+            exchange (str): The exchange key.
+            source (ScraperSource): The exchange's backfill source.
+            backfill_slice (BackfillSlice): The slice to load.
+
+        Returns:
+            tuple: Rows fetched and rows inserted.
+        """
+        instrument_name, start, end, closed = backfill_slice
+        rows = []
+        for page in source.fetch_pages(instrument_name, start, end):
+            rows.extend(source.process_data(page))
+
+        save_status = save_to_database(rows, source.model_class)
+        if not isinstance(save_status, SaveResult):
+            raise save_status
+
+        # The open slice at the head of the window keeps receiving data, so it is never checkpointed
+        if closed:
+            mark_slice_completed(exchange, instrument_name, start, end, len(rows))
+        return len(rows), save_status.inserted
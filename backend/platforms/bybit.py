@@ -2,52 +2,39 @@ import ccxt
 import time
 import json
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from app.utils import time_converter
+from app.utils import time_converter, resume_since
 from app.logger import logger
 from app.db.models import BybitDB
-from app.db.operations import save_to_database
-import gc
-from app.config import Config
+from app.db.operations import get_latest_timestamps
+from platforms.pipeline import run_pipeline
+from app.exchange_registry import exchange_registry
+from app.instrument_registry import instrument_registry
+from platforms.rate_limiter import ccxt_call, ccxt_call_async, get_rate_limiter
 class Bybit:
     @staticmethod
     def run(interval='1h'):
         """
-        Run the Bybit scraper process for the given interval with memory optimization.
+        Run the Bybit scraper process for the given interval.
+        Pages are streamed from the fetch threads straight into the database writer, so memory
+        stays flat regardless of how many instruments are scraped.
+        Only points newer than the latest stored timestamp of each instrument are requested.
 
         Args:
-            interval (str): The interval at which the scraper will run. Defaults to '1h'.
+            interval (str): The interval at which to run the scraper, e.g., '1h', '1d'.
 
         Returns:
-            None
+            dict: Instrument, page, row, inserted and skipped counts of the run.
         """
         bybit_assets = Bybit.fetch_bybit_instrument_names()
         logger.info(f"[BYBIT] Running scraper for {interval} interval with assets: {len(bybit_assets)}")
 
-        start_time = time.time()
+        # High-water mark per instrument so we only request new points
+        latest_timestamps = get_latest_timestamps(BybitDB)
+        fetch_windows = Bybit.get_fetch_windows(interval, bybit_assets, latest_timestamps)
 
-        # Process assets in smaller batches
-        batch_size = Config.BATCH_SIZE  # Define the batch size
-        batch_iteration = 0
-        for i in range(0, len(bybit_assets), batch_size):
-            batch_assets = bybit_assets[i:i + batch_size]
-            bybit_data = Bybit.run_with_threading(Bybit.fetch_bybit_data, interval, batch_assets)
-            processed_data = Bybit.process_bybit_data(bybit_data)
-
-            # Save processed data to the database
-            save_status = save_to_database(processed_data, BybitDB)
-            batch_iteration += 1
-            if save_status == True:
-                logger.info(f"[BYBIT][{batch_iteration}] Data batch saved successfully.")
-            else:
-                logger.error(f"[BYBIT][{batch_iteration}] {save_status}")
-
-            # Free memory after processing each batch
-            gc.collect()
-
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.info(f"[BYBIT] Data scraping completed in {duration:.2f} seconds.")
+        stats = run_pipeline('BYBIT', BybitDB, Bybit.process_bybit_data, fetch_windows, lambda name, since, until: Bybit.fetch_bybit_pages(name, since))
+        logger.info(f"[BYBIT] Exchange registry: {exchange_registry.stats().get('bybit')}")
+        return stats
 
     @staticmethod
     def process_bybit_data(data):
@@ -77,73 +64,140 @@ class Bybit:
         """
         Fetch the list of instrument names from Bybit.
 
+        The list comes from the instrument registry, which refreshes it from the Bybit markets
+        on a schedule and drops delisted instruments.
+
         Returns:
-            list: A list of instrument names that contain 'USDT'.
+            list: A list of base assets with an active USDT perpetual.
+        """
+        return instrument_registry.get('bybit', Bybit.discover_instrument_names, "data_const/avail_bybit.json")
+
+    @staticmethod
+    def discover_instrument_names(validators=None):
         """
-        # exchange = ccxt.bybit()
-        # exchange.load_markets()
-        # return [pair for pair in exchange.markets if 'USDT' in pair]
+        Read the active USDT perpetuals from the shared ccxt client's markets.
+
+        ccxt can't send conditional requests, so freshness comes from the exchange registry's
+        market TTL instead of an ETag.
+
+        Args:
+            validators (dict, optional): Unused; kept for the instrument registry's interface.
 
-        with open("data_const/avail_bybit.json", 'r', encoding='utf-8') as f:
-            instrument_names = json.load(f)
-        return instrument_names
+        Returns:
+            tuple: The base assets of the active USDT perpetuals and None as validators.
+        """
+        markets = exchange_registry.get('bybit').markets
+        instrument_names = [
+            market['base'] for market in markets.values()
+            if market.get('swap') and market.get('linear') and market.get('quote') == 'USDT' and market.get('active') is not False
+        ]
+        return instrument_names, None
 
     @staticmethod
     def fetch_bybit_data(symbol, since):
+        """
+        Fetch funding rate history data from Bybit for a given symbol as a single list.
+
+        Args:
+            symbol (str): The trading symbol to fetch the funding rate history for.
+            since (int): The timestamp in milliseconds from which to start fetching the data.
+
+        Returns:
+            list: A list of funding rate history data.
+        """
+        return [entry for page in Bybit.fetch_bybit_pages(symbol, since) for entry in page]
+
+    @staticmethod
+    def fetch_bybit_pages(symbol, since, until=None):
         """
         Fetch funding rate history data from Bybit for a given symbol.
 
         This method fetches funding rate history for a symbol starting from a given timestamp.
+        Requests are paced by the shared Bybit rate limiter and retried while Bybit throttles them.
 
         Args:
             symbol (str): The trading symbol to fetch the funding rate history for.
-            since (int): The timestamp from which to start fetching the data.
+            since (int): The timestamp in milliseconds from which to start fetching the data.
+            until (int, optional): The timestamp in milliseconds to stop before. Defaults to now.
 
-        Returns:
-            list: A list of funding rate history data.
+        Yields:
+            list: One page of funding rate history data, as soon as it arrives.
+
+        Raises:
+            Exception: The ccxt error of a request that could not be completed.
         """
-        exchange = ccxt.bybit()
-        all_data = []
-        since = time_converter(since)
+        exchange = exchange_registry.get('bybit')
+        rate_limiter = get_rate_limiter('bybit')
+        until = until or int(datetime.now(timezone.utc).timestamp() * 1000)
+
+        while since < until:
+            data = ccxt_call(
+                rate_limiter,
+                lambda: exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=200)
+            )
+            page = [entry for entry in data if entry['timestamp'] < until]
+            if page:
+                yield page
+            if len(page) < len(data) or not data:
+                return
+
+            since = data[-1]['timestamp'] + 1
+
+    @staticmethod
+    async def fetch_bybit_data_async(exchange, symbol, since):
+        """
+        Fetch funding rate history from Bybit on a shared async ccxt exchange, yielding each page as it arrives.
+
+        Args:
+            exchange (ccxt.async_support.bybit): The exchange instance shared by the whole run.
+            symbol (str): The trading symbol to fetch the funding rate history for.
+            since (int): The timestamp in milliseconds from which to start fetching the data.
+
+        Yields:
+            list: One page of funding rate history data.
 
+        Raises:
+            Exception: The ccxt error of a request that could not be completed.
+        """
+        rate_limiter = get_rate_limiter('bybit')
         while True:
-            try:
-                data = exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=200)
-                if not data:
-                    break
-                all_data.extend(data)
-                since = data[-1]['timestamp'] + 1
-                if since >= int(datetime.now(timezone.utc).timestamp() * 1000):
-                    break
-            except Exception as e:
-                logger.error(f"[BYBIT] Error fetching data for {symbol}: {e}")
-                break
-
-        return all_data
+            data = await ccxt_call_async(
+                rate_limiter,
+                lambda: exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=200)
+            )
+
+            if not data:
+                return
+
+            yield data
+
+            since = data[-1]['timestamp'] + 1
+            if since >= int(datetime.now(timezone.utc).timestamp() * 1000):
+                return
 
     @staticmethod
-    def run_with_threading(fetch_data_function, since, instrument_names):
+    def get_fetch_windows(interval, instrument_names, latest_timestamps=None):
         """
-        Run data fetching for multiple instruments concurrently using threading.
+        Work out the time range that is still missing for every instrument.
+
+        Each instrument resumes right after its latest stored point, and instruments
+        that are already up to date are left out.
 
         Args:
-            fetch_data_function (function): The function used to fetch data.
-            since (int): The starting timestamp for fetching data.
+            interval (str): The interval that defines the starting point for fetching data, e.g., '1h', '1y'.
             instrument_names (list): A list of instrument names to fetch data for.
+            latest_timestamps (dict, optional): Latest stored timestamp per instrument name.
 
         Returns:
-            list: Combined results from all threads.
-        """
-        results = []
-        max_workers = min(10, len(instrument_names))  # Dynamically adjust the number of workers based on the batch size
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(fetch_data_function, instrument_name, since)
-                for instrument_name in instrument_names
-            ]
-            for future in as_completed(futures):
-                data = future.result()
-                if data:
-                    results.extend(data)
-
-        return results
+            list: (instrument_name, since, until) tuples in milliseconds for the instruments that need fetching.
+        """
+        window_start = time_converter(interval)
+        now = int(datetime.now(timezone.utc).timestamp() * 1000)
+        latest_timestamps = latest_timestamps or {}
+
+        fetch_windows = []
+        for instrument_name in instrument_names:
+            instrument_since = resume_since(window_start, latest_timestamps.get(instrument_name))
+            if instrument_since < now:
+                fetch_windows.append((instrument_name, instrument_since, now))
+        return fetch_windows
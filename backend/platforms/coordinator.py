@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from app.config import Config
+from app.exchange_registry import exchange_registry
+from app.logger import logger
+from app.db.operations import engine, get_latest_timestamps
+from platforms.pipeline import run_pipeline
+from platforms.rate_limiter import reset_rate_limiters, set_rate_share
+from platforms.sources import SCRAPER_SOURCES, shard_of
+
+
+class Coordinator:
+    @staticmethod
+    def run(interval='1h'):
+        """
+        Shard every exchange's instruments across a pool of worker processes.
+
+        Each exchange is split into Config.SHARDS_PER_EXCHANGE shards by a stable hash of the
+        instrument name, and every shard runs the streaming pipeline in its own process with
+        its own database pool, HTTP sessions and ccxt clients. An exchange's rate budget is
+        divided evenly between its shards, so the exchange sees the same request rate as before.
+
+        Args:
+            interval (str): The interval at which to run the scrapers, e.g., '1h', '1d'.
+
+        Returns:
+            list: The stats of every shard that completed.
+        """
+        shard_count = Coordinator.shard_count()
+        shards = []
+        for exchange, source in SCRAPER_SOURCES.items():
+            # Resolve the instrument lists once here, so the workers don't each refresh them
+            instrument_names = source.instrument_names()
+            for shard_index in range(shard_count):
+                shard_names = [name for name in instrument_names if shard_of(name, shard_count) == shard_index]
+                shards.append((exchange, shard_index, shard_names))
+        logger.info(f"[COORD] Running {len(shards)} shards on {Config.SCRAPER_PROCESSES} processes for {interval} interval")
+
+        start_time = time.time()
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=Config.SCRAPER_PROCESSES,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=Coordinator.init_worker
+        ) as executor:
+            futures = {
+                executor.submit(Coordinator.run_shard, exchange, interval, shard_index, shard_count, shard_names): (exchange, shard_index)
+                for exchange, shard_index, shard_names in shards
+            }
+            for future in as_completed(futures):
+                exchange, shard_index = futures[future]
+                tag = SCRAPER_SOURCES[exchange].tag
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    logger.error(f"[COORD] {tag} shard {shard_index + 1}/{shard_count} failed: {e}")
+                    continue
+                results.append(stats)
+                logger.info(
+                    f"[COORD] {tag} shard {shard_index + 1}/{shard_count} (pid {stats['pid']}): "
+                    f"{stats['instruments']} instruments, {stats['pages']} pages, {stats['rows']} rows "
+                    f"in {stats['seconds']:.2f} seconds ({Coordinator.rate(stats['rows'], stats['seconds']):.1f} rows/s)"
+                )
+
+        duration = time.time() - start_time
+        total_rows = sum(stats['rows'] for stats in results)
+        total_pages = sum(stats['pages'] for stats in results)
+        logger.info(
+            f"[COORD] {len(results)}/{len(shards)} shards completed in {duration:.2f} seconds: "
+            f"{total_pages} pages, {total_rows} rows ({Coordinator.rate(total_rows, duration):.1f} rows/s)"
+        )
+        return results
+
+    @staticmethod
+    def shard_count():
+        """Return the shards per exchange; by default enough to give every process one shard."""
+        if Config.SHARDS_PER_EXCHANGE > 0:
+            return Config.SHARDS_PER_EXCHANGE
+        return max(1, Config.SCRAPER_PROCESSES // len(SCRAPER_SOURCES))
+
+    @staticmethod
+    def init_worker():
+        """
+        Prepare a freshly forked worker.
+
+        Pooled database connections, HTTP sessions and locks copied from the parent must not be
+        shared, so the worker drops them and opens its own on first use.
+        """
+        engine.dispose(close=False)
+        exchange_registry.reset()
+        reset_rate_limiters()
+
+    @staticmethod
+    def run_shard(exchange, interval, shard_index, shard_count, instrument_names):
+        """
+        Scrape one shard of an exchange in the current worker process.
+
+        Args:
+            exchange (str): The exchange key, one of SCRAPER_SOURCES.
+            interval (str): The interval at which to run the scraper.
+            shard_index (int): The shard to scrape.
+            shard_count (int): The number of shards of the exchange.
+            instrument_names (list): The instruments of the shard.
+
+        Returns:
+            dict: The pipeline stats of the shard, with its exchange, shard index and pid.
+        """
+        set_rate_share(exchange, shard_count)
+        source = SCRAPER_SOURCES[exchange]
+        latest_timestamps = get_latest_timestamps(source.model_class)
+        fetch_windows = source.fetch_windows(interval, instrument_names, latest_timestamps)
+
+        stats = run_pipeline(f"{source.tag}:{shard_index}", source.model_class, source.process_data, fetch_windows, source.fetch_pages)
+        stats.update(exchange=exchange, shard=shard_index, pid=os.getpid())
+        return stats
+
+    @staticmethod
+    def rate(count, seconds):
+        return count / seconds if seconds else 0.0
@@ -1,57 +1,40 @@
 import ccxt
-import gc
 import time
 import json
 from datetime import datetime, timezone, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from app.utils import get_timeframe, time_converter
+from app.utils import get_timeframe, time_converter, resume_since
 from app.logger import logger
 from app.db.models import GateioDB
-from app.db.operations import save_to_database, delete_all_data, count_rows
-from app.config import Config
+from app.db.operations import delete_all_data, count_rows, get_latest_timestamps
+from platforms.pipeline import run_pipeline
+from app.exchange_registry import exchange_registry
+from app.instrument_registry import instrument_registry
+from platforms.rate_limiter import ccxt_call, ccxt_call_async, get_rate_limiter
 class Gateio:
     @staticmethod
     def run(interval='1h'):
         """
-        Run the Gateio scraper process for the given interval with memory optimization.
-        Processes data for each asset in batches and saves it to the database while 
-        running garbage collection after each batch to free memory.
+        Run the Gateio scraper process for the given interval.
+        Pages are streamed from the fetch threads straight into the database writer, so memory
+        stays flat regardless of how many instruments are scraped.
+        Only points newer than the latest stored timestamp of each instrument are requested.
 
         Args:
             interval (str): The interval at which to run the scraper, e.g., '1h', '1d'.
-        
+
         Returns:
-            None
+            dict: Instrument, page, row, inserted and skipped counts of the run.
         """
         gateio_assets = Gateio.fetch_gateio_instrument_names()
-        logger.info(f"[GATE]Running scraper for {interval} interval with assets: {len(gateio_assets)}")
-        
-        start_time = time.time()
-
-        # Process data in smaller batches to avoid running out of memory
-        batch_size = Config.BATCH_SIZE  # Process 50 assets at a time
-        batch_iteration = 0
-        for i in range(0, len(gateio_assets), batch_size):
-            batch_assets = gateio_assets[i:i + batch_size]
-            gateio_data = Gateio.run_with_threading(Gateio.fetch_gateio_data, interval, batch_assets)
-            processed_data = Gateio.process_gateio_data(gateio_data)
-            
-            # Save the batch to the database
-            save_status = save_to_database(processed_data, GateioDB)
-            batch_iteration += 1
-            if save_status == True:
-                logger.info(f"[GATE][{batch_iteration}] Data batch saved successfully.")
-            else:
-                logger.error(f"[GATE][{batch_iteration}] {save_status}")
-            
-            # Run garbage collection to free up memory after each batch
-            gc.collect()
-        
-        logger.info(f"[GATE]Data saved to the database successfully.")
-
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.info(f"[GATE]Data scraping completed in {duration:.2f} seconds.")
+        logger.info(f"[GATE] Running scraper for {interval} interval with assets: {len(gateio_assets)}")
+
+        # High-water mark per instrument so we only request new points
+        latest_timestamps = get_latest_timestamps(GateioDB)
+        fetch_windows = Gateio.get_fetch_windows(interval, gateio_assets, latest_timestamps)
+
+        stats = run_pipeline('GATE', GateioDB, Gateio.process_gateio_data, fetch_windows, lambda name, since, until: Gateio.fetch_gateio_pages(name, since))
+        logger.info(f"[GATE] Exchange registry: {exchange_registry.stats().get('gate')}")
+        return stats
 
     @staticmethod
     def process_gateio_data(data):
@@ -81,64 +64,126 @@ class Gateio:
         """
         Fetch the list of instrument names from Gate.io.
 
+        The list comes from the instrument registry, which refreshes it from the Gate.io markets
+        on a schedule and drops delisted instruments.
+
+        Returns:
+            list: A list of base assets with an active USDT perpetual.
+        """
+        return instrument_registry.get('gateio', Gateio.discover_instrument_names, "data_const/avail_gate.json")
+
+    @staticmethod
+    def discover_instrument_names(validators=None):
+        """
+        Read the active USDT perpetuals from the shared ccxt client's markets.
+
+        ccxt can't send conditional requests, so freshness comes from the exchange registry's
+        market TTL instead of an ETag.
+
+        Args:
+            validators (dict, optional): Unused; kept for the instrument registry's interface.
+
         Returns:
-            list: A list of instrument names that include 'USDT'.
-        """
-        # exchange = ccxt.gate()
-        # exchange.load_markets()
-        # # Return list of symbols that contain 'USDT'
-        # return [pair for pair in exchange.markets if 'USDT' in pair]
-        
-        with open("data_const/avail_gate.json", 'r', encoding='utf-8') as f:
-            instrument_names = json.load(f)
-        return instrument_names
-    
+            tuple: The base assets of the active USDT perpetuals and None as validators.
+        """
+        markets = exchange_registry.get('gate').markets
+        instrument_names = [
+            market['base'] for market in markets.values()
+            if market.get('swap') and market.get('linear') and market.get('quote') == 'USDT' and market.get('active') is not False
+        ]
+        return instrument_names, None
+
     @staticmethod
     def fetch_gateio_data(symbol, since, limit=1000):
         """
-        Fetch funding rate history data from Gate.io for a given symbol.
+        Fetch funding rate history data from Gate.io for a given symbol as a single list.
 
         Args:
             symbol (str): The symbol to fetch funding rate data for.
-            since (int): The timestamp to start fetching data from.
+            since (int): The timestamp in milliseconds to start fetching data from.
             limit (int, optional): The number of records to fetch per request. Defaults to 1000.
 
         Returns:
             list: A list of funding rate history data for the given symbol.
         """
-        exchange = ccxt.gate()
-        since = time_converter(since)
-        data = []
-        try:
-            data = exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=limit)
-        except Exception as e:
-            logger.error(f"[GATE][{symbol}]: {e}")
-        return data
+        return [entry for page in Gateio.fetch_gateio_pages(symbol, since, limit) for entry in page]
 
     @staticmethod
-    def run_with_threading(fetch_data_function, since, instrument_names):
+    def fetch_gateio_pages(symbol, since, limit=1000, until=None):
         """
-        Run data fetching for multiple instruments concurrently with reduced memory usage.
-        Optimized for batch processing and reduced memory usage by limiting the number of threads.
+        Fetch funding rate history data from Gate.io for a given symbol.
 
         Args:
-            fetch_data_function (function): The function to fetch data.
-            since (str): The starting timestamp for fetching data.
-            instrument_names (list): List of instrument names to fetch data for.
-        
+            symbol (str): The symbol to fetch funding rate data for.
+            since (int): The timestamp in milliseconds to start fetching data from.
+            limit (int, optional): The number of records to fetch per request. Defaults to 1000.
+            until (int, optional): The timestamp in milliseconds to stop before. Defaults to no bound.
+
+        Yields:
+            list: The page of funding rate history data for the given symbol.
+
+        Raises:
+            Exception: The ccxt error of a request that could not be completed.
+        """
+        exchange = exchange_registry.get('gate')
+        data = ccxt_call(
+            get_rate_limiter('gateio'),
+            lambda: exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=limit)
+        )
+        if until is not None:
+            data = [entry for entry in data if entry['timestamp'] < until]
+
+        if data:
+            yield data
+
+    @staticmethod
+    async def fetch_gateio_data_async(exchange, symbol, since, limit=1000):
+        """
+        Fetch funding rate history from Gate.io on a shared async ccxt exchange.
+
+        Args:
+            exchange (ccxt.async_support.gate): The exchange instance shared by the whole run.
+            symbol (str): The symbol to fetch funding rate data for.
+            since (int): The timestamp in milliseconds to start fetching data from.
+            limit (int, optional): The number of records to fetch per request. Defaults to 1000.
+
+        Yields:
+            list: The page of funding rate history data for the given symbol.
+
+        Raises:
+            Exception: The ccxt error of a request that could not be completed.
+        """
+        data = await ccxt_call_async(
+            get_rate_limiter('gateio'),
+            lambda: exchange.fetch_funding_rate_history(f'{symbol}/USDT:USDT', since, limit=limit)
+        )
+
+        if data:
+            yield data
+
+    @staticmethod
+    def get_fetch_windows(interval, instrument_names, latest_timestamps=None):
+        """
+        Work out the time range that is still missing for every instrument.
+
+        Each instrument resumes right after its latest stored point, and instruments
+        that are already up to date are left out.
+
+        Args:
+            interval (str): The interval that defines the starting point for fetching data, e.g., '1h', '1y'.
+            instrument_names (list): A list of instrument names to fetch data for.
+            latest_timestamps (dict, optional): Latest stored timestamp per instrument name.
+
         Returns:
-            list: Combined results from all threads.
-        """
-        results = []
-        max_workers = min(10, len(instrument_names))  # Dynamically adjust the number of workers
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(fetch_data_function, instrument_name, since)
-                for instrument_name in instrument_names
-            ]
-            for future in as_completed(futures):
-                data = future.result()
-                if data:
-                    results.extend(data)
+            list: (instrument_name, since, until) tuples in milliseconds for the instruments that need fetching.
+        """
+        window_start = time_converter(interval)
+        now = int(datetime.now(timezone.utc).timestamp() * 1000)
+        latest_timestamps = latest_timestamps or {}
 
-        return results
+        fetch_windows = []
+        for instrument_name in instrument_names:
+            instrument_since = resume_since(window_start, latest_timestamps.get(instrument_name))
+            if instrument_since < now:
+                fetch_windows.append((instrument_name, instrument_since, now))
+        return fetch_windows
@@ -1,94 +1,91 @@
+import asyncio
+import aiohttp
 import requests
 import time
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from fake_useragent import UserAgent
 from app.db.models import HyperliquidDB
-from app.db.operations import save_to_database, delete_all_data, count_rows
-from app.utils import get_timeframe
+from app.db.operations import delete_all_data, count_rows, get_latest_timestamps
+from app.utils import get_timeframe, resume_since
 from app.logger import logger
-import gc
+from app.instrument_registry import instrument_registry, conditional_headers, response_validators
 from app.config import Config
+from platforms.pipeline import run_pipeline
+from platforms.rate_limiter import THROTTLED_STATUSES, FetchError, get_rate_limiter
 class Hyperliquid:
     @staticmethod
     def run(interval='1h'):
         """
-        Run the Hyperliquid scraper for the given interval with memory optimization.
-
-        This method fetches instrument names, scrapes data for those instruments using threading, processes the data, and saves it to the database.
+        Run the Hyperliquid scraper for the given interval.
+        Pages are streamed from the fetch threads straight into the database writer, so memory
+        stays flat regardless of how many instruments are scraped.
+        Only points newer than the latest stored timestamp of each instrument are requested.
 
         Args:
             interval (str): The interval at which to run the scraper, e.g., '1h', '1d'.
 
         Returns:
-            None
+            dict: Instrument, page, row, inserted and skipped counts of the run.
         """
         hyperliquid_assets = Hyperliquid.fetch_hyperliquid_instrument_name()
-        logger.info(f"[HYPER]Running scraper for {interval} interval with assets: {len(hyperliquid_assets)}")
-
-        # Start timing
-        start_time = time.time()
-
-        # Process assets in smaller batches to avoid memory overload
-        batch_size = Config.BATCH_SIZE
-        batch_iteration = 0
-        for i in range(0, len(hyperliquid_assets), batch_size):
-            batch_assets = hyperliquid_assets[i:i + batch_size]
-            hyperliquid_data = Hyperliquid.run_with_threading(Hyperliquid.fetch_hyperliquid_data, interval, batch_assets)
-
-            # Process data to match the expected format
-            processed_data = Hyperliquid.process_hyperliquid_data(hyperliquid_data)
-
-            # Save processed data to the database
-            save_status = save_to_database(processed_data, HyperliquidDB)
-            batch_iteration += 1
-            if save_status == True:
-                logger.info(f"[HYPER][{batch_iteration}] Data batch saved successfully.")
-            else:
-                logger.error(f"[HYPER][{batch_iteration}] {save_status}")
+        logger.info(f"[HYPER] Running scraper for {interval} interval with assets: {len(hyperliquid_assets)}")
 
-            # Free memory after processing each batch
-            gc.collect()
+        # High-water mark per instrument so we only request new points
+        latest_timestamps = get_latest_timestamps(HyperliquidDB)
+        fetch_windows = Hyperliquid.get_fetch_windows(interval, hyperliquid_assets, latest_timestamps)
 
-        # End timing
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.info(f"[HYPER] Data scraping completed in {duration:.2f} seconds.")
+        stats = run_pipeline('HYPER', HyperliquidDB, Hyperliquid.process_hyperliquid_data, fetch_windows, Hyperliquid.fetch_hyperliquid_pages)
+        return stats
 
     @staticmethod
     def fetch_hyperliquid_instrument_name():
         """
-        Fetch instrument names from the Hyperliquid API.
+        Fetch instrument names from Hyperliquid.
 
-        This method retrieves instrument names from the Hyperliquid API by making a POST request.
+        The list comes from the instrument registry, which refreshes it from the Hyperliquid API
+        on a schedule and drops delisted instruments.
 
         Returns:
-            list: A list of instrument names fetched from the Hyperliquid API.
-        """
-        # ua = UserAgent()
-        # url = 'https://api.hyperliquid.xyz/info'
-        # headers = {
-        #     'Content-Type': 'application/json',
-        #     'User-Agent': ua.random
-        # }
-        # payload = {
-        #     'type': 'meta'
-        # }
-
-        try:
-            # response = requests.post(url, headers=headers, json=payload)
-            # response.raise_for_status()  # Raise HTTPError for bad responses
-            # data = response.json()
+            list: A list of instrument names listed on Hyperliquid.
+        """
+        return instrument_registry.get('hyperliquid', Hyperliquid.discover_instrument_names, "data_const/avail_hyper.json")
 
-            # instrument_names = [instrument['name'] for instrument in data['universe']]
+    @staticmethod
+    def discover_instrument_names(validators=None):
+        """
+        Fetch the perpetual universe from the Hyperliquid API with a conditional request.
 
-            with open("data_const/avail_hyper.json", 'r', encoding='utf-8') as f:
-                instrument_names = json.load(f)
-            return instrument_names
+        Args:
+            validators (dict, optional): The ETag / Last-Modified of the previous response.
 
-        except requests.RequestException as e:
-            logger.info(f"[HYPER]An error occurred while fetching metadata: {e}")
-            return []
+        Returns:
+            tuple: The names of the listed instruments (None if not modified) and the new validators.
+        """
+        url = f'{Config.HYPERLIQUID_API_URL}/info'
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': UserAgent().random,
+            **conditional_headers(validators)
+        }
+        payload = {
+            'type': 'meta'
+        }
+        rate_limiter = get_rate_limiter('hyperliquid')
+
+        rate_limiter.acquire()
+        status = None
+        try:
+            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            status = response.status_code
+            if status == 304:
+                return None, validators
+            response.raise_for_status()  # Raise HTTPError for bad responses
+            data = response.json()
+        finally:
+            rate_limiter.release(status)
+
+        instrument_names = [instrument['name'] for instrument in data['universe'] if not instrument.get('isDelisted')]
+        return instrument_names, response_validators(response)
 
     @staticmethod
     def process_hyperliquid_data(data):
@@ -115,9 +112,7 @@ class Hyperliquid:
     @staticmethod
     def fetch_hyperliquid_data(symbol, start_time, end_time, limit=500):
         """
-        Fetch funding rate history data from Hyperliquid for a given symbol.
-
-        This method fetches funding rate history for a given symbol by making an API call. It retries up to a set limit in case of errors.
+        Fetch funding rate history data from Hyperliquid for a given symbol as a single list.
 
         Args:
             symbol (str): The name of the instrument to fetch funding data for.
@@ -128,10 +123,32 @@ class Hyperliquid:
         Returns:
             list: A list of funding history data fetched from the Hyperliquid API.
         """
+        return [entry for page in Hyperliquid.fetch_hyperliquid_pages(symbol, start_time, end_time, limit) for entry in page]
+
+    @staticmethod
+    def fetch_hyperliquid_pages(symbol, start_time, end_time, limit=500):
+        """
+        Fetch funding rate history data from Hyperliquid for a given symbol.
+
+        This method fetches funding rate history for a given symbol by making an API call. It retries up to a set limit in case of errors
+        and paces every request through the shared Hyperliquid rate limiter.
+
+        Args:
+            symbol (str): The name of the instrument to fetch funding data for.
+            start_time (int): The start timestamp for fetching data.
+            end_time (int): The end timestamp for fetching data.
+            limit (int, optional): The maximum number of data points to retrieve per request. Defaults to 500.
+
+        Yields:
+            list: One page of funding history entries, as soon as it arrives.
+
+        Raises:
+            FetchError: If a page still fails after all retries.
+        """
         session = requests.Session()  # Reuse session for all requests
         ua = UserAgent()
-        url = 'https://api.hyperliquid.xyz/info'
-        all_data = []
+        url = f'{Config.HYPERLIQUID_API_URL}/info'
+        rate_limiter = get_rate_limiter('hyperliquid')
         current_start_time = start_time
 
         req_failed = 0
@@ -149,67 +166,149 @@ class Hyperliquid:
                 'limit': limit  # Ensure the limit is applied
             }
             
+            page = None
             retries = 0
             max_retries = 2
-            backoff_factor = 10  # Exponential backoff factor
+            backoff_factor = 10  # Exponential backoff factor for network errors
 
             while retries < max_retries:
+                rate_limiter.acquire()
+                status, retry_after, wait_time = None, None, 0
                 try:
-                    response = session.post(url, headers=headers, json=payload)
-                    response.raise_for_status()  # Raise HTTPError for bad responses
-                    data = response.json()
-
-                    if not data:
-                        return all_data
-
-                    all_data.extend(data)
+                    response = session.post(url, headers=headers, json=payload, timeout=Config.REQUEST_TIMEOUT)
+                    status = response.status_code
 
-                    if len(data) < limit:
-                        return all_data
+                    # Rate limiting (429) and server issues (503): the shared limiter backs off before the next attempt
+                    if status in THROTTLED_STATUSES:
+                        retry_after = response.headers.get('Retry-After')
+                        req_failed += 1
+                        retries += 1
+                        continue
 
-                    current_start_time = data[-1]['time']
+                    response.raise_for_status()  # Raise HTTPError for bad responses
+                    page = response.json()
                     break  # Break out of the retry loop if successful
 
                 except requests.RequestException as e:
                     req_failed += 1
                     retries += 1
-                    if retries >= max_retries:
-                        return all_data  # Return what we have so far if retries are exhausted
-                    wait_time = backoff_factor ** retries
+                    if retries < max_retries:
+                        wait_time = backoff_factor ** retries
+                finally:
+                    rate_limiter.release(status, retry_after)
+                # Back off only after the concurrency slot is given back
+                if wait_time:
                     time.sleep(wait_time)
+
+            if page is None:
+                raise FetchError(f"Giving up on {symbol} after {max_retries} attempts ({req_failed} requests failed)")
+
+            if not page:
+                break  # No more data
+
+            yield page
+
+            if len(page) < limit:
+                break
+
+            current_start_time = page[-1]['time']
         
         if req_failed:
             logger.error(f"[HYPER] {req_failed} requests failed")
 
-        return all_data
+    @staticmethod
+    async def fetch_hyperliquid_data_async(session, symbol, start_time, end_time, limit=500):
+        """
+        Fetch funding rate history from Hyperliquid on a shared aiohttp session, yielding each page as it arrives.
+
+        This is the async counterpart of fetch_hyperliquid_data. The session's connection pool is reused
+        for every request, and requests are paced by the same shared rate limiter as the sync path.
+
+        Args:
+            session (aiohttp.ClientSession): The shared session for Hyperliquid requests.
+            symbol (str): The name of the instrument to fetch funding data for.
+            start_time (int): The start timestamp for fetching data.
+            end_time (int): The end timestamp for fetching data.
+            limit (int, optional): The maximum number of data points to retrieve per request. Defaults to 500.
+
+        Yields:
+            list: One page of funding history entries.
+
+        Raises:
+            FetchError: If a page still fails after all retries.
+        """
+        url = f'{Config.HYPERLIQUID_API_URL}/info'
+        rate_limiter = get_rate_limiter('hyperliquid')
+        current_start_time = start_time
+        max_retries = 2
+        backoff_factor = 10  # Exponential backoff factor for network errors
+
+        while current_start_time < end_time:
+            payload = {
+                'type': 'fundingHistory',
+                'coin': symbol.upper(),
+                'startTime': current_start_time,
+                'endTime': end_time,
+                'limit': limit
+            }
+
+            page = None
+            for retries in range(1, max_retries + 1):
+                await rate_limiter.acquire_async()
+                status, retry_after, wait_time = None, None, 0
+                try:
+                    async with session.post(url, json=payload) as response:
+                        status = response.status
+                        if status in THROTTLED_STATUSES:
+                            retry_after = response.headers.get('Retry-After')
+                            continue
+                        response.raise_for_status()
+                        page = await response.json()
+                        break
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if retries < max_retries:
+                        wait_time = backoff_factor ** retries
+                finally:
+                    rate_limiter.release(status, retry_after)
+                # Back off only after the concurrency slot is given back
+                if wait_time:
+                    await asyncio.sleep(wait_time)
+
+            if page is None:
+                raise FetchError(f"Giving up on {symbol} after {max_retries} attempts")
+
+            if not page:
+                return
+
+            yield page
+
+            if len(page) < limit:
+                return
+
+            current_start_time = page[-1]['time']
 
     @staticmethod
-    def run_with_threading(fetch_data_function, interval, instrument_names):
+    def get_fetch_windows(interval, instrument_names, latest_timestamps=None):
         """
-        Run data fetching for multiple instruments concurrently using threading.
+        Work out the time range that is still missing for every instrument.
 
-        This method fetches data for multiple instruments in parallel using threads.
+        Each instrument resumes right after its latest stored point, and instruments
+        that are already up to date are left out.
 
         Args:
-            fetch_data_function (function): The function used to fetch data.
             interval (str): The interval for the data fetch operation.
             instrument_names (list): A list of instrument names to fetch data for.
+            latest_timestamps (dict, optional): Latest stored timestamp per instrument name.
 
         Returns:
-            list: Combined results from all threads.
+            list: (instrument_name, start_time, end_time) tuples for the instruments that need fetching.
         """
         start_time, end_time = get_timeframe(interval)
-
-        results = []
-        max_workers = min(10, len(instrument_names))  # Dynamically adjust the number of workers
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(fetch_data_function, instrument_name, start_time, end_time)
-                for instrument_name in instrument_names
-            ]
-            for future in as_completed(futures):
-                data = future.result()
-                if data:
-                    results.extend(data)
-
-        return results
+        latest_timestamps = latest_timestamps or {}
+
+        fetch_windows = []
+        for instrument_name in instrument_names:
+            instrument_start = resume_since(start_time, latest_timestamps.get(instrument_name))
+            if instrument_start < end_time:
+                fetch_windows.append((instrument_name, instrument_start, end_time))
+        return fetch_windows
@@ -0,0 +1,184 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+from app.logger import logger
+from app.db.operations import SaveResult, save_to_database
+
+
+class ChunkWriter:
+    """
+    Saves chunks of rows for one exchange, retrying a failed write with exponential backoff.
+
+    A chunk that still fails after Config.WRITE_RETRIES attempts is counted as failed rows, and
+    its instruments are held back: their later rows in the same run are not saved either, so
+    their newest stored timestamp stays below the lost rows and the next run fetches them again.
+    """
+
+    def __init__(self, tag, model_class):
+        self.tag = tag
+        self.model_class = model_class
+        self.inserted = 0
+        self.skipped = 0
+        self.failed_rows = 0
+        self.failed_instruments = set()
+        self.chunks = 0
+
+    def save(self, rows):
+        """
+        Save one chunk of rows.
+
+        Args:
+            rows (list): Rows shaped as [instrument_name, timestamp, funding_rate, mark_price].
+
+        Returns:
+            None
+        """
+        self.chunks += 1
+        held_back = [row for row in rows if row[0] in self.failed_instruments]
+        if held_back:
+            self.failed_rows += len(held_back)
+            rows = [row for row in rows if row[0] not in self.failed_instruments]
+            if not rows:
+                return
+
+        for attempt in range(1, Config.WRITE_RETRIES + 1):
+            save_status = save_to_database(rows, self.model_class)
+            if isinstance(save_status, SaveResult):
+                self.inserted += save_status.inserted
+                self.skipped += save_status.skipped
+                logger.info(f"[{self.tag}][{self.chunks}] Data batch saved successfully: {save_status.inserted} inserted, {save_status.skipped} skipped.")
+                return
+            if attempt < Config.WRITE_RETRIES:
+                wait_time = Config.WRITE_RETRY_BACKOFF * 2 ** (attempt - 1)
+                logger.warning(f"[{self.tag}][{self.chunks}] Saving failed (attempt {attempt}), retrying in {wait_time:.1f}s: {save_status}")
+                time.sleep(wait_time)
+
+        self.failed_rows += len(rows)
+        self.failed_instruments.update(row[0] for row in rows)
+        logger.error(f"[{self.tag}][{self.chunks}] Giving up on {len(rows)} rows after {Config.WRITE_RETRIES} attempts: {save_status}")
+
+
+class Pipeline:
+    """
+    Streaming fetch -> normalize -> write pipeline for one exchange.
+
+    Fetch threads push raw pages onto a bounded queue as soon as they arrive, a normalizer
+    thread turns them into rows, and a writer thread saves rows in Config.INSERT_CHUNK_SIZE
+    chunks. The bounded queues keep memory flat: fetchers block when the writer falls behind
+    instead of accumulating a whole batch in memory.
+    """
+
+    def __init__(self, tag, model_class, process_data):
+        self.tag = tag
+        self.model_class = model_class
+        self.process_data = process_data
+        self.page_queue = queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
+        self.row_queue = queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
+        self.stats = {'instruments': 0, 'pages': 0, 'rows': 0, 'inserted': 0, 'skipped': 0, 'failed': 0, 'failed_rows': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def run(self, fetch_windows, fetch_pages):
+        """
+        Stream every instrument's pages into the database.
+
+        Args:
+            fetch_windows (list): (instrument_name, start, end) tuples from get_fetch_windows.
+            fetch_pages (function): Returns an iterator of raw pages for one window.
+
+        Returns:
+            dict: Instrument, page, row, inserted, skipped, failed-instrument and failed-row counts.
+        """
+        normalizer = threading.Thread(target=self.normalize, name=f"{self.tag}-normalizer", daemon=True)
+        writer = threading.Thread(target=self.write, name=f"{self.tag}-writer", daemon=True)
+        normalizer.start()
+        writer.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=Config.FETCH_WORKERS) as executor:
+                for window in fetch_windows:
+                    executor.submit(self.fetch, fetch_pages, *window)
+        finally:
+            # Tell the normalizer no more pages are coming and wait for the last flush
+            self.page_queue.put(None)
+            normalizer.join()
+            writer.join()
+
+        return dict(self.stats)
+
+    def fetch(self, fetch_pages, instrument_name, start, end):
+        """Fetch one instrument and push its pages onto the page queue."""
+        try:
+            for page in fetch_pages(instrument_name, start, end):
+                self.page_queue.put(page)
+                self._count('pages')
+            self._count('instruments')
+        except Exception as e:
+            self._count('failed')
+            logger.error(f"[{self.tag}] Error fetching data for {instrument_name}: {e}")
+
+    def normalize(self):
+        """Turn raw pages into database rows until the page queue is closed."""
+        while True:
+            page = self.page_queue.get()
+            if page is None:
+                break
+            try:
+                rows = self.process_data(page)
+            except Exception as e:
+                logger.error(f"[{self.tag}] Error processing page: {e}")
+                continue
+            if rows:
+                self.row_queue.put(rows)
+        self.row_queue.put(None)
+
+    def write(self):
+        """Save rows in Config.INSERT_CHUNK_SIZE chunks until the row queue is closed."""
+        writer = ChunkWriter(self.tag, self.model_class)
+        buffer = []
+
+        while True:
+            rows = self.row_queue.get()
+            if rows is None:
+                break
+            self._count('rows', len(rows))
+            buffer.extend(rows)
+            if len(buffer) >= Config.INSERT_CHUNK_SIZE:
+                writer.save(buffer)
+                buffer = []
+
+        if buffer:
+            writer.save(buffer)
+
+        self._count('inserted', writer.inserted)
+        self._count('skipped', writer.skipped)
+        self._count('failed_rows', writer.failed_rows)
+
+def run_pipeline(tag, model_class, process_data, fetch_windows, fetch_pages):
+    """
+    Run one exchange through the streaming pipeline and log its throughput.
+
+    Args:
+        tag (str): The log tag of the exchange, e.g. 'AEVO'.
+        model_class: The funding table model to write into.
+        process_data (function): Converts a raw page into database rows.
+        fetch_windows (list): (instrument_name, start, end) tuples from get_fetch_windows.
+        fetch_pages (function): Returns an iterator of raw pages for one window.
+
+    Returns:
+        dict: The pipeline stats.
+    """
+    start_time = time.time()
+    stats = Pipeline(tag, model_class, process_data).run(fetch_windows, fetch_pages)
+    duration = time.time() - start_time
+    stats['seconds'] = round(duration, 2)
+    logger.info(
+        f"[{tag}] Data scraping completed in {duration:.2f} seconds: {stats['instruments']} instruments, "
+        f"{stats['pages']} pages, {stats['inserted']} inserted, {stats['skipped']} skipped, {stats['failed_rows']} rows failed, {stats['failed']} instruments failed."
+    )
+    return stats
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+import ccxt
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from app.config import Config
+from app.logger import logger
+
+# Responses that mean the exchange wants us to slow down
+THROTTLED_STATUSES = (429, 503)
+
+# How long to wait when the limiter is full and there is nothing better to go on
+POLL_INTERVAL = 0.01
+
+# Attempts a ccxt call gets when the exchange keeps throttling it
+CCXT_MAX_RETRIES = 5
+
+
+class FetchError(Exception):
+    """Raised when an exchange keeps failing a request after every retry."""
+
+
+def status_from_ccxt_error(error):
+    """Map a ccxt exception onto the HTTP status the limiter reacts to."""
+    if isinstance(error, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+        return 429
+    if isinstance(error, ccxt.ExchangeNotAvailable):
+        return 503
+    return None
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket plus an AIMD concurrency window, shared by every request to one exchange.
+
+    The bucket refills at the configured requests-per-second budget. The concurrency window
+    is halved and the bucket paused when the exchange answers 429/503, once per pause however
+    many of the requests in flight are throttled, and it grows by one slot after a full window
+    of healthy responses. A rate of 0 disables the bucket, leaving only the concurrency window
+    and the pauses after throttling.
+    """
+
+    def __init__(self, name, requests_per_second, max_concurrency, min_concurrency=1):
+        if requests_per_second < 0:
+            raise ValueError(f"Rate limit of {name} must not be negative, got {requests_per_second}")
+        self.name = name
+        self.rate = float(requests_per_second)
+        self.capacity = max(1.0, self.rate)  # Allow a burst of up to one second of budget
+        self.tokens = self.capacity
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.healthy_streak = 0
+        self.blocked_until = 0.0
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and a concurrency slot; return 0 on success or the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.in_flight >= self.concurrency:
+                return POLL_INTERVAL
+            if self.rate and self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+
+            self.tokens = max(0.0, self.tokens - 1)
+            self.in_flight += 1
+            return 0
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent."""
+        wait_time = self._reserve()
+        while wait_time:
+            time.sleep(wait_time)
+            wait_time = self._reserve()
+
+    async def acquire_async(self):
+        """Wait on the event loop until a request may be sent."""
+        wait_time = self._reserve()
+        while wait_time:
+            await asyncio.sleep(wait_time)
+            wait_time = self._reserve()
+
+    def release(self, status=None, retry_after=None):
+        """
+        Give the concurrency slot back and adapt to the exchange's answer.
+
+        Args:
+            status (int, optional): The HTTP status of the response, or None if the request failed without one.
+            retry_after (str, optional): The Retry-After header of a throttled response.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+            if status in THROTTLED_STATUSES:
+                # Stop sending until the exchange says we may
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = Config.RATE_LIMIT_COOLDOWN
+                now = time.monotonic()
+                self.healthy_streak = 0
+                self.tokens = 0
+                # Multiplicative decrease once per throttling episode: the other requests that were
+                # already in flight when the exchange pushed back are answered during the pause and
+                # must not shrink the window again
+                if now >= self.blocked_until:
+                    self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                    logger.warning(f"[{self.name.upper()}] Throttled with {status}, pausing {pause:.1f}s at concurrency {self.concurrency}")
+                self.blocked_until = max(self.blocked_until, now + pause)
+            elif status is not None and status < 500:
+                # Additive increase after a full window of healthy responses
+                self.healthy_streak += 1
+                if self.healthy_streak >= self.concurrency:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.healthy_streak = 0
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+# How many processes share each exchange's budget; see set_rate_share
+_rate_shares = {}
+
+
+def get_rate_limiter(exchange):
+    """
+    Return the process-wide rate limiter for an exchange, creating it on first use.
+
+    Args:
+        exchange (str): The exchange key, one of Config.RATE_LIMITS.
+
+    Returns:
+        RateLimiter: The limiter shared by every thread and coroutine talking to that exchange.
+    """
+    with _rate_limiters_lock:
+        if exchange not in _rate_limiters:
+            share_count = _rate_shares.get(exchange, 1)
+            _rate_limiters[exchange] = RateLimiter(
+                exchange,
+                Config.RATE_LIMITS[exchange] / share_count,
+                max(1, Config.RATE_LIMIT_MAX_CONCURRENCY // share_count)
+            )
+        return _rate_limiters[exchange]
+
+
+def set_rate_share(exchange, share_count):
+    """
+    Limit this process to its share of an exchange's budget when several processes scrape it.
+
+    Args:
+        exchange (str): The exchange key, one of Config.RATE_LIMITS.
+        share_count (int): The number of processes splitting the budget evenly.
+
+    Returns:
+        None
+    """
+    with _rate_limiters_lock:
+        if _rate_shares.get(exchange, 1) != share_count:
+            _rate_shares[exchange] = share_count
+            _rate_limiters.pop(exchange, None)
+
+
+def reset_rate_limiters():
+    """Forget every limiter and share, e.g. in a freshly forked worker process."""
+    global _rate_limiters_lock
+    _rate_limiters_lock = threading.Lock()
+    _rate_limiters.clear()
+    _rate_shares.clear()
+
+
+def ccxt_call(rate_limiter, request):
+    """
+    Run a blocking ccxt request through the limiter, retrying while the exchange throttles it.
+
+    Args:
+        rate_limiter (RateLimiter): The limiter of the exchange being called.
+        request (function): A zero-argument function that performs the ccxt call.
+
+    Returns:
+        The result of the request. Other errors, or throttling past CCXT_MAX_RETRIES, are raised.
+    """
+    for attempt in range(CCXT_MAX_RETRIES):
+        rate_limiter.acquire()
+        status = None
+        try:
+            result = request()
+            status = 200
+            return result
+        except Exception as e:
+            status = status_from_ccxt_error(e)
+            if status not in THROTTLED_STATUSES or attempt == CCXT_MAX_RETRIES - 1:
+                raise
+        finally:
+            rate_limiter.release(status)
+
+
+async def ccxt_call_async(rate_limiter, request):
+    """
+    Async counterpart of ccxt_call for ccxt.async_support exchanges.
+
+    Args:
+        rate_limiter (RateLimiter): The limiter of the exchange being called.
+        request (function): A zero-argument function that returns the ccxt coroutine.
+
+    Returns:
+        The result of the request. Other errors, or throttling past CCXT_MAX_RETRIES, are raised.
+    """
+    for attempt in range(CCXT_MAX_RETRIES):
+        await rate_limiter.acquire_async()
+        status = None
+        try:
+            result = await request()
+            status = 200
+            return result
+        except Exception as e:
+            status = status_from_ccxt_error(e)
+            if status not in THROTTLED_STATUSES or attempt == CCXT_MAX_RETRIES - 1:
+                raise
+        finally:
+            rate_limiter.release(status)
@@ -0,0 +1,39 @@
+import zlib
+from collections import namedtuple
+from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB
+from platforms.aevo import Aevo
+from platforms.bybit import Bybit
+from platforms.gateio import Gateio
+from platforms.hyperliquid import Hyperliquid
+
+# Everything a scraper run needs to know about one exchange, with a uniform
+# fetch_pages(instrument_name, start, end) signature. Timestamps are epoch
+# milliseconds for every exchange.
+ScraperSource = namedtuple(
+    'ScraperSource',
+    ['tag', 'model_class', 'instrument_names', 'fetch_windows', 'fetch_pages', 'process_data']
+)
+
+SCRAPER_SOURCES = {
+    'aevo': ScraperSource(
+        'AEVO', AevoDB, Aevo.fetch_aevo_instrument_names, Aevo.get_fetch_windows,
+        Aevo.fetch_aevo_pages, Aevo.process_aevo_data
+    ),
+    'bybit': ScraperSource(
+        'BYBIT', BybitDB, Bybit.fetch_bybit_instrument_names, Bybit.get_fetch_windows,
+        lambda name, start, end: Bybit.fetch_bybit_pages(name, start, until=end), Bybit.process_bybit_data
+    ),
+    'gateio': ScraperSource(
+        'GATE', GateioDB, Gateio.fetch_gateio_instrument_names, Gateio.get_fetch_windows,
+        lambda name, start, end: Gateio.fetch_gateio_pages(name, start, until=end), Gateio.process_gateio_data
+    ),
+    'hyperliquid': ScraperSource(
+        'HYPER', HyperliquidDB, Hyperliquid.fetch_hyperliquid_instrument_name, Hyperliquid.get_fetch_windows,
+        Hyperliquid.fetch_hyperliquid_pages, Hyperliquid.process_hyperliquid_data
+    ),
+}
+
+
+def shard_of(instrument_name, shard_count):
+    """Return the shard an instrument belongs to; stable across processes and restarts."""
+    return zlib.crc32(instrument_name.encode('utf-8')) % shard_count
@@ -7,9 +7,15 @@ from platforms.aevo import Aevo
 from platforms.bybit import Bybit
 from platforms.hyperliquid import Hyperliquid
 from platforms.gateio import Gateio
+from platforms.async_engine import AsyncEngine
+from platforms.backfill import Backfill
+from platforms.coordinator import Coordinator
 from dotenv import load_dotenv
 from app.logger import logger
 from app.config import Config
+from app.instrument_registry import instrument_registry
+from app.db.engine import init_db, log_pool_status
+from app.db.partitions import maintain_partitions
 
 # KOYEB PURPOSE
 from http.server import SimpleHTTPRequestHandler, HTTPServer
@@ -40,7 +46,7 @@ interval_mapping = {
     '5': '1y'
 }
 
-logger.info(f'BATCH_SIZE = {Config.BATCH_SIZE}')
+logger.info(f'FETCH_WORKERS = {Config.FETCH_WORKERS}, PIPELINE_QUEUE_SIZE = {Config.PIPELINE_QUEUE_SIZE}')
 
 def run_scrapers_sequential(interval):
     """Run the scrapers sequentially."""
@@ -67,6 +73,47 @@ def run_scrapers_parallel(interval):
             except Exception as e:
                 logger.error(f"Error occurred: {e}")
 
+def run_scrapers_async(interval):
+    """Run the scrapers concurrently on one asyncio event loop."""
+    logger.info("WILL SCRAPE: AEVO, BYBIT, HYPERLIQUID, GATEIO")
+    try:
+        AsyncEngine.run(interval)
+        logger.info("Async scrapers completed.")
+    except Exception as e:
+        logger.error(f"Error occurred in async scrapers: {e}")
+
+def run_scrapers_processes(interval):
+    """Run the scrapers as instrument shards on a pool of worker processes."""
+    logger.info("WILL SCRAPE: AEVO, BYBIT, HYPERLIQUID, GATEIO")
+    try:
+        Coordinator.run(interval)
+        logger.info("Process-pool scrapers completed.")
+    except Exception as e:
+        logger.error(f"Error occurred in process-pool scrapers: {e}")
+
+def run_backfill(interval):
+    """Load history for every exchange with the resumable, checkpointed backfill."""
+    logger.info("WILL BACKFILL: AEVO, BYBIT, HYPERLIQUID, GATEIO")
+    try:
+        results = Backfill.run_all(interval)
+        logger.info(f"Backfill completed: {results}")
+    except Exception as e:
+        logger.error(f"Error occurred in backfill: {e}")
+
+def refresh_instruments():
+    """Refresh the listed instruments of every exchange the scrapers have read."""
+    try:
+        instrument_registry.refresh_all()
+    except Exception as e:
+        logger.error(f"Error occurred while refreshing instruments: {e}")
+
+def run_partition_maintenance():
+    """Create the upcoming monthly partitions of the funding tables and drop the expired ones."""
+    try:
+        maintain_partitions()
+    except Exception as e:
+        logger.error(f"Error occurred during partition maintenance: {e}")
+
 def countdown_to_next_run(next_run_time):
     while True:
         now = datetime.now()
@@ -83,6 +130,10 @@ def schedule_scrapers():
         run_mode = run_scrapers_sequential
     elif EXECUTION_MODE == '2':
         run_mode = run_scrapers_parallel
+    elif EXECUTION_MODE == '3':
+        run_mode = run_scrapers_async
+    elif EXECUTION_MODE == '4':
+        run_mode = run_scrapers_processes
 
     if SCHEDULE_CHOICE == '1':
         schedule_interval = schedule.every(SCHEDULE_INTERVAL_SECONDS).seconds
@@ -90,18 +141,34 @@ def schedule_scrapers():
         schedule_interval = schedule.every().hour.at(f":{SCHEDULE_MINUTE}")
 
     schedule_interval.do(run_mode, selected_interval)
+    schedule.every(Config.INSTRUMENTS_REFRESH_SECONDS).seconds.do(refresh_instruments)
+    schedule.every(Config.PARTITION_MAINTENANCE_SECONDS).seconds.do(run_partition_maintenance)
+    schedule.every(Config.DB_POOL_REPORT_SECONDS).seconds.do(log_pool_status)
     return schedule_interval
 
 def main():
     first_run_interval = '1y' if FIRST_RUN == 'y' else interval_mapping.get(INTERVAL_CHOICE, '1h')
 
+    # Create missing tables, then make sure this month's partitions exist before the first rows are written
+    init_db()
+    run_partition_maintenance()
+
     logger.info(f"Starting the first run with interval: {first_run_interval}")
-    if EXECUTION_MODE == '1':
+    if FIRST_RUN == 'y':
+        logger.info("Running with BACKFILL mode")
+        run_backfill(first_run_interval)
+    elif EXECUTION_MODE == '1':
         logger.info("Running with SEQUENTIAL mode")
         run_scrapers_sequential(first_run_interval)
     elif EXECUTION_MODE == '2':
         logger.info("Running with PARALLEL mode")
         run_scrapers_parallel(first_run_interval)
+    elif EXECUTION_MODE == '3':
+        logger.info("Running with ASYNC mode")
+        run_scrapers_async(first_run_interval)
+    elif EXECUTION_MODE == '4':
+        logger.info("Running with MULTI-PROCESS mode")
+        run_scrapers_processes(first_run_interval)
     
     schedule_task = schedule_scrapers()
     next_run_time = schedule.next_run()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# The app binds its engine to DATABASE_URL when it is first imported, so the test database is
+# chosen before any app module is. TEST_DATABASE_URL may name a scratch PostgreSQL database
+# (the query plan tests need one); every table in it is emptied between tests.
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def clean_db(app):
+    """Empty every table around a test."""
+    from app.db.engine import engine
+    from app.db.models import Base
+
+    def empty():
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+    empty()
+    yield
+    empty()
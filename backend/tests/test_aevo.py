@@ -0,0 +1,135 @@
+import pytest
+
+from app.config import Config
+from app.db.models import AevoDB
+from app.db.operations import count_rows, get_latest_timestamps
+from app.utils import resume_since
+from platforms.aevo import NS_PER_MS, Aevo
+from platforms.pipeline import run_pipeline
+from platforms.rate_limiter import reset_rate_limiters
+
+HOUR = 3600 * 1000
+START = 1_700_000_000_000 // HOUR * HOUR
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = {'Retry-After': '0'}
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeAevo:
+    """Hourly AEVO funding history, newest first; fails(start, end) picks the requests answered with 503."""
+
+    def __init__(self):
+        self.fails = lambda start, end: False
+        self.requests = []
+
+    def session(self):
+        fake = self
+
+        class Session:
+            def get(self, url, params=None, headers=None, timeout=None):
+                return fake.get(params)
+
+        return Session()
+
+    def get(self, params):
+        start_time, end_time, limit = int(params['start_time']), int(params['end_time']), int(params['limit'])
+        self.requests.append((start_time // NS_PER_MS, end_time // NS_PER_MS))
+        if self.fails(start_time // NS_PER_MS, end_time // NS_PER_MS):
+            return FakeResponse(503)
+
+        newest = end_time // (HOUR * NS_PER_MS) * HOUR * NS_PER_MS
+        timestamps = range(newest, start_time - 1, -HOUR * NS_PER_MS)[:limit]
+        return FakeResponse(200, {
+            'funding_history': [[params['instrument_name'], str(timestamp), '0.0001', '1'] for timestamp in timestamps]
+        })
+
+
+@pytest.fixture
+def aevo(monkeypatch):
+    fake = FakeAevo()
+    monkeypatch.setattr('platforms.aevo.requests.Session', fake.session)
+    # No request budget, so the retries after a 503 don't wait for tokens
+    monkeypatch.setitem(Config.RATE_LIMITS, 'aevo', 0)
+    reset_rate_limiters()
+    yield fake
+    reset_rate_limiters()
+
+
+def scrape(start, end):
+    latest = get_latest_timestamps(AevoDB).get('BTC')
+    fetch_windows = [('BTC', resume_since(start, latest), end)]
+    return run_pipeline('AEVO', AevoDB, Aevo.process_aevo_data, fetch_windows, Aevo.fetch_aevo_pages)
+
+
+def test_window_slices_cover_the_window_oldest_first(monkeypatch):
+    monkeypatch.setattr(Config, 'AEVO_SLICE_HOURS', 48)
+
+    assert Aevo.get_window_slices(START, START + 100 * HOUR) == [
+        (START, START + 48 * HOUR),
+        (START + 48 * HOUR, START + 96 * HOUR),
+        (START + 96 * HOUR, START + 100 * HOUR),
+    ]
+    assert Aevo.get_window_slices(START, START) == []
+
+
+def test_pages_are_yielded_one_slice_at_a_time_oldest_first(aevo, monkeypatch):
+    monkeypatch.setattr(Config, 'AEVO_SLICE_HOURS', 48)
+
+    pages = list(Aevo.fetch_aevo_pages('BTC', START, START + 240 * HOUR, limit=20))
+
+    assert len(pages) == 5
+    # Each slice holds at most 48 hours of points, oldest first, and the slices follow each other
+    assert all(len({entry[1] for entry in page}) <= 49 for page in pages)
+    timestamps = [int(entry[1]) // NS_PER_MS for page in pages for entry in page]
+    assert timestamps == sorted(timestamps)
+    assert set(timestamps) == set(range(START, START + 241 * HOUR, HOUR))
+
+
+def test_failed_slice_keeps_the_older_slices_and_is_fetched_again(aevo, clean_db, monkeypatch):
+    monkeypatch.setattr(Config, 'AEVO_SLICE_HOURS', 48)
+    end = START + 240 * HOUR
+    # The fourth slice, from 144 to 192 hours, fails
+    aevo.fails = lambda start, end: START + 144 * HOUR < end <= START + 192 * HOUR
+
+    stats = scrape(START, end)
+
+    assert stats['failed'] == 1
+    # The three older slices are stored, nothing newer than them
+    assert get_latest_timestamps(AevoDB) == {'BTC': START + 144 * HOUR}
+    assert count_rows(AevoDB) == 145
+
+    aevo.fails = lambda start, end: False
+    aevo.requests.clear()
+    scrape(START, end)
+
+    assert count_rows(AevoDB) == 241
+    # The next run resumes after the stored slices
+    assert min(start for start, _ in aevo.requests) > START + 144 * HOUR
+
+
+def test_window_failing_part_way_stores_nothing_and_is_fetched_again(aevo, clean_db):
+    end = START + 72 * HOUR
+    # The newest page arrives, the older one below it keeps failing
+    aevo.fails = lambda start, end: end < START + 72 * HOUR
+
+    stats = scrape(START, end)
+
+    assert stats['failed'] == 1
+    assert count_rows(AevoDB) == 0
+
+    aevo.fails = lambda start, end: False
+    aevo.requests.clear()
+    scrape(START, end)
+
+    assert count_rows(AevoDB) == 73
+    assert aevo.requests[0] == (START, end)
@@ -0,0 +1,92 @@
+import pytest
+
+import platforms.backfill as backfill
+from app.config import Config
+from app.db.models import BybitDB
+from app.db.operations import count_rows, get_completed_slices
+from platforms.backfill import Backfill, BackfillSlice
+from platforms.sources import ScraperSource
+
+HOUR = 3600 * 1000
+DAY = 24 * HOUR
+START = 20_000 * DAY
+
+
+class FakeSource:
+    """Hourly funding of one instrument over a fixed window; failing(start) picks the slices that raise."""
+
+    def __init__(self, start, end):
+        self.window = ('BTC', start, end)
+        self.failing = lambda start: False
+        self.fetched = []
+
+    def fetch_pages(self, instrument_name, start, end):
+        self.fetched.append(start)
+        if self.failing(start):
+            raise ConnectionError('interrupted')
+        yield [[instrument_name, timestamp, 0.0001, None] for timestamp in range(start, end, HOUR)]
+
+    def source(self):
+        return ScraperSource('FAKE', BybitDB, lambda: ['BTC'], lambda interval, names: [self.window],
+                             self.fetch_pages, lambda page: page)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeSource(START, START + 4 * DAY)
+    monkeypatch.setattr(backfill, 'SCRAPER_SOURCES', {'fake': fake.source()})
+    monkeypatch.setattr(Config, 'BACKFILL_SLICE_DAYS', 1)
+    # One worker, so the slices are fetched one after the other, newest first
+    monkeypatch.setattr(Config, 'BACKFILL_WORKERS', 1)
+    return fake
+
+
+def test_slices_are_aligned_to_the_grid_newest_first():
+    slices = Backfill.build_slices([('BTC', START + 5 * HOUR, START + 2 * DAY + 3 * HOUR)], DAY)
+
+    assert slices == [
+        BackfillSlice('BTC', START + 2 * DAY, START + 2 * DAY + 3 * HOUR, False),
+        BackfillSlice('BTC', START + DAY, START + 2 * DAY, True),
+        BackfillSlice('BTC', START, START + DAY, True),
+    ]
+
+
+def test_slices_of_several_instruments_are_ordered_by_start():
+    slices = Backfill.build_slices([('BTC', START, START + 2 * DAY), ('ETH', START + DAY, START + 2 * DAY)], DAY)
+
+    assert [s.start for s in slices] == [START + DAY, START + DAY, START]
+    assert sorted(s.instrument_name for s in slices[:2]) == ['BTC', 'ETH']
+    assert Backfill.build_slices([('BTC', START, START)], DAY) == []
+
+
+def test_interrupted_backfill_resumes_from_its_checkpoints(fake, clean_db):
+    # Everything after the newest slice fails, as if the run had been stopped there
+    fake.failing = lambda start: start < START + 3 * DAY
+
+    stats = Backfill.run('fake')
+
+    assert stats['completed'] == 1 and stats['failed'] == 3
+    assert get_completed_slices('fake') == {('BTC', START + 3 * DAY)}
+    assert count_rows(BybitDB) == 24
+
+    fake.failing = lambda start: False
+    fake.fetched.clear()
+    stats = Backfill.run('fake')
+
+    # The finished slice isn't fetched again
+    assert stats['skipped'] == 1 and stats['completed'] == 3
+    assert sorted(fake.fetched) == [START, START + DAY, START + 2 * DAY]
+    assert count_rows(BybitDB) == 4 * 24
+
+
+def test_open_slice_is_fetched_on_every_run(fake, clean_db):
+    fake.window = ('BTC', START, START + DAY + 5 * HOUR)
+
+    Backfill.run('fake')
+    fake.fetched.clear()
+    stats = Backfill.run('fake')
+
+    # The head slice still receives data, so only the closed one is checkpointed
+    assert get_completed_slices('fake') == {('BTC', START)}
+    assert fake.fetched == [START + DAY]
+    assert stats['skipped'] == 1
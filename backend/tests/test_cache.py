@@ -0,0 +1,188 @@
+import threading
+import time
+
+import jwt
+import pytest
+
+import app.views.funding_rates as funding_rates
+from app.cache import CacheEntry, LocalStore, ResponseCache
+
+
+class FakeGeneration:
+    """In-memory generation counter that counts how often it is read."""
+
+    def __init__(self):
+        self.generation = 0
+        self.reads = 0
+
+    def current(self):
+        self.reads += 1
+        return self.generation
+
+    def bump(self):
+        self.generation += 1
+        return self.generation
+
+
+class Counter:
+    """A compute function returning how many times it was called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def make_cache(generation, ttl_seconds=60, stale_seconds=30, check_seconds=0):
+    return ResponseCache(LocalStore(100), generation, ttl_seconds, stale_seconds, check_seconds)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_miss_then_hit():
+    cache, compute = make_cache(FakeGeneration()), Counter()
+
+    assert cache.get_or_compute('key', compute) == (1, 'MISS')
+    assert cache.get_or_compute('key', compute) == (1, 'HIT')
+    assert compute.calls == 1
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_disabled_cache_bypasses_the_store():
+    cache, compute = make_cache(FakeGeneration(), ttl_seconds=0), Counter()
+
+    assert cache.get_or_compute('key', compute) == (1, 'BYPASS')
+    assert cache.get_or_compute('key', compute) == (2, 'BYPASS')
+
+
+def test_new_generation_serves_stale_while_revalidating():
+    generation = FakeGeneration()
+    cache, compute = make_cache(generation), Counter()
+    cache.get_or_compute('key', compute)
+
+    generation.bump()
+    assert cache.get_or_compute('key', compute) == (1, 'STALE')
+
+    # One background thread recomputes the entry under the new generation
+    wait_for(lambda: cache.stats['refreshes'] == 1)
+    assert cache.get_or_compute('key', compute) == (2, 'HIT')
+    assert compute.calls == 2
+
+
+def test_bump_invalidates_entries_without_waiting_for_the_next_check():
+    generation = FakeGeneration()
+    cache, compute = make_cache(generation, check_seconds=60), Counter()
+    cache.get_or_compute('key', compute)
+
+    cache.bump()
+
+    assert generation.generation == 1
+    assert cache.current_generation() == 1
+    assert cache.get_or_compute('key', compute)[1] != 'HIT'
+
+
+def test_entry_past_its_stale_window_is_recomputed():
+    cache, compute = make_cache(FakeGeneration(), ttl_seconds=60, stale_seconds=30), Counter()
+    cache.store.set('key', CacheEntry('old', 0, time.time() - 91), 90)
+
+    assert cache.get_or_compute('key', compute) == (1, 'MISS')
+
+
+def test_generation_is_read_at_most_every_check_seconds():
+    generation = FakeGeneration()
+    cache = make_cache(generation, check_seconds=60)
+
+    for _ in range(5):
+        cache.get_or_compute('key', Counter())
+
+    assert generation.reads == 1
+
+
+def test_concurrent_misses_compute_once_per_key():
+    cache = make_cache(FakeGeneration())
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Hold the first computation until the other requests had time to queue behind it
+    wait_for(lambda: calls)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ['value'] * 8
+
+
+def test_compute_error_is_raised_and_not_cached():
+    cache = make_cache(FakeGeneration())
+
+    def compute():
+        raise RuntimeError('database down')
+
+    with pytest.raises(RuntimeError, match='database down'):
+        cache.get_or_compute('key', compute)
+    assert cache.store.get('key') is None
+
+
+def test_local_store_evicts_the_least_recently_used_entry():
+    store = LocalStore(2)
+    store.set('a', 1, 60)
+    store.set('b', 2, 60)
+    store.get('a')
+    store.set('c', 3, 60)
+
+    assert store.get('b') is None
+    assert store.get('a') == 1 and store.get('c') == 3
+
+
+@pytest.fixture
+def aggregated_funding(app, monkeypatch):
+    """A client of /aggregated-funding whose pages come from a counting fake."""
+    calls = []
+
+    def scrapper_with_pagination(page, limit, time, sort_order, coin, cursor, derived):
+        calls.append(page)
+        meta = {'page': page, 'nextCursor': 'next', 'date': 'computed', 'queryMs': 12.5}
+        return {'data': [{'coin': 'BTC'}], 'meta': meta}
+
+    monkeypatch.setattr(funding_rates, 'scrapper_with_pagination', scrapper_with_pagination)
+    monkeypatch.setattr(funding_rates, 'response_cache', make_cache(FakeGeneration()))
+    token = jwt.encode({'username': 'test'}, app.config['SECRET_KEY'], algorithm='HS256')
+    client = app.test_client()
+
+    def get(**params):
+        return client.get('/api/funding-rates/aggregated-funding', query_string=params, headers={'Authorization': f'Bearer {token}'})
+
+    get.calls = calls
+    return get
+
+
+def test_aggregated_funding_caches_the_page_but_not_the_request_fields(aggregated_funding):
+    miss = aggregated_funding(page=1)
+    hit = aggregated_funding(page=1)
+
+    assert aggregated_funding.calls == [1]
+    assert miss.headers['X-Cache'] == 'MISS' and hit.headers['X-Cache'] == 'HIT'
+    assert hit.json['data'] == miss.json['data'] == [{'coin': 'BTC'}]
+    assert hit.json['meta']['nextCursor'] == 'next'
+    # The query time is that of the request's own query, the date is the request's
+    assert miss.json['meta']['queryMs'] == 12.5
+    assert hit.json['meta']['queryMs'] == 0
+    assert hit.json['meta']['date'] != 'computed'
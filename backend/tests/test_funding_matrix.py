@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+
+from app.services.funding_matrix import YEAR_MS, FundingMatrix
+
+DAY = 24 * 3600 * 1000
+EXCHANGES = ['binance', 'bybit', 'okx']
+NAN = float('nan')
+
+
+def matrix_of(rows, window_ms=DAY, latest_exchanges=()):
+    return FundingMatrix.from_rows(rows, EXCHANGES, window_ms, latest_exchanges)
+
+
+def test_missing_venues_are_left_out_of_the_spread():
+    matrix = matrix_of([
+        ('BTC', 0.01, None, 0.03),
+        ('ETH', None, 0.02, None),
+        ('SOL', None, None, None),
+        ('XRP', -0.01, 0.04, 0.0),
+    ])
+
+    assert matrix.counts.tolist() == [2, 1, 0, 3]
+    spread = matrix.spread
+    assert math.isclose(spread[0], 0.02)
+    # One venue or none has no spread
+    assert np.isnan(spread[1]) and np.isnan(spread[2])
+    assert math.isclose(spread[3], 0.05)
+
+
+def test_long_and_short_venues_skip_missing_values():
+    matrix = matrix_of([
+        ('BTC', None, 0.05, -0.02),
+        ('ETH', None, 0.02, None),
+        ('SOL', None, None, None),
+    ])
+
+    assert [matrix.venue(i) for i in matrix.long_index] == ['okx', 'bybit', None]
+    assert [matrix.venue(i) for i in matrix.short_index] == ['bybit', 'bybit', None]
+
+
+def test_annualized_scales_window_sums_and_hides_latest_rates():
+    matrix = matrix_of([('BTC', 0.01, None, 0.03)], window_ms=7 * DAY, latest_exchanges=['okx'])
+
+    annualized = matrix.annualized[0]
+    assert math.isclose(annualized[0], 0.01 * YEAR_MS / (7 * DAY))
+    # Missing stays missing, and a latest rate isn't a window sum to scale
+    assert np.isnan(annualized[1])
+    assert np.isnan(annualized[2])
+
+
+def test_annualized_without_a_window_is_all_missing():
+    assert np.isnan(matrix_of([('BTC', 0.01, 0.02, 0.03)], window_ms=0).annualized).all()
+
+
+def test_rank_by_spread_puts_the_widest_first_and_ties_by_name():
+    # Binary fractions, so equal spreads compare equal
+    matrix = matrix_of([
+        ('SOL', 0.0, 0.25, None),
+        ('ETH', 0.0, None, 0.5),
+        ('ADA', None, None, 1.0),
+        ('BTC', 0.25, 0.75, None),
+        ('AVAX', 0.5, NAN, 0.25),
+    ])
+
+    ranked = [matrix.symbols[i] for i in matrix.rank_by_spread()]
+
+    # BTC and ETH tie on 0.5, AVAX and SOL on 0.25; ADA has a single venue and no spread
+    assert ranked == ['BTC', 'ETH', 'AVAX', 'SOL']
+
+
+def test_rank_by_spread_filters_and_limits():
+    matrix = matrix_of([
+        ('SOL', 0.0, 0.01, None),
+        ('ETH', 0.0, None, 0.03),
+        ('BTC', 0.01, 0.04, None),
+    ])
+
+    assert [matrix.symbols[i] for i in matrix.rank_by_spread(min_spread=0.02)] == ['BTC', 'ETH']
+    assert [matrix.symbols[i] for i in matrix.rank_by_spread(top=1)] == ['BTC']
+
+
+def test_empty_matrix():
+    matrix = matrix_of([])
+
+    assert len(matrix) == 0
+    assert matrix.rank_by_spread().tolist() == []
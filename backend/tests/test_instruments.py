@@ -0,0 +1,66 @@
+import pytest
+
+from app.db import operations
+from app.db.models import AevoDB, BybitDB, EXCHANGE_BITS, Instrument
+from app.db.operations import Session, save_to_database, search_instruments
+
+HOUR = 3600 * 1000
+START = 480_000 * HOUR
+
+
+@pytest.fixture
+def logos(monkeypatch):
+    """Counts the logo lookups, which are only made for coins not in the table yet."""
+    lookups = []
+
+    def get_logo_url(symbol):
+        lookups.append(symbol)
+        return f'https://logos/{symbol}.png', f'{symbol} coin'
+
+    monkeypatch.setattr(operations, 'get_logo_url', get_logo_url)
+    return lookups
+
+
+def save(model_class, instrument_name, *hours):
+    save_to_database([[instrument_name, START + hour * HOUR, 0.0001, None] for hour in hours], model_class)
+
+
+def instrument(symbol):
+    with Session() as session:
+        return session.get(Instrument, symbol)
+
+
+def test_saved_rows_widen_the_seen_range_and_add_the_exchange(clean_db, logos):
+    save(BybitDB, 'BTC', 10, 20)
+    save(AevoDB, 'BTC', 5)
+    save(BybitDB, 'BTC', 30, 15)
+
+    btc = instrument('BTC')
+    assert (btc.first_seen, btc.last_seen) == (START + 5 * HOUR, START + 30 * HOUR)
+    assert btc.exchanges == EXCHANGE_BITS['bybit'] | EXCHANGE_BITS['aevo']
+    assert (btc.name, btc.logo_url) == ('BTC coin', 'https://logos/BTC.png')
+    assert logos == ['BTC']
+
+
+def test_rows_already_stored_leave_the_instrument_alone(clean_db, logos):
+    save(BybitDB, 'ETH', 10, 20)
+    # Only inserted rows reach the instruments table, so an older duplicate can't widen the range
+    with Session() as session:
+        session.query(Instrument).filter(Instrument.symbol == 'ETH').update({'first_seen': START + 15 * HOUR})
+        session.commit()
+
+    save(BybitDB, 'ETH', 10)
+
+    assert instrument('ETH').first_seen == START + 15 * HOUR
+
+
+def test_search_matches_part_of_the_symbol_sorted_by_symbol(clean_db, logos):
+    for symbol in ['WBTC', 'ETH', 'BTCDOM', 'BTC', 'kPEPE', '1000_SATS', 'SATS']:
+        save(BybitDB, symbol, 1)
+
+    assert [symbol for symbol, _, _ in search_instruments('btc')] == ['BTC', 'BTCDOM', 'WBTC']
+    assert [symbol for symbol, _, _ in search_instruments('PEPE')] == ['kPEPE']
+    # LIKE wildcards in the keyword are matched literally
+    assert [symbol for symbol, _, _ in search_instruments('_SATS')] == ['1000_SATS']
+    assert search_instruments('BTC')[0] == ('BTC', 'BTC coin', 'https://logos/BTC.png')
+    assert len(search_instruments()) == 7
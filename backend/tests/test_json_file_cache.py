@@ -0,0 +1,30 @@
+import json
+import os
+
+from app.utils import JsonFileCache
+
+
+def write(path, content, mtime):
+    path.write_text(json.dumps(content), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_file_is_parsed_once_until_it_changes(tmp_path):
+    path = tmp_path / 'coins.json'
+    write(path, ['BTC'], 1_700_000_000)
+    cache, transforms = JsonFileCache(), []
+
+    def transform(data):
+        transforms.append(data)
+        return set(data)
+
+    assert cache.get(str(path), transform) == {'BTC'}
+    assert cache.get(str(path), transform) == {'BTC'}
+    assert len(transforms) == 1
+
+    # Same size, so only the new modification time tells the cache the file changed
+    write(path, ['ETH'], 1_700_000_060)
+
+    assert cache.get(str(path), transform) == {'ETH'}
+    assert cache.get(str(path)) == ['ETH']
+    assert len(transforms) == 2
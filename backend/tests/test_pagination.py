@@ -0,0 +1,115 @@
+import base64
+
+import pytest
+
+from app.db.models import AevoDB, BybitDB, GateioDB, HyperliquidDB, HourlyFundingRollup, DailyFundingRollup
+from app.db.operations import save_to_database, get_aggregated_funding_page
+from app.utils import encode_cursor, decode_cursor
+
+HOUR = HourlyFundingRollup.bucket_ms
+START = 20_000 * DailyFundingRollup.bucket_ms
+SINCE, UNTIL = START, START + 3 * 24 * HOUR
+
+
+def test_cursor_round_trip():
+    token = encode_cursor((3, 'BTC'))
+
+    assert decode_cursor(token) == (3, 'BTC')
+    # URL-safe and without padding, so it can be sent as a query parameter as is
+    assert '=' not in token and '+' not in token and '/' not in token
+
+
+@pytest.mark.parametrize('token', [
+    '',
+    'not a cursor!',
+    base64.urlsafe_b64encode(b'{not json').decode('ascii'),
+    base64.urlsafe_b64encode(b'{"count": 3}').decode('ascii'),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+])
+def test_invalid_cursor_is_rejected(token):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(token)
+
+
+def store(model_class, instrument_names, start, hours=3):
+    rows = [
+        [instrument_name, start + hour * HOUR, 0.0001 * (index + 1), None]
+        for index, instrument_name in enumerate(instrument_names)
+        for hour in range(hours)
+    ]
+    save_to_database(rows, model_class)
+
+
+@pytest.fixture
+def funding(clean_db):
+    store(BybitDB, ['BTC', 'ETH', 'SOL', 'DOGE', 'BTCDOM'], SINCE + HOUR)
+    store(AevoDB, ['BTC', 'ETH', 'SOL'], SINCE + HOUR)
+    store(GateioDB, ['BTC', 'ETH', 'kPEPE'], SINCE + HOUR)
+    # Hyperliquid only has older data, so its latest rates stand in for the window
+    store(HyperliquidDB, ['BTC', 'BTCDOM'], SINCE - 10 * HOUR)
+
+
+def keyset_pages(limit, sort_order):
+    rows, after = [], None
+    while True:
+        page, after, _ = get_aggregated_funding_page(SINCE, UNTIL, limit, after=after, sort_order=sort_order)
+        rows.extend(page)
+        if after is None:
+            return rows
+
+
+def offset_pages(limit, sort_order):
+    rows, offset = [], 0
+    while True:
+        page, _, _ = get_aggregated_funding_page(SINCE, UNTIL, limit, offset=offset, sort_order=sort_order)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        offset += limit
+
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('limit', [1, 2, 4, 10])
+def test_keyset_pages_match_offset_pages(funding, sort_order, limit):
+    everything, _, _ = get_aggregated_funding_page(SINCE, UNTIL, 100, sort_order=sort_order)
+
+    assert len(everything) == 6
+    assert keyset_pages(limit, sort_order) == offset_pages(limit, sort_order) == everything
+
+
+def test_pages_order_by_exchange_count_then_name(funding):
+    rows, _, latest_exchanges = get_aggregated_funding_page(SINCE, UNTIL, 100)
+
+    assert [(row[0], row[3]) for row in rows] == [
+        ('BTC', 4), ('ETH', 3), ('BTCDOM', 2), ('SOL', 2), ('DOGE', 1), ('kPEPE', 1)
+    ]
+    assert latest_exchanges == ['hyperliquid']
+
+
+@pytest.mark.parametrize('keyword, expected', [
+    ('BTC', 'BTC'),
+    ('btc', 'BTC'),
+    ('KPEPE', 'kPEPE'),
+    ('kpepe', 'kPEPE'),
+])
+def test_keyword_is_a_case_insensitive_exact_match(funding, keyword, expected):
+    everything, _, _ = get_aggregated_funding_page(SINCE, UNTIL, 100)
+    rows, next_key, _ = get_aggregated_funding_page(SINCE, UNTIL, 10, keyword=keyword)
+
+    # The same window sums as without the keyword, and neither they nor the latest-rate
+    # fallback match BTCDOM for BTC
+    assert rows == [row for row in everything if row[0] == expected]
+    assert next_key is None
+
+
+def test_keyword_matches_the_latest_rate_fallback(funding):
+    rows, _, latest_exchanges = get_aggregated_funding_page(SINCE, UNTIL, 10, keyword='btcdom')
+
+    assert [row[0] for row in rows] == ['BTCDOM']
+    assert rows[0][3] == 2
+    # Only Bybit has BTCDOM in the window; Hyperliquid gives its latest rate
+    assert 'hyperliquid' in latest_exchanges and 'bybit' not in latest_exchanges
+
+
+def test_unknown_keyword_gives_no_rows(funding):
+    assert get_aggregated_funding_page(SINCE, UNTIL, 10, keyword='BT') == ([], None, [])
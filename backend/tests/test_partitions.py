@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from app.db.models import AevoDB, BybitDB, DailyFundingRollup, HourlyFundingRollup, Instrument
+from app.db.operations import Session, count_rows, save_to_database
+from app.db.partitions import add_months, maintain_partitions, month_bounds
+
+HOUR = HourlyFundingRollup.bucket_ms
+DAY = DailyFundingRollup.bucket_ms
+
+
+def save(model_class, instrument_name, start, hours=3):
+    save_to_database([[instrument_name, start + hour * HOUR, 0.0001, None] for hour in range(hours)], model_class)
+
+
+def test_expired_history_is_removed_from_the_rollups_and_instruments(clean_db):
+    now = datetime.now(timezone.utc)
+    # With one month of retention, everything before the start of last month expires
+    retained = month_bounds(*add_months(now.year, now.month, -1))[0]
+    expired = month_bounds(*add_months(now.year, now.month, -3))[0]
+    save(BybitDB, 'BTC', expired)
+    save(AevoDB, 'BTC', retained + DAY)
+    save(BybitDB, 'ETH', expired)
+
+    maintain_partitions(months_ahead=0, retention_months=1)
+
+    assert count_rows(BybitDB) == 0 and count_rows(AevoDB) == 3
+    with Session() as session:
+        for rollup_class in (HourlyFundingRollup, DailyFundingRollup):
+            assert session.query(rollup_class).filter(rollup_class.bucket_start < retained).count() == 0
+        instruments = {symbol: (first, last) for symbol, first, last in session.query(
+            Instrument.symbol, Instrument.first_seen, Instrument.last_seen
+        )}
+
+    # BTC starts at its oldest row left, ETH has no rows left at all
+    assert instruments == {'BTC': (retained + DAY, retained + DAY + 2 * HOUR)}
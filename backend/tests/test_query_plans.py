@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.engine import engine
+from app.db.operations import Session
+from benchmarks.check_query_plans import build_queries, check_queries
+
+pytestmark = pytest.mark.skipif(
+    engine.dialect.name != 'postgresql',
+    reason='Query plans can only be checked on PostgreSQL; set TEST_DATABASE_URL to a scratch database'
+)
+
+
+# '1h' reads the raw table only, '7d' the hourly rollups and '1M' the daily ones
+@pytest.mark.parametrize('timeframe', ['1h', '7d', '1M'])
+def test_funding_and_rollup_queries_use_indexes(app, timeframe):
+    with Session() as session:
+        # Without seq scans on the table the planner only falls back to one if no index applies
+        session.execute(text('SET LOCAL enable_seqscan = off'))
+        problems = check_queries(session, build_queries(session, timeframe, 'BTC'), require_index_only=False)
+        session.rollback()
+
+    assert problems == []
@@ -0,0 +1,132 @@
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import Config
+from platforms.rate_limiter import POLL_INTERVAL, RateLimiter, parse_retry_after
+
+
+def take(limiter, count):
+    """Reserve count requests without waiting; the limiter must grant every one."""
+    for _ in range(count):
+        assert limiter._reserve() == 0
+
+
+def test_throttled_response_halves_concurrency_and_pauses():
+    limiter = RateLimiter('test', 100, max_concurrency=8)
+    take(limiter, 1)
+
+    limiter.release(429, retry_after='5')
+
+    assert limiter.concurrency == 4
+    assert limiter.tokens == 0
+    assert limiter.blocked_until - time.monotonic() == pytest.approx(5, abs=0.5)
+    # Nothing is sent until the pause is over
+    assert limiter._reserve() == pytest.approx(5, abs=0.5)
+
+
+def test_concurrent_throttled_responses_halve_concurrency_once():
+    limiter = RateLimiter('test', 100, max_concurrency=8)
+    take(limiter, 4)
+
+    # Four requests in flight are all answered 429 by the same push back
+    for _ in range(4):
+        limiter.release(429, retry_after='5')
+
+    assert limiter.concurrency == 4
+    assert limiter.in_flight == 0
+    assert limiter.blocked_until - time.monotonic() == pytest.approx(5, abs=0.5)
+
+
+def test_throttled_response_after_the_pause_halves_again():
+    limiter = RateLimiter('test', 100, max_concurrency=8)
+    limiter.release(429, retry_after='5')
+    limiter.blocked_until = time.monotonic()  # The pause is over
+
+    limiter.release(429, retry_after='5')
+
+    assert limiter.concurrency == 2
+
+
+def test_throttled_response_without_retry_after_uses_the_cooldown():
+    limiter = RateLimiter('test', 100, max_concurrency=8)
+    take(limiter, 1)
+
+    limiter.release(503)
+
+    assert limiter.blocked_until - time.monotonic() == pytest.approx(Config.RATE_LIMIT_COOLDOWN, abs=0.5)
+
+
+def test_concurrency_never_drops_below_the_minimum():
+    limiter = RateLimiter('test', 100, max_concurrency=8, min_concurrency=2)
+
+    for _ in range(5):
+        limiter.release(429, retry_after='0')
+
+    assert limiter.concurrency == 2
+
+
+def test_concurrency_grows_by_one_after_a_window_of_healthy_responses():
+    limiter = RateLimiter('test', 100, max_concurrency=8)
+    limiter.release(429, retry_after='0')
+    assert limiter.concurrency == 4
+
+    for _ in range(3):
+        limiter.release(200)
+    assert limiter.concurrency == 4
+    limiter.release(200)
+    assert limiter.concurrency == 5
+
+    # Server errors other than 503 neither grow nor shrink the window
+    for _ in range(10):
+        limiter.release(500)
+    assert limiter.concurrency == 5
+
+
+def test_concurrency_is_capped_at_the_maximum():
+    limiter = RateLimiter('test', 100, max_concurrency=2)
+
+    for _ in range(10):
+        limiter.release(200)
+
+    assert limiter.concurrency == 2
+
+
+def test_full_concurrency_window_makes_requests_wait():
+    limiter = RateLimiter('test', 100, max_concurrency=2)
+    take(limiter, 2)
+
+    assert limiter._reserve() == POLL_INTERVAL
+    limiter.release(200)
+    assert limiter._reserve() == 0
+
+
+def test_empty_bucket_waits_for_the_next_token():
+    limiter = RateLimiter('test', 2, max_concurrency=10)
+    take(limiter, 2)
+
+    # Two requests per second: the next token is about half a second away
+    assert limiter._reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_zero_rate_means_no_request_budget():
+    limiter = RateLimiter('test', 0, max_concurrency=50)
+
+    take(limiter, 50)
+    assert limiter._reserve() == POLL_INTERVAL
+
+
+def test_negative_rate_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter('test', -1, max_concurrency=1)
+
+
+def test_parse_retry_after():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert parse_retry_after('2.5') == 2.5
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
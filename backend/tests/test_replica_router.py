@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.db import operations
+from app.db.engine import ReplicaRouter, create_db_engine
+from app.db.models import Instrument
+
+UPDATED = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def create_database(path, symbol, updated_at):
+    """A SQLite database holding one instrument, updated at updated_at."""
+    db_engine = create_db_engine(f'sqlite:///{path}')
+    Instrument.__table__.create(db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(insert(Instrument).values(
+            symbol=symbol, exchanges=1, first_seen=0, last_seen=0, updated_at=updated_at
+        ))
+    return db_engine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    db_engine = create_database(tmp_path / 'primary.db', 'PRIMARY', UPDATED)
+    yield db_engine
+    db_engine.dispose()
+
+
+def replica_of(tmp_path, lag_seconds):
+    return create_database(tmp_path / 'replica.db', 'REPLICA', UPDATED - timedelta(seconds=lag_seconds))
+
+
+def test_replica_within_the_lag_serves_reads(tmp_path, primary):
+    replica = replica_of(tmp_path, lag_seconds=10)
+    router = ReplicaRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+
+    assert router.read_engine() is replica
+    assert router.lag_seconds == 10
+
+
+def test_lagging_replica_falls_back_to_the_primary(tmp_path, primary):
+    replica = replica_of(tmp_path, lag_seconds=120)
+    router = ReplicaRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+
+    assert router.read_engine() is primary
+    assert router.lag_seconds == 120
+
+
+def test_failed_lag_check_falls_back_to_the_primary(tmp_path, primary):
+    # The replica has no instruments table, so measuring its lag fails
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    router = ReplicaRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+
+    assert router.read_engine() is primary
+    assert router.lag_seconds is None
+
+
+def test_lag_is_checked_again_after_check_seconds(tmp_path, primary):
+    replica = replica_of(tmp_path, lag_seconds=10)
+    router = ReplicaRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+    assert router.read_engine() is replica
+
+    with primary.begin() as connection:
+        connection.execute(Instrument.__table__.update().values(updated_at=UPDATED + timedelta(minutes=5)))
+
+    # The last decision is reused until check_seconds have passed
+    assert router.read_engine() is replica
+    router.checked_at -= 60
+    assert router.read_engine() is primary
+
+
+def test_without_a_replica_reads_go_to_the_primary(primary):
+    router = ReplicaRouter(primary, None, max_lag_seconds=30, check_seconds=60)
+
+    assert router.read_engine() is primary
+
+
+def test_read_session_uses_the_routed_engine(tmp_path, primary, monkeypatch):
+    replica = replica_of(tmp_path, lag_seconds=10)
+    router = ReplicaRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+    monkeypatch.setattr(operations, 'replica_router', router)
+
+    assert operations.get_unique_tickers_from_all_exchanges() == ['REPLICA']
+
+    router.max_lag_seconds = 5
+    router.checked_at -= 60
+    assert operations.get_unique_tickers_from_all_exchanges() == ['PRIMARY']
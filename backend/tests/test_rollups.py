@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import func
+
+from app.db.models import AevoDB, BybitDB, HourlyFundingRollup, DailyFundingRollup
+from app.db.operations import Session, SaveResult, save_to_database, build_base_query, split_window
+
+HOUR = HourlyFundingRollup.bucket_ms
+DAY = DailyFundingRollup.bucket_ms
+START = 20_000 * DAY  # Midnight UTC, so the rows cover whole and partial days
+
+
+def funding_rows(instrument_names, start, end, step):
+    """Rows every step milliseconds, with rates that differ per row so misplaced rows change the sums."""
+    return [
+        [instrument_name, timestamp, (index % 7 - 3) / 10_000 + offset / 100_000, None]
+        for offset, instrument_name in enumerate(instrument_names)
+        for index, timestamp in enumerate(range(start, end, step))
+    ]
+
+
+def window_sums(model_class, since, until):
+    with Session() as session:
+        return dict(build_base_query(session, model_class, since, until, None).all())
+
+
+def raw_sums(model_class, since, until):
+    with Session() as session:
+        return dict(
+            session.query(model_class.instrument_name, func.sum(model_class.funding_rate) * 100)
+            .filter(model_class.timestamp >= since, model_class.timestamp <= until)
+            .group_by(model_class.instrument_name)
+            .all()
+        )
+
+
+@pytest.fixture
+def stored_rows(clean_db):
+    # 25 minutes apart, so buckets hold different numbers of rows; two exchanges keep their rollups apart
+    save_to_database(funding_rows(['BTC', 'ETH'], START, START + 3 * DAY, 25 * 60 * 1000), BybitDB)
+    save_to_database(funding_rows(['BTC'], START, START + 3 * DAY, HOUR), AevoDB)
+
+
+@pytest.mark.parametrize('since, until', [
+    (START + 7 * 60 * 1000, START + 2 * DAY + 13 * HOUR + 5 * 60 * 1000),  # Partial hours and days at both edges
+    (START + 30 * 60 * 1000, START + 50 * 60 * 1000),  # Inside a single hour
+    (START + HOUR, START + 26 * HOUR - 1),  # Whole hours, no whole day
+    (START, START + 3 * DAY),  # Whole days, the end inclusive
+    (START + DAY - 1, START + DAY),  # The last point of one day and the first of the next
+])
+def test_window_sums_match_raw_rows(stored_rows, since, until):
+    for model_class in (BybitDB, AevoDB):
+        expected = raw_sums(model_class, since, until)
+        assert window_sums(model_class, since, until) == pytest.approx(expected)
+
+
+def test_split_window_covers_every_millisecond_once():
+    since, end = START + 7 * 60 * 1000, START + 2 * DAY + 13 * HOUR
+    raw_ranges, hourly_ranges, daily_ranges = split_window(since, end)
+
+    ranges = sorted(raw_ranges + hourly_ranges + daily_ranges)
+    assert ranges[0][0] == since and ranges[-1][1] == end
+    assert all(previous[1] == following[0] for previous, following in zip(ranges, ranges[1:]))
+    assert all(start % HOUR == 0 and stop % HOUR == 0 for start, stop in hourly_ranges)
+    assert all(start % DAY == 0 and stop % DAY == 0 for start, stop in daily_ranges)
+
+
+def test_save_counts_inserted_and_skipped_rows(clean_db):
+    rows = funding_rows(['BTC'], START, START + 10 * HOUR, HOUR)
+
+    assert save_to_database(rows[:6], BybitDB) == SaveResult(6, 0)
+    # Four new rows and two already stored ones, written in statements of three rows
+    assert save_to_database(rows[4:], BybitDB, chunk_size=3) == SaveResult(4, 2)
+    assert save_to_database(rows, BybitDB) == SaveResult(0, 10)
+
+
+def test_duplicate_inserts_are_not_added_to_the_rollups(stored_rows):
+    since, until = START + 7 * 60 * 1000, START + 2 * DAY + 13 * HOUR
+    before = window_sums(BybitDB, since, until)
+
+    rows = funding_rows(['BTC', 'ETH'], START, START + 3 * DAY, 25 * 60 * 1000)
+    assert save_to_database(rows, BybitDB) == SaveResult(0, len(rows))
+
+    assert window_sums(BybitDB, since, until) == pytest.approx(before)
+    with Session() as session:
+        counts = dict(
+            session.query(HourlyFundingRollup.instrument_name, func.sum(HourlyFundingRollup.funding_count))
+            .filter(HourlyFundingRollup.exchange == 'bybit')
+            .group_by(HourlyFundingRollup.instrument_name)
+            .all()
+        )
+    assert counts == {'BTC': len(rows) // 2, 'ETH': len(rows) // 2}
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import app.services.spread_screener as spread_screener
+from app.db.models import FUNDING_MODELS
+from app.services.spread_screener import RollingFundingWindow, WINDOWS
+
+HOUR = 3600 * 1000
+START = 480_000 * HOUR
+EXCHANGES = list(FUNDING_MODELS)
+UPDATED = datetime(2026, 1, 1)
+
+
+class FakeRollups:
+    """Stands in for get_rollup_buckets: returns the buckets queued since the last read."""
+
+    def __init__(self):
+        self.pending = []
+        self.reads = []
+
+    def __call__(self, rollup_class, since, updated_since=None):
+        self.reads.append((since, updated_since))
+        buckets, self.pending = self.pending, []
+        return [bucket for bucket in buckets if bucket[2] >= since]
+
+
+@pytest.fixture
+def rollups(monkeypatch):
+    fake = FakeRollups()
+    monkeypatch.setattr(spread_screener, 'get_rollup_buckets', fake)
+    monkeypatch.setattr(spread_screener, 'get_instrument_details', lambda symbols: {})
+    return fake
+
+
+def bucket(exchange, instrument_name, start, funding_sum, updated_at=1):
+    return (exchange, instrument_name, start, funding_sum, UPDATED + timedelta(seconds=updated_at))
+
+
+def rate(window, instrument_name, exchange):
+    return window.matrix.rates[window.rows[instrument_name], EXCHANGES.index(exchange)]
+
+
+@pytest.fixture
+def window(rollups):
+    # A '1h' window spans two hours: three hourly slots, including the current partial hour
+    return RollingFundingWindow('1h', WINDOWS['1h'], full_reload_seconds=3600)
+
+
+def test_window_sums_the_buckets_in_the_window(window, rollups):
+    rollups.pending = [
+        bucket('bybit', 'BTC', START, 0.001),
+        bucket('bybit', 'BTC', START + HOUR, 0.002),
+        bucket('aevo', 'BTC', START + HOUR, -0.001),
+        bucket('aevo', 'ETH', START + HOUR, 0.0005),
+    ]
+    window.refresh(START + HOUR + 30 * 60 * 1000, generation=1)
+
+    assert window.slots == 3
+    assert rate(window, 'BTC', 'bybit') == pytest.approx(0.3)
+    assert rate(window, 'BTC', 'aevo') == pytest.approx(-0.1)
+    assert rate(window, 'ETH', 'aevo') == pytest.approx(0.05)
+    assert np.isnan(rate(window, 'ETH', 'bybit'))
+
+
+def test_rewritten_bucket_replaces_its_previous_sum(window, rollups):
+    rollups.pending = [bucket('bybit', 'BTC', START, 0.001)]
+    window.refresh(START + 30 * 60 * 1000, generation=1)
+
+    rollups.pending = [bucket('bybit', 'BTC', START, 0.003, updated_at=2)]
+    window.refresh(START + 40 * 60 * 1000, generation=2)
+
+    assert rate(window, 'BTC', 'bybit') == pytest.approx(0.3)
+    # The incremental read starts from the newest update seen, less the overlap
+    assert rollups.reads[-1][1] == UPDATED + timedelta(seconds=1) - spread_screener.WATERMARK_OVERLAP
+
+
+def test_buckets_leaving_the_window_are_cleared(window, rollups):
+    rollups.pending = [
+        bucket('bybit', 'BTC', START, 0.001),
+        bucket('bybit', 'BTC', START + HOUR, 0.002),
+    ]
+    now = START + HOUR + 30 * 60 * 1000
+    window.refresh(now, generation=1)
+    assert not window.needs_refresh(now, generation=1)
+
+    # Two hours later the START bucket is out of the window, with no new data
+    later = START + 2 * HOUR + 30 * 60 * 1000
+    assert window.needs_refresh(later, generation=1)
+    window.refresh(later, generation=1)
+
+    expired_slot = (START // HOUR) % window.slots
+    assert window.slot_starts[expired_slot] == -1
+    assert np.isnan(window.ring[expired_slot]).all()
+    assert rate(window, 'BTC', 'bybit') == pytest.approx(0.2)
+
+
+def test_ring_slots_are_reused_by_newer_buckets(window, rollups):
+    rollups.pending = [bucket('bybit', 'BTC', START, 0.001)]
+    window.refresh(START + 30 * 60 * 1000, generation=1)
+
+    # Three hours later START's slot comes round again, now for a different instrument
+    later = START + 3 * HOUR
+    rollups.pending = [bucket('aevo', 'ETH', later, 0.002)]
+    window.refresh(later + 30 * 60 * 1000, generation=2)
+
+    slot = (START // HOUR) % window.slots
+    assert (later // HOUR) % window.slots == slot
+    assert window.slot_starts[slot] == later
+    assert np.isnan(rate(window, 'BTC', 'bybit'))
+    assert rate(window, 'ETH', 'aevo') == pytest.approx(0.2)
+    assert window.ring.shape == (3, 2, len(EXCHANGES))
+
+
+def test_new_instruments_get_rows_without_disturbing_existing_ones(window, rollups):
+    rollups.pending = [bucket('bybit', 'BTC', START, 0.001)]
+    window.refresh(START + 30 * 60 * 1000, generation=1)
+
+    rollups.pending = [bucket('bybit', 'SOL', START, 0.004), bucket('gateio', 'ADA', START, 0.002)]
+    window.refresh(START + 35 * 60 * 1000, generation=2)
+
+    assert window.symbols == ['BTC', 'ADA', 'SOL']
+    assert rate(window, 'BTC', 'bybit') == pytest.approx(0.1)
+    assert rate(window, 'SOL', 'bybit') == pytest.approx(0.4)
+    assert rate(window, 'ADA', 'gateio') == pytest.approx(0.2)
+
+
+def test_new_generation_triggers_a_refresh(window, rollups):
+    now = START + 30 * 60 * 1000
+    window.refresh(now, generation=1)
+
+    assert not window.needs_refresh(now, generation=1)
+    assert window.needs_refresh(now, generation=2)
+
+
+def test_coin_filter_is_case_insensitive(window, rollups, monkeypatch):
+    rollups.pending = [
+        bucket('bybit', 'kPEPE', START, 0.001),
+        bucket('aevo', 'kPEPE', START, 0.003),
+        bucket('bybit', 'PEPE', START, 0.002),
+        bucket('aevo', 'PEPE', START, 0.001),
+    ]
+    window.refresh(START + 30 * 60 * 1000, generation=1)
+    monkeypatch.setattr(spread_screener.spread_screener, 'window', lambda timeframe: window)
+    monkeypatch.setattr(window, 'get', lambda: window.matrix)
+
+    result = spread_screener.screen_spreads('1h', ['bybit', 'aevo'], coin='KPEPE')
+
+    assert [row['coin'] for row in result['data']] == ['kPEPE']
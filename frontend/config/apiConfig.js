@@ -5,7 +5,7 @@ export const API_CONFIG = {
     endpoints: {
         auth: `${baseUrl}/api/auth/`,
         register: `${baseUrl}/api/user/`,
-        allCoin: (page, limit, time, keyword) => `${baseUrl}/api/funding-rates/aggregated-funding?page=${page}&limit=${limit}&time=${time}&keyword=${keyword}`,
+        allCoin: (page, limit, time, keyword, cursor) => `${baseUrl}/api/funding-rates/aggregated-funding?page=${page}&limit=${limit}&time=${time}&keyword=${keyword}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''),
         coinList: (keyword) => `${baseUrl}/api/funding-rates/coins?keyword=${keyword}`,
         detailCoin: (coin) => `${baseUrl}/api/funding-rates/coin-details-cmc?coin=${coin}`,
         // Add other endpoints as needed
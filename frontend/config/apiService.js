@@ -71,11 +71,11 @@ const fetchDetailCoin = async (coin) => {
     }
 };
 
-const fetchCoin = async (page, limit, time, keyword, abortSignal) => {
+const fetchCoin = async (page, limit, time, keyword, abortSignal, cursor = null) => {
     const token = getCookie('token'); // Ambil token dari cookie
 
     try {
-        const response = await fetch(API_CONFIG.endpoints.allCoin(page, limit, time, keyword), {
+        const response = await fetch(API_CONFIG.endpoints.allCoin(page, limit, time, keyword, cursor), {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json',
@@ -23,6 +23,7 @@ const calculateButton = document.querySelector('.calculate-button');
 let currentTimeFilter = '1h'; // Default time filter
 let searchQuery = ''; // Default search query
 let currentPage = 1;
+let nextCursor = null; // Cursor of the next page, from the last response
 const limitPerPage = 20;
 let isFetching = false;
 let allCoinData = []; // Store all fetched data
@@ -145,6 +146,7 @@ const setupEventListeners = () => {
             searchQuery = searchBarMobile.value;
             allCoinData = [];
             currentPage = 1;
+            nextCursor = null;
             if (searchQuery) {
                 filterAndRenderData(); // Filter and render data when the search query changes
             } else {
@@ -160,6 +162,7 @@ const setupEventListeners = () => {
             searchQuery = searchBarDesktop.value;
             allCoinData = [];
             currentPage = 1;
+            nextCursor = null;
             if (searchQuery) {
                 filterAndRenderData(); // Filter and render data when the search query changes
             } else {
@@ -192,7 +195,7 @@ const fetchAndRenderCoinData = async () => {
 
     try {
         // Fetch ticker data for the current page
-        const tickerData = await fetchCoin(currentPage, limitPerPage, currentTimeFilter, searchQuery, abortController.signal);
+        const tickerData = await fetchCoin(currentPage, limitPerPage, currentTimeFilter, searchQuery, abortController.signal, nextCursor);
 
         // If the current request is no longer the latest one, do nothing
         if (currentRequestId !== requestId) return;
@@ -205,6 +208,7 @@ const fetchAndRenderCoinData = async () => {
         if (!tickerData.meta || !tickerData.meta.isNextPage) {
             isNextPageAvailable = false;
         }
+        nextCursor = tickerData.meta ? tickerData.meta.nextCursor : null;
 
         // Process the fetched data
         const coinData = tickerData.data.map((coin) => ({
@@ -330,6 +334,7 @@ const refreshData = () => {
     isNextPageAvailable = true;
     isFetching = false;
     currentPage = 1;
+    nextCursor = null;
     allCoinData = []; // Clear existing data
     tableBody.innerHTML = '';
     fetchAndRenderCoinData();